@@ -1,19 +1,23 @@
-from PyQt5.QtCore import QThread
-from lark.exceptions import VisitError
-
-from . import reader
-from .reference import RunnerThread
+"""
+scripts run on a RunnerThread (thread.py) in the gui, and without qt through the command line (python -m autoTest)
+"""
 
 scriptRunning = False
-runnerThread: RunnerThread | None = None
+# thread.RunnerThread of the running script, pyqt is only imported once a script runs in the gui
+runnerThread = None
 
-def runScript(script, addPoint, scriptComplete):
+def runScript(script, addPoint, scriptComplete, session=None):
+    """
+    session: name of the board session the script starts on, defaults to the active one
+    """
     global scriptRunning
     global runnerThread
 
+    from .thread import RunnerThread
+
     scriptRunning = True
 
-    runnerThread = RunnerThread(script, scriptComplete, addPoint)
+    runnerThread = RunnerThread(script, scriptComplete, addPoint, session)
     runnerThread.start()
 
 def cancelScript():
@@ -21,36 +25,3 @@ def cancelScript():
     global runnerThread
 
     runnerThread.stop()
-
-class RunnerThread(QThread):
-    def __init__(self, script, scriptComplete, addPoint):
-        QThread.__init__(self)
-
-        self.script = script
-        self.scriptComplete = scriptComplete
-        self.addPoint = addPoint
-        self.runner = None
-
-        self.running = False
-
-    def run(self):
-        global scriptRunning
-
-        self.running = True
-        tree = reader.parse(self.script)
-        self.runner = reader.Runner(self.addPoint)
-        try:
-            self.runner.transform(tree)
-        except VisitError as e:
-            if isinstance(e.__context__, reader.AbortExecution):
-                pass
-            else:
-                raise
-        self.scriptComplete()
-        scriptRunning = False
-        self.running = False
-
-    def stop(self):
-        self.runner.abortFlag = True
-        self.runner.timer.set()
-        self.running = False
\ No newline at end of file
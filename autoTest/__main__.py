@@ -0,0 +1,139 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from lark.exceptions import LarkError, VisitError
+
+import board
+import nums
+
+from board.headless import POINT_COLUMNS
+from nums.catalog import CATALOG_FILE, Catalog
+from nums.sink import openSink
+
+from . import reader
+
+"""
+Command line test runner, no qt involved
+    python -m autoTest run scripts/Thrust --port /dev/ttyACM0 --out run.csv
+
+connects, waits for data, runs the script on the main thread and writes every ADD_POINT to the csv (or .tsdat, see
+nums/sink.py) as it happens (one flushed row per point, so an interrupted overnight sweep keeps what it measured), the
+throttle is set to 0 at the end
+every channel of a point is its mean and standard deviation over the session's rolling window, see board/rolling.py
+and SET_WINDOW
+a run with --out is registered in the session catalog (see nums/catalog.py) once it ends, --tag adds metadata to find
+it by, e.g. --tag prop="APC 10x7"
+exit status: 0 done, 1 script or connection error, 130 interrupted
+"""
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(prog="python -m autoTest", description="Runs test scripts without the gui")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run a script against a stand")
+    run.add_argument("script", help="script file, e.g. scripts/Thrust")
+    run.add_argument("--port", required=True, help="serial port, or sim:// / replay:// url")
+    run.add_argument("--baud", type=int, default=9600, help="baudrate (default 9600)")
+    run.add_argument("--out", help="csv (or binary .tsdat) file for the recorded points, printed only if omitted")
+    run.add_argument("--binary", action="store_true", help="use the binary protocol if the firmware supports it")
+    run.add_argument("--record", help="also record the raw serial stream to this .tsraw file")
+    run.add_argument("--ring", help="keep every frame of the last --ring-hours in this memory mapped .tsring file")
+    run.add_argument("--ring-hours", type=float, default=1.0, help="hours the --ring file holds (default 1)")
+    run.add_argument("--catalog", default=CATALOG_FILE,
+                     help=f"session catalog the --out file is registered in (default {CATALOG_FILE}), '' for none")
+    run.add_argument("--tag", action="append", default=[], metavar="KEY=VALUE",
+                     help="metadata stored with the session in the catalog, can be repeated")
+    run.add_argument("--timeout", type=float, default=5.0, help="seconds to wait for the first data (default 5)")
+    return parser.parse_args(argv)
+
+
+def run(args) -> int:
+    try:
+        tree = reader.parse(args.script)
+    except (OSError, LarkError) as e:
+        print(f"error: can't load {args.script}: {e}", file=sys.stderr)
+        return 1
+    tags = dict(tag.partition("=")[::2] for tag in args.tag)
+
+    # files first, a bad path must not leave the port open behind it
+    out = None
+    session = board.createSession(headless=True)
+    try:
+        if args.out:
+            out = openSink(args.out, POINT_COLUMNS, chunkRows=1)
+        if args.record:
+            session.startRecording(args.record, args.baud)
+        if args.ring:
+            session.startRingLog(args.ring, args.ring_hours)
+    except OSError as e:
+        print(f"error: {e}", file=sys.stderr)
+        session.stopRecording()
+        session.stopRingLog()
+        if out:
+            out.close()
+        return 1
+    if not session.connect(args.port, args.baud):
+        print(f"error: can't open {args.port}", file=sys.stderr)
+        session.stopRecording()
+        session.stopRingLog()
+        if out:
+            out.close()
+        return 1
+    session.start()
+
+    started = time.time()
+
+    def addPoint(timer=None, throttle=None, session=session, snapshot=None, stats=None):
+        point = session.point(timer, throttle, snapshot, stats)
+        if out:
+            out.addPoint(point)
+        print("  ".join(f"{name}={value:.6g}" if isinstance(value, float) else f"{name}={value}"
+                        for name, value in point.items() if not name.endswith("Std")))
+
+    try:
+        session.setBoardTime(True)
+        if args.binary:
+            session.setBinaryMode(True)
+        session.negotiateRate(args.binary)
+        if not session.waitForFrame(args.timeout):
+            print(f"error: no data from {args.port} within {args.timeout:g} s", file=sys.stderr)
+            return 1
+
+        start = time.monotonic()
+        reader.Runner(addPoint, session.name).transform(tree)
+        print(f"done in {time.monotonic() - start:.1f} s", file=sys.stderr)
+        return 0
+    except VisitError as e:
+        print(f"error: {e.orig_exc!r} in {args.script}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("interrupted", file=sys.stderr)
+        return 130
+    finally:
+        session.setThrottle(0)
+        session.disconnect()
+        if out:
+            out.close()
+            if args.catalog:
+                # read back from the file, the run itself keeps no rows in memory
+                try:
+                    written = nums.load(args.out)
+                    with Catalog(args.catalog) as catalog:
+                        catalog.register(written, args.out, session.name, os.path.basename(args.script), started,
+                                         metadata=tags)
+                except (OSError, ValueError, sqlite3.Error) as e:
+                    print(f"warning: {args.out} not registered in {args.catalog}: {e}", file=sys.stderr)
+
+
+def main(argv=None) -> int:
+    args = parseArgs(argv)
+    if args.command == "run":
+        return run(args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
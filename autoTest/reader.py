@@ -1,3 +1,4 @@
+import os
 import time
 import threading
 
@@ -5,7 +6,8 @@ from lark import Lark, Transformer
 
 import board
 
-with open("autotest/grammar.lark") as f:
+# next to this file, so scripts run from any working directory
+with open(os.path.join(os.path.dirname(__file__), "grammar.lark")) as f:
     grammar = f.read()
 
 lParser = Lark(grammar, start="start")
@@ -17,14 +19,21 @@ def parse(filename):
 class AbortExecution(Exception):
     pass
 
+# how long ADD_POINT waits for a full set of new readings before it takes the latest ones
+FRESH_TIMEOUT = 2.0
+
 class Runner(Transformer):
-    def __init__(self, addPoint):
+    def __init__(self, addPoint, session=None):
+        """
+        session: name of the board session (stand) to drive, defaults to the active one when the script starts
+        """
         super().__init__()
 
         self.addPoint = addPoint
+        self.session = board.getSession(session)
         self.abortFlag = False
         self.useRaw = False
-        self.scriptStart = time.time() * 1000
+        self.scriptStart = time.monotonic_ns()
         self.timer = threading.Event()
 
         self.throttle = 0
@@ -34,32 +43,34 @@ class Runner(Transformer):
         throttle, = args
         throttle = int(throttle)
         if 0 <= throttle <= 100:
-            board.setThrottle(throttle)
+            self.session.setThrottle(throttle)
         self.throttle = throttle
 
     def read_cell_1(self, _):
-        self.checkAbort()
-        if self.useRaw:
-            return board.reader.cell1
-        return board.cell1
+        return self.readChannel("cell1")
 
     def read_cell_2(self, _):
-        self.checkAbort()
-        if self.useRaw:
-            return board.reader.cell2
-        return board.cell2
+        return self.readChannel("cell2")
 
     def read_current(self, _):
-        self.checkAbort()
-        if self.useRaw:
-            return board.reader.current
-        return board.current
+        return self.readChannel("current")
 
     def read_voltage(self, _):
+        return self.readChannel("voltage")
+
+    def readChannel(self, channel):
         self.checkAbort()
         if self.useRaw:
-            return board.reader.voltage
-        return board.voltage
+            value = getattr(self.session.reader, channel)
+        else:
+            value = self.session.snapshots.latest().value(channel)
+        # nothing received on the channel yet reads 0, like the board.cell1 etc. globals always did
+        return 0 if value is None else value
+
+    def use_stand(self, args):
+        self.checkAbort()
+        name, = args
+        self.session = board.getSession(str(name))
 
     def wait(self, args):
         self.checkAbort()
@@ -67,6 +78,15 @@ class Runner(Transformer):
         milliseconds = int(milliseconds)
         self.timer.wait(timeout=(milliseconds / 1000))
 
+    def set_window(self, args):
+        self.checkAbort()
+        # ADD_POINT records the mean and spread of every channel over this window
+        length, unit = args
+        if unit.lower() == "samples":
+            self.session.setWindow(samples=int(length))
+        else:
+            self.session.setWindow(ms=int(length))
+
     def use_raw(self, args):
         self.checkAbort()
         rawBool = args[0]
@@ -83,7 +103,20 @@ class Runner(Transformer):
 
     def add_point(self, _):
         self.checkAbort()
-        self.addPoint(timer=int(time.time() * 1000 - self.scriptStart), throttle=self.throttle)
+        # every value of the point is measured after ADD_POINT, so nothing from before the last WAIT sneaks in
+        snapshots = self.session.snapshots
+        after = time.monotonic_ns()
+        deadline = time.monotonic() + FRESH_TIMEOUT
+        snapshot = None
+        while snapshot is None and time.monotonic() < deadline:
+            snapshot = snapshots.waitForFresh(after, 0.1)
+            self.checkAbort()
+        if snapshot is None:
+            # a channel went quiet (muted or a dead load cell), take what there is
+            snapshot = snapshots.latest()
+        timer = (max(snapshot.timestamp, after) - self.scriptStart) // 1_000_000
+        self.addPoint(timer=timer, throttle=self.throttle, session=self.session, snapshot=snapshot,
+                      stats=self.session.rolling.summary())
 
     def checkAbort(self):
         if self.abortFlag:
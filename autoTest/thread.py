@@ -0,0 +1,39 @@
+from PyQt5.QtCore import QThread
+from lark.exceptions import VisitError
+
+import autoTest
+
+from . import reader
+
+
+class RunnerThread(QThread):
+    def __init__(self, script, scriptComplete, addPoint, session=None):
+        QThread.__init__(self)
+
+        self.script = script
+        self.scriptComplete = scriptComplete
+        self.addPoint = addPoint
+        self.session = session
+        self.runner = None
+
+        self.running = False
+
+    def run(self):
+        self.running = True
+        tree = reader.parse(self.script)
+        self.runner = reader.Runner(self.addPoint, self.session)
+        try:
+            self.runner.transform(tree)
+        except VisitError as e:
+            if isinstance(e.__context__, reader.AbortExecution):
+                pass
+            else:
+                raise
+        self.scriptComplete()
+        autoTest.scriptRunning = False
+        self.running = False
+
+    def stop(self):
+        self.runner.abortFlag = True
+        self.runner.timer.set()
+        self.running = False
\ No newline at end of file
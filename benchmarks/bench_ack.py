@@ -0,0 +1,48 @@
+"""
+Command round trips against the simulated stand, ascii and binary protocol
+    python -m benchmarks.bench_ack
+steps the throttle once per cycle and prints the write to reply latency per command kind, plus one command the board
+never answers in time (the timeout is shortened to show it)
+the simulator answers as soon as a command is written, so this is the host side of the round trip, on a real stand the
+link and the firmware loop add to it
+"""
+import time
+
+import board
+
+STEPS = 50
+
+
+def run(binary: bool):
+    session = board.createSession(f"ack{int(binary)}", headless=True)
+    timedOut = []
+    session.acks.onTimeout = timedOut.append
+    session.connect("sim://?rate=80", 115200)
+    session.start()
+    session.setBinaryMode(binary)
+    session.setRate(80)
+    session.setAveraging(5)
+    session.waitForFrame(2)
+    for step in range(STEPS):
+        session.setThrottle(step)
+        session.waitForFrame(1)
+    time.sleep(0.2)
+
+    # an emergency stop right before the board is told to expect it much faster than it can answer
+    session.acks.timeout = 0.0
+    session.emergencyStop()
+    time.sleep(0.2)
+    session.disconnect()
+    board.removeSession(session.name)
+    return session.ackStats(), timedOut
+
+
+if __name__ == "__main__":
+    board.getSession()
+    for binary in (False, True):
+        stats, timedOut = run(binary)
+        print("binary" if binary else "ascii")
+        for key, entry in stats.items():
+            print(f"  {key:5} written {entry['written']:3}  acked {entry['acked']:3}  timed out {entry['timedOut']:2}  "
+                  f"mean {entry['meanMs']:6.3f} ms  p99 <= {entry['p99Ms']:g} ms  max {entry['maxMs']:6.3f} ms")
+        print(f"  timeout events: {[pending.msg for pending in timedOut]}")
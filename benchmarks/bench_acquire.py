@@ -0,0 +1,85 @@
+"""
+Benchmarks board.acquire.LineReader against the old readline() per line loop
+
+the board side is a pseudo terminal, so this only runs on linux/macos
+    python -m benchmarks.bench_acquire
+"""
+import os
+import threading
+import time
+import tty
+
+import serial
+
+from board.acquire import LineReader
+
+LINE_COUNT = 200_000
+CYCLE = b"lc1(-12345)\r\nlc2(6789)\r\ncur(12.34)\r\nvtg(16.80)\r\n"
+
+
+def openPty():
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    ser = serial.Serial(os.ttyname(slave), 115200, timeout=1)
+    os.close(slave)
+    return master, ser
+
+
+def writer(master, payload):
+    view = memoryview(payload)
+    while view:
+        written = os.write(master, view[:65536])
+        view = view[written:]
+
+
+def runReadline(ser, lineCount):
+    count = 0
+    while count < lineCount:
+        if ser.in_waiting:
+            ser.readline()
+            count += 1
+    return count
+
+
+def runLineReader(ser, lineCount):
+    reader = LineReader(ser)
+    count = 0
+    while count < lineCount:
+        count += len(reader.readLines())
+    return count
+
+
+def throughput(name, func):
+    master, ser = openPty()
+    payload = CYCLE * (LINE_COUNT // 4)
+    thread = threading.Thread(target=writer, args=(master, payload), daemon=True)
+    start = time.perf_counter()
+    thread.start()
+    count = func(ser, LINE_COUNT)
+    elapsed = time.perf_counter() - start
+    thread.join()
+    ser.close()
+    os.close(master)
+    print(f"{name:>12}: {count / elapsed:12,.0f} lines/s")
+
+
+def idleCpu(seconds=2.0):
+    master, ser = openPty()
+    reader = LineReader(ser)
+    ser.timeout = 0.5
+    cpuStart = time.process_time()
+    wallStart = time.perf_counter()
+    while time.perf_counter() - wallStart < seconds:
+        reader.readLines()
+    cpu = time.process_time() - cpuStart
+    ser.close()
+    os.close(master)
+    print(f"idle cpu while waiting on an empty port: {cpu / seconds * 100:.2f}%")
+
+
+if __name__ == "__main__":
+    # 115200 baud carries ~11520 bytes/s, the shortest data line is 12 bytes with its terminator
+    print(f"needed at 115200 baud: {115200 / 10 / 12:12,.0f} lines/s")
+    throughput("readline", runReadline)
+    throughput("LineReader", runLineReader)
+    idleCpu()
@@ -0,0 +1,46 @@
+"""
+Many stands in one asyncio event loop, no pyqt
+    python -m benchmarks.bench_aio
+the stands are simulators behind ptys (linux/macos), so the reads go through the event loop's descriptor watching
+"""
+import asyncio
+import sys
+import time
+
+from board.aio import AsyncBoard
+from board.sim import PtySimulator
+
+DURATION = 3.0
+
+
+async def stream(port, counts, index):
+    async with AsyncBoard(port, 115200) as stand:
+        await stand.setBoardTime(True)
+        start = time.perf_counter()
+        async for _ in stand:
+            counts[index] += 1
+            if time.perf_counter() - start >= DURATION:
+                break
+
+
+async def run(count):
+    simulators = [PtySimulator(baudrate=115200, rate=80) for _ in range(count)]
+    for simulator in simulators:
+        simulator.start()
+    counts = [0] * count
+    cpuStart = time.process_time()
+    await asyncio.gather(*(stream(simulator.port, counts, i) for i, simulator in enumerate(simulators)))
+    cpu = time.process_time() - cpuStart
+    for simulator in simulators:
+        simulator.stop()
+
+    rates = [c / DURATION for c in counts]
+    # process time includes the simulators, so this is an upper bound for the readers
+    print(f"{count:>3} stands: frames/s per stand min {min(rates):5.1f} max {max(rates):5.1f}, "
+          f"cpu {cpu / DURATION:6.1%} of one core incl. simulators")
+
+
+if __name__ == "__main__":
+    for count in (1, 4, 16, 32):
+        asyncio.run(run(count))
+    print(f"pyqt imported: {'PyQt5' in sys.modules}")
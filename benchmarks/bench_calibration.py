@@ -0,0 +1,43 @@
+"""
+Calibration of a million samples, frame by frame vs one numpy block
+    python -m benchmarks.bench_calibration
+"""
+import time
+
+import numpy as np
+
+from board.calibration import Calibration
+from board.frame import FRAME_DTYPE, Frame
+
+SAMPLES = 1_000_000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    block = np.zeros(SAMPLES, dtype=FRAME_DTYPE)
+    block["timestamp"] = np.arange(SAMPLES) * 12_500_000
+    block["cell1"] = rng.integers(-2000, 2000, SAMPLES)
+    block["cell2"] = rng.integers(-500, 500, SAMPLES)
+    block["current"] = rng.normal(10, 1, SAMPLES)
+    block["voltage"] = rng.normal(16, 0.1, SAMPLES)
+
+    # a cubic on the thrust cell, the worst case of what fit() produces
+    calibration = Calibration.standard(armLength=0.15).fit("cell1", [0, 100, 500, 1000], [0, 0.99, 4.92, 9.79], 3)
+
+    frames = [Frame(*row) for row in block[:100_000].tolist()]
+    start = time.perf_counter()
+    for frame in frames:
+        calibration.applyFrame(frame)
+    perFrame = (time.perf_counter() - start) / len(frames)
+
+    start = time.perf_counter()
+    calibrated = calibration.apply(block)
+    perBlock = (time.perf_counter() - start) / SAMPLES
+
+    print(f"frame by frame: {perFrame * 1e6:8.3f} us/sample  {1 / perFrame:12,.0f} samples/s")
+    print(f"numpy block:    {perBlock * 1e6:8.3f} us/sample  {1 / perBlock:12,.0f} samples/s")
+    print(f"check: {calibrated['cell1'][0]:.4f} N == {calibration.applyFrame(frames[0]).cell1:.4f} N")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Session catalog lookups across thousands of registered runs
+    python -m benchmarks.bench_catalog
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import nums
+from nums.catalog import Catalog
+
+SESSIONS = 2_000
+POINTS = 400
+PROPS = ["APC 10x7", "APC 11x5.5", "T-Motor 12x4", "Gemfan 9x4.5"]
+
+
+def fill(catalog):
+    rng = np.random.default_rng(1)
+    columns = ["Time", "Throttle", "Thrust", "Torque", "Voltage", "Current"]
+    start = time.perf_counter()
+    for i in range(SESSIONS):
+        top = rng.integers(40, 101)
+        throttle = np.linspace(0, top, POINTS).round()
+        datasheet = nums.Datasheet.fromColumns({
+            "Time": np.arange(POINTS) * 250.0,
+            "Throttle": throttle,
+            "Thrust": throttle * 12 + rng.normal(0, 5, POINTS),
+            "Torque": throttle * 0.4,
+            "Voltage": np.full(POINTS, 16.0),
+            "Current": throttle * 0.3
+        }, dict.fromkeys(columns[:2], True))
+        catalog.register(datasheet, f"run{i}.csv", stand=f"stand{i % 3}", script=["Thrust", "Sweep"][i % 2],
+                         started=1.7e9 + i * 600, metadata={"prop": PROPS[i % len(PROPS)]})
+    return (time.perf_counter() - start) / SESSIONS
+
+
+def timed(function, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory, Catalog(os.path.join(directory, "sessions.db")) as catalog:
+        perSession = fill(catalog)
+        print(f"register, {POINTS} points each:             {perSession * 1000:8.2f} ms/session")
+        queries = {
+            "prop above 80% throttle":          lambda: catalog.find(minThrottle=80, prop="APC 10x7"),
+            "one stand, last day":              lambda: catalog.find(stand="stand1", since=1.7e9 + (SESSIONS - 144) * 600),
+            "script, all time":                 lambda: catalog.find(script="Sweep"),
+            "points above 80%, one prop":       lambda: catalog.points(minThrottle=80, prop="APC 10x7"),
+            "points 50-55%, one stand, script": lambda: catalog.points(minThrottle=50, maxThrottle=55, stand="stand2",
+                                                                       script="Thrust"),
+        }
+        for name, query in queries.items():
+            seconds, result = timed(query)
+            count = len(result) if isinstance(result, list) else len(result["Row"])
+            print(f"{name:<38} {seconds * 1000:8.2f} ms  {count:>7,} results")
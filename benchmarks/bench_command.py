@@ -0,0 +1,65 @@
+"""
+Throttle slider sweep over a simulated 9600 baud link, plain fifo (what SerialWorker did) vs CommandScheduler
+    python -m benchmarks.bench_command
+the slider fires valueChanged for every step, 0 -> 100 -> 0 in one second here
+"""
+import queue
+import threading
+import time
+
+from board.command import CommandScheduler
+
+BAUDRATE = 9600
+
+
+def link(data):
+    # the port blocks once its transmit buffer is full, so writes take as long as the bytes take on the wire
+    time.sleep(len(data) * 10 / BAUDRATE)
+
+
+def sweep():
+    steps = list(range(101)) + list(range(99, -1, -1))
+    for throttle in steps:
+        yield f"thr({throttle})"
+        time.sleep(1 / len(steps))
+
+
+def fifo():
+    commands = queue.Queue()
+    written = []
+
+    def worker():
+        while (msg := commands.get()) is not None:
+            link((msg + "\n").encode())
+            written.append(time.monotonic())
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    for msg in sweep():
+        commands.put(msg)
+    lastSubmit = time.monotonic()
+    commands.put(None)
+    thread.join()
+    return len(written), written[-1] - lastSubmit
+
+
+def scheduled():
+    scheduler = CommandScheduler(link, BAUDRATE)
+    scheduler.start()
+    for msg in sweep():
+        scheduler.submit(msg)
+    while scheduler.depth:
+        time.sleep(0.001)
+    time.sleep(0.05)
+    scheduler.stop()
+    stats = scheduler.stats()
+    return stats["sent"], scheduler.lastLatency, stats
+
+
+if __name__ == "__main__":
+    sent, lag = fifo()
+    print(f"fifo:      {sent:4} commands written, final throttle reached the board {lag * 1000:7.1f} ms after the slider stopped")
+    sent, lag, stats = scheduled()
+    print(f"scheduler: {sent:4} commands written, final throttle reached the board {lag * 1000:7.1f} ms after the slider stopped")
+    print(f"           coalesced {stats['coalesced']}, max queue depth {stats['maxDepth']}, "
+          f"mean latency {stats['meanLatencyMs']:.1f} ms, max {stats['maxLatencyMs']:.1f} ms")
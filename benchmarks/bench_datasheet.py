@@ -0,0 +1,61 @@
+"""
+Cost of one Datasheet.addPoint as the table grows to a million rows, and the pd.concat per row it replaced
+    python -m benchmarks.bench_datasheet
+"""
+import time
+
+import pandas as pd
+
+import nums
+
+COLUMNS = ["Time", "Throttle", "Thrust", "Torque", "Voltage", "Current"]
+ROWS = 1_000_000
+# the old way gets too slow to run much further
+CONCAT_ROWS = 4_000
+
+
+def point(i):
+    return {"Time": i * 250, "Throttle": i % 101, "Thrust": 1200 + i % 7, "Torque": 150 - i % 5,
+            "Voltage": 16.02, "Current": 12.5}
+
+
+def concat():
+    dataframe = pd.DataFrame(columns=COLUMNS)
+    marks = {}
+    start = time.perf_counter()
+    for i in range(CONCAT_ROWS):
+        dataframe = pd.concat([dataframe, pd.DataFrame(point(i), index=[0])], ignore_index=True)
+        if (i + 1) % 1000 == 0:
+            now = time.perf_counter()
+            marks[i + 1] = (now - start) / 1000
+            start = now
+    return marks
+
+
+def columnar():
+    datasheet = nums.Datasheet(COLUMNS)
+    points = [point(i % 10_000) for i in range(10_000)]
+    marks = {}
+    decade = 1000
+    start = time.perf_counter()
+    for i in range(ROWS):
+        datasheet.addPoint(points[i % 10_000])
+        if i + 1 == decade:
+            now = time.perf_counter()
+            marks[decade] = (now - start) / (decade - decade // 10 if decade > 1000 else decade)
+            decade *= 10
+            start = now
+    start = time.perf_counter()
+    datasheet.getDF()
+    return marks, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print("pd.concat per row")
+    for rows, cost in concat().items():
+        print(f"  rows {rows - 999:>9,} - {rows:>9,}: {cost * 1e6:10.1f} us/point")
+    marks, materialize = columnar()
+    print("Datasheet")
+    for rows, cost in marks.items():
+        print(f"  rows {rows // 10 + 1 if rows > 1000 else 1:>9,} - {rows:>9,}: {cost * 1e6:10.2f} us/point")
+    print(f"  DataFrame of {ROWS:,} rows: {materialize * 1000:.0f} ms")
@@ -0,0 +1,37 @@
+"""
+Decimating a few million samples to plot and export sizes, and whether a single spike survives
+    python -m benchmarks.bench_decimate
+"""
+import time
+
+import numpy as np
+
+import nums
+from nums import decimate
+
+SAMPLES = 4_000_000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    x = np.arange(SAMPLES) * 12.5
+    y = np.cumsum(rng.normal(size=SAMPLES))
+    spike = SAMPLES // 3
+    y[spike] += 1000
+
+    for target in (1000, 10000):
+        for name, method in (("minMax", lambda: decimate.minMax(y, target)),
+                             ("lttb", lambda: decimate.lttb(x, y, target))):
+            start = time.perf_counter()
+            keep = method()
+            elapsed = time.perf_counter() - start
+            print(f"{name:7} {SAMPLES:,} -> {len(keep):6,}: {elapsed * 1000:7.1f} ms  spike kept: {spike in keep}")
+
+    datasheet = nums.Datasheet.fromColumns({"Time": x, "Thrust": y, "Current": -y}, {"Time": True})
+    start = time.perf_counter()
+    decimated = datasheet.decimated(10000)
+    print(f"datasheet, 3 columns -> {len(decimated):,} rows: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
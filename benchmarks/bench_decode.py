@@ -0,0 +1,73 @@
+"""
+Benchmarks the protocol decoders against the old startswith + re.match decode
+    python -m benchmarks.bench_decode
+"""
+import time
+
+import numpy as np
+
+from board import protocol
+from board.read import SerialReader, parseLong, parseFloat
+
+CYCLE_COUNT = 50_000
+CYCLE = ["lc1(-12345)", "lc2(n)", "cur(12.34)", "vtg(16.80)"]
+# bulk decodes are timed this many times and the fastest run is reported
+BULK_REPEATS = 5
+
+
+def legacyDecode(line):
+    """
+    SerialReader.decode before the protocol module, without the signal emits
+    """
+    if line.startswith("lc1("):
+        return parseLong(line)
+    elif line.startswith("lc2("):
+        return parseLong(line)
+    elif line.startswith("cur("):
+        return parseFloat(line)
+    elif line.startswith("vtg("):
+        return parseFloat(line)
+
+
+def splitDecode(data):
+    """
+    The per line decoder applied to a whole buffer, the baseline the bulk path has to beat
+    """
+    indices = []
+    values = []
+    for line in str(data, "utf-8").split("\r\n"):
+        decoded = protocol.decodeLine(line)
+        if decoded is not None:
+            indices.append(decoded[0])
+            values.append(np.nan if decoded[1] is None else decoded[1])
+    return np.array(indices, dtype=np.int8), np.array(values)
+
+
+def perLine(name, func, lines):
+    start = time.perf_counter()
+    for line in lines:
+        func(line)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>28}: {len(lines) / elapsed:12,.0f} lines/s")
+
+
+def bulk(name, func, data, lineCount):
+    elapsed = float("inf")
+    for _ in range(BULK_REPEATS):
+        start = time.perf_counter()
+        func(data)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    print(f"{name:>28}: {lineCount / elapsed:12,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    lines = CYCLE * CYCLE_COUNT
+    data = ("\r\n".join(lines) + "\r\n").encode()
+
+    perLine("legacy decode", legacyDecode, lines)
+    perLine("protocol.decodeLine", protocol.decodeLine, lines)
+    perLine("SerialReader.decode (full)", SerialReader({"cell1": 0, "cell2": 0, "current": 0, "voltage": 0}).decode,
+            lines)
+    bulk("split + decodeLine to arrays", splitDecode, data, len(lines))
+    bulk("protocol.decodeBuffer", protocol.decodeBuffer, data, len(lines))
+    bulk("protocol.decodeBlock", protocol.decodeBlock, data, len(lines))
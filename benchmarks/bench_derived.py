@@ -0,0 +1,61 @@
+"""
+Derived columns kept up to date as rows arrive: reading the table after every point (what the gui does) fills in one
+row, against recomputing the whole column every time
+    python -m benchmarks.bench_derived
+"""
+import time
+
+import numpy as np
+
+import nums
+from nums import derived
+
+COLUMNS = ["Time", "Throttle", "Thrust", "Torque", "Voltage", "Current"]
+ROWS = 100_000
+
+
+def point(i):
+    return {"Time": i * 250, "Throttle": i % 101, "Thrust": 1200.0 + i % 7, "Torque": 150.0 - i % 5,
+            "Voltage": 16.02, "Current": 12.5 + i % 3}
+
+
+def incremental():
+    datasheet = nums.Datasheet(COLUMNS, derived=derived.DEFAULTS)
+    efficiency = datasheet.columns.index("Efficiency")
+    start = time.perf_counter()
+    for i in range(ROWS):
+        datasheet.addPoint(point(i))
+        datasheet.value(i, efficiency)
+    return (time.perf_counter() - start) / ROWS, datasheet
+
+
+def recompute(datasheet, rows):
+    expressions = derived.compileAll(derived.DEFAULTS, COLUMNS)
+    columns = {col: datasheet.column(col) for col in COLUMNS}
+    start = time.perf_counter()
+    for end in range(len(datasheet) - rows, len(datasheet)):
+        values = {col: array[:end + 1] for col, array in columns.items()}
+        for name, expression in expressions.items():
+            values[name] = expression(values)
+    return (time.perf_counter() - start) / rows
+
+
+if __name__ == "__main__":
+    perPoint, datasheet = incremental()
+    base = nums.Datasheet(COLUMNS)
+    for i in range(ROWS):
+        base.addPoint(point(i))
+    start = time.perf_counter()
+    for i in range(ROWS):
+        base.addPoint(point(i))
+    plain = (time.perf_counter() - start) / ROWS
+    print(f"addPoint without derived columns:        {plain * 1e6:8.2f} us/point")
+    print(f"addPoint + read, Power and Efficiency:   {perPoint * 1e6:8.2f} us/point")
+    print(f"recomputing both at {ROWS:,} rows:          {recompute(datasheet, 100) * 1e6:8.2f} us/point")
+    # an overflowing expression is nan straight away instead of hanging the gui thread
+    start = time.perf_counter()
+    assert np.isnan(derived.Expression("9**9**9")({}))
+    assert np.isnan(derived.Expression("Throttle ** 9**9")({"Throttle": 3}))
+    print(f"9**9**9 evaluated in:                    {(time.perf_counter() - start) * 1e6:8.2f} us")
+    power = datasheet.column("Power")
+    assert np.allclose(power, datasheet.column("Voltage") * datasheet.column("Current"))
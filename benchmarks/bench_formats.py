@@ -0,0 +1,56 @@
+"""
+Export and import of a million row session, csv against the binary formats
+    python -m benchmarks.bench_formats
+parquet and arrow are skipped without pyarrow
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import nums
+from nums import formats
+
+ROWS = 1_000_000
+
+
+def session() -> nums.Datasheet:
+    rng = np.random.default_rng(0)
+    millis = np.arange(ROWS) * 12
+    throttle = np.repeat(np.arange(0, 101, 10), ROWS // 11 + 1)[:ROWS]
+    thrust = (throttle ** 2 * 0.2 + rng.normal(0, 3, ROWS)).round()
+    torque = (throttle ** 2 * 0.03 + rng.normal(0, 1, ROWS)).round()
+    voltage = (16.8 - throttle * 0.008 + rng.normal(0, 0.02, ROWS)).round(2)
+    current = (throttle ** 1.5 * 0.04 + rng.normal(0, 0.05, ROWS)).round(2)
+    # the load cells report n now and then
+    thrust[rng.random(ROWS) < 0.001] = np.nan
+    return nums.Datasheet.fromColumns(
+        {"Time": millis, "Throttle": throttle, "Thrust": thrust, "Torque": torque, "Voltage": voltage,
+         "Current": current},
+        {"Time": True, "Throttle": True, "Thrust": True, "Torque": True}
+    )
+
+
+def main():
+    datasheet = session()
+    extensions = [".csv", ".npz"] + (list(formats.ARROW_EXTENSIONS[:2]) if formats.hasArrow() else [])
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'format':10} {'write s':>8} {'read s':>8} {'size MB':>8}")
+        for extension in extensions:
+            path = os.path.join(directory, "session" + extension)
+            start = time.perf_counter()
+            path = datasheet.export(path)
+            written = time.perf_counter() - start
+            start = time.perf_counter()
+            loaded = nums.load(path)
+            read = time.perf_counter() - start
+            assert loaded.integral == datasheet.integral and np.allclose(
+                loaded.column("Thrust"), datasheet.column("Thrust"), equal_nan=True)
+            print(f"{extension:10} {written:8.2f} {read:8.2f} {os.path.getsize(path) / 1e6:8.1f}")
+        if not formats.hasArrow():
+            print("(parquet / arrow skipped, pyarrow isn't installed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Cost of adding one sample to a live graph as the buffer grows, against the np.roll + setData per sample it replaced,
+and the cost of one capped redraw (offscreen, so painting itself isn't counted, which the old way paid per sample)
+    python -m benchmarks.bench_graph
+"""
+import os
+import time
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+# ui modules load their resources relative to the repository
+os.chdir(os.path.join(os.path.dirname(__file__), ".."))
+
+from ui.test import AutoUpdateGraph, GRAPH_POINTS
+
+SAMPLES = 20_000
+ROLL_SAMPLES = 500
+
+
+def perSample(graph, count):
+    values = np.random.default_rng(0).normal(0, 1, count).tolist()
+    start = time.perf_counter()
+    for i, value in enumerate(values):
+        graph.addPointFloat(value, i + 1)
+    return (time.perf_counter() - start) / count
+
+
+def rollAndDraw(graph, count):
+    """
+    what every sample used to cost
+    """
+    data = np.zeros(graph.buffer_size)
+    start = time.perf_counter()
+    for i in range(count):
+        data[i % graph.buffer_size] = i
+        graph.curve.setData(np.roll(data, -(i + 1) % graph.buffer_size))
+    return (time.perf_counter() - start) / count
+
+
+def redraw(graph, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        graph.dirty = True
+        graph.redraw()
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    app = QApplication([])
+    for size in (2_000, 20_000, 200_000, 2_000_000):
+        graph = AutoUpdateGraph(size, GRAPH_POINTS)
+        graph.show()
+        # full buffers, so the redraw decimates all of it
+        added = perSample(graph, max(SAMPLES, size))
+        drawn = redraw(graph)
+        rolled = rollAndDraw(graph, ROLL_SAMPLES)
+        print(f"buffer {size:>9,}: add {added * 1e6:6.2f} us/sample, redraw {drawn * 1000:7.2f} ms, "
+              f"roll + setData per sample {rolled * 1000:7.2f} ms")
@@ -0,0 +1,34 @@
+"""
+Runs the firmware model at the negotiated rate for a range of baudrates and reports the rate it actually achieves
+    python -m benchmarks.bench_rate
+"""
+from board import binary, protocol, rate
+from board.firmware import FirmwareModel
+
+DURATION_MS = 10_000
+
+
+def achievedRate(baudrate, useBinary):
+    model = FirmwareModel(baudrate)
+    model.setup()
+    hz = rate.maxRate(baudrate, useBinary)
+    model.receive(f"bin({int(useBinary)})\nrate({hz})\n".encode())
+    model.loop()
+
+    start = model.millis
+    output = model.run(DURATION_MS)
+    elapsed = (model.millis - start) / 1000
+    if useBinary:
+        cycles = len(binary.BinaryDecoder().feed(output))
+    else:
+        cycles = len(protocol.decodeBlock(output))
+    linkUse = len(output) * 10 / elapsed / baudrate
+    return hz, cycles / elapsed, linkUse
+
+
+if __name__ == "__main__":
+    print(f"{'baud':>8} {'protocol':>8} {'requested':>10} {'achieved':>10} {'link use':>9}")
+    for baudrate in (9600, 19200, 57600, 115200):
+        for useBinary in (False, True):
+            hz, achieved, linkUse = achievedRate(baudrate, useBinary)
+            print(f"{baudrate:>8} {'binary' if useBinary else 'ascii':>8} {hz:>8} Hz {achieved:>7.1f} Hz {linkUse:>8.0%}")
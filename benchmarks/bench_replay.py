@@ -0,0 +1,45 @@
+"""
+Records the simulated stand, then replays the recording headless through the decoder
+    python -m benchmarks.bench_replay
+replaying twice has to produce identical frames, that's what makes recordings usable for reproducing issues
+"""
+import os
+import tempfile
+import time
+
+import board
+
+DURATION = 2.0
+
+
+def recordSim(path, url="sim://?speed=0&rate=80&seed=1"):
+    board.connect(url, 115200)
+    board.startRecording(path)
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        board.getLines()
+    board.disconnect()
+
+
+def replayFrames(path):
+    frames = []
+    board.frameReceived.connect(frames.append)
+    start = time.perf_counter()
+    counts = board.replay(path, speed=0)
+    elapsed = time.perf_counter() - start
+    board.frameReceived.disconnect(frames.append)
+    return frames, counts, elapsed
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sim.tsraw")
+        recordSim(path)
+        size = os.path.getsize(path)
+
+        first, counts, elapsed = replayFrames(path)
+        second, _, _ = replayFrames(path)
+
+    print(f"recording: {size / 1e6:.1f} MB, {counts['chunks']:,} chunks, {counts['lines']:,} lines")
+    print(f"replay: {counts['lines'] / elapsed:,.0f} lines/s {len(first) / elapsed:,.0f} frames/s")
+    print(f"deterministic: {first == second}")
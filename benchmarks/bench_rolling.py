@@ -0,0 +1,46 @@
+"""
+Cost per frame of the rolling window statistics, constant whatever the window, against recomputing them over the
+window with numpy on every frame
+    python -m benchmarks.bench_rolling
+"""
+import time
+
+import numpy as np
+
+from board.frame import Frame
+from board.rolling import RollingStore
+
+FRAMES = 20_000
+HZ = 1000
+
+
+def frames():
+    rng = np.random.default_rng(0)
+    values = rng.normal(1000, 5, (FRAMES, 4))
+    return [Frame(i * 1_000_000_000 // HZ, *map(float, row)) for i, row in enumerate(values)]
+
+
+def rolling(frames, ms):
+    store = RollingStore(ms=ms)
+    start = time.perf_counter()
+    for frame in frames:
+        store.update(frame)
+    return (time.perf_counter() - start) / len(frames)
+
+
+def recompute(frames, ms):
+    values = np.array([frame[1:5] for frame in frames])
+    window = ms * HZ // 1000
+    start = time.perf_counter()
+    for i in range(1, len(frames)):
+        block = values[max(0, i - window + 1):i + 1]
+        block.mean(axis=0), block.std(axis=0, ddof=1), block.min(axis=0), block.max(axis=0)
+    return (time.perf_counter() - start) / (len(frames) - 1)
+
+
+if __name__ == "__main__":
+    data = frames()
+    print(f"4 channels at {HZ} Hz")
+    for ms in (100, 1000, 10000):
+        print(f"  {ms:>5} ms window: rolling {rolling(data, ms) * 1e6:6.2f} us/frame, "
+              f"numpy over the window {recompute(data, ms) * 1e6:8.2f} us/frame")
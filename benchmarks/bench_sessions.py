@@ -0,0 +1,65 @@
+"""
+Several simulated stands streaming at once, each session read on its own thread like the gui does
+    python -m benchmarks.bench_sessions
+every stand should keep its full frame rate and the main thread (standing in for the gui) should keep ticking on time
+"""
+import statistics
+import threading
+import time
+
+from PyQt5.QtCore import Qt
+
+import board
+
+DURATION = 3.0
+TICK = 0.01
+
+
+def acquire(session, stop):
+    while not stop.is_set():
+        session.getLines()
+
+
+def run(count, url):
+    # the default session stays, so every stand of the run can be removed again
+    board.getSession()
+    sessions = [board.createSession() for _ in range(count)]
+    frames = {session.name: 0 for session in sessions}
+    stop = threading.Event()
+    threads = []
+    for session in sessions:
+        def countFrame(frame, name=session.name):
+            frames[name] += 1
+        # no event loop here, count on the reading thread
+        session.frameReceived.connect(countFrame, Qt.DirectConnection)
+        session.connect(url, 115200)
+        threads.append(threading.Thread(target=acquire, args=(session, stop)))
+    for thread in threads:
+        thread.start()
+
+    # main thread ticks like a gui timer, lateness shows how much the readers get in its way
+    lateness = []
+    start = time.perf_counter()
+    deadline = start
+    while time.perf_counter() - start < DURATION:
+        deadline += TICK
+        time.sleep(max(0.0, deadline - time.perf_counter()))
+        lateness.append((time.perf_counter() - deadline) * 1000)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    for session in sessions:
+        session.disconnect()
+    for thread in threads:
+        thread.join()
+    for session in sessions:
+        board.removeSession(session.name)
+
+    rates = [count / elapsed for count in frames.values()]
+    print(f"{count} x {url:<24} frames/s per stand: min {min(rates):8,.0f} max {max(rates):8,.0f}   "
+          f"main thread tick late by median {statistics.median(lateness):.2f} ms, max {max(lateness):.2f} ms")
+
+
+if __name__ == "__main__":
+    for count in (1, 2, 4, 8, 16):
+        run(count, "sim://?rate=80")
@@ -0,0 +1,47 @@
+"""
+Load tests board against the simulated stand, no hardware needed
+    python -m benchmarks.bench_sim
+throughput runs the simulator as fast as possible, latency measures thr(n) -> "Throttle set to n%" at real time
+"""
+import statistics
+import time
+
+import board
+
+DURATION = 2.0
+
+
+def throughput(url):
+    frames = []
+    board.frameReceived.connect(frames.append)
+    board.connect(url, 115200)
+    lineCount = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        lineCount += len(board.getLines())
+    elapsed = time.perf_counter() - start
+    board.disconnect()
+    board.frameReceived.disconnect(frames.append)
+    print(f"{url:>28}: {lineCount / elapsed:10,.0f} lines/s {len(frames) / elapsed:10,.0f} frames/s")
+
+
+def latency(url, count=50):
+    board.connect(url, 115200)
+    samples = []
+    for i in range(count):
+        throttle = i % 101
+        ack = f"Throttle set to {throttle}%"
+        sent = time.perf_counter()
+        board.ser.write(f"thr({throttle})\n".encode())
+        while ack not in board.getLines():
+            pass
+        samples.append((time.perf_counter() - sent) * 1000)
+    board.disconnect()
+    print(f"{url:>28}: command round trip median {statistics.median(samples):.1f} ms, max {max(samples):.1f} ms")
+
+
+if __name__ == "__main__":
+    throughput("sim://?speed=0&rate=80")
+    throughput("sim://?speed=0&rate=80&dropout=0.1")
+    latency("sim://?rate=80")
+    latency("sim://?rate=20")
@@ -0,0 +1,71 @@
+"""
+TimedBuffer on numpy arrays against the deque of (time, value) tuples it replaced, with a minute of 1 kHz samples
+    python -m benchmarks.bench_timedbuffer
+"""
+import os
+import time
+
+from collections import deque
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from ui.test import TimedBuffer
+
+HZ = 1000
+SECONDS = 60
+QUERIES = 200
+
+
+class DequeBuffer:
+    """
+    the old TimedBuffer
+    """
+    def __init__(self, max_age_secs):
+        self.max_age = max_age_secs
+        self._buffer = deque()
+
+    def add(self, value, now):
+        self._buffer.append((now, value))
+        cutoff = now - self.max_age
+        while self._buffer and self._buffer[0][0] < cutoff:
+            self._buffer.popleft()
+
+    def get_values(self):
+        return [v for _, v in self._buffer]
+
+    def get_items_by_age(self, older_than, younger_than):
+        now = time.time()
+        items = [(ts, val) for ts, val in self._buffer if older_than < now - ts < younger_than]
+        return list(zip(*items)) or ([], [])
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(buffer, now, second):
+    """
+    now / second: the buffer's clock and its unit, time.time() and 1 for the old one, monotonic_ns and 1e9 for the new
+    """
+    samples = HZ * SECONDS * 2
+    first = now - SECONDS * 2 * second
+    step = second / HZ if second == 1 else second // HZ
+    start = time.perf_counter()
+    for i in range(samples):
+        buffer.add(float(i), first + i * step)
+    add = (time.perf_counter() - start) / samples
+    values = timed(buffer.get_values, QUERIES)
+    byAge = timed(lambda: buffer.get_items_by_age(1.0, 2.0), QUERIES)
+    return add, values, byAge, len(buffer.get_items_by_age(1.0, 2.0)[0])
+
+
+if __name__ == "__main__":
+    print(f"{SECONDS} s window at {HZ} Hz")
+    for name, buffer, now, second in (("deque", DequeBuffer(SECONDS), time.time(), 1),
+                                      ("numpy", TimedBuffer(SECONDS), time.monotonic_ns(), 1_000_000_000)):
+        add, values, byAge, found = run(buffer, now, second)
+        print(f"  {name}: add {add * 1e6:5.2f} us, get_values {values * 1e6:9.1f} us, "
+              f"get_items_by_age(1 s, 2 s) {byAge * 1e6:9.1f} us ({found} samples)")
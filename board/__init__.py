@@ -2,119 +2,218 @@ import serial
 
 from typing import Optional
 
-from PyQt5.QtCore import QThread
-
-from . import read
-from . import command
-
 """
+every stand is a session.BoardSession, the functions and values in this module act on the active session so code
+written for a single stand keeps working, use getSession/createSession to drive several stands at once
+pyqt is only imported once a session is used, so the qt free parts (aio.py, decode.py, sim.py, ...) work without it
+
+sessions: registry of the open sessions by name
 offsetDict: mutable offset dictionary
 cell1Received cell2Received currentReceived voltageReceived: pyqt signals that can be connected to
+frameReceived: pyqt signal carrying one frame.Frame (all four channels + timestamp) per board cycle, prefer this over
+the per channel signals since it crosses threads once per cycle instead of four times
+framesReceived: pyqt signal carrying numpy blocks of frames, see setBatchInterval
+the signals follow the active session, connect to a session's own signals to listen to one stand regardless
 note: cell1 cell2 current voltage contains raw readings that is not affected by the offset variables
+timestamp: host time.monotonic_ns() at which the latest frame was read off the port
+snapshots: snapshot.SnapshotStore, the latest values as one consistent set, safe to read from any thread
+getSession().rolling: rolling.RollingStore, mean / std / min / max of every channel over a window, see setWindow
+calibration: calibration.Calibration converting frames, snapshots and blocks to physical units, see setCalibration
+recorder: record.Recorder capturing the raw serial stream, see startRecording
 reader must be a QObject class in order to be compatible with the PyQt library
 """
 
 COMPort = "COM0"
 
-ser: Optional[serial.Serial] = None
-serialWorker: Optional[command.SerialWorker] = None
-serialThread: Optional[QThread] = None
+# lets serial.serial_for_url open the software ports in this package (sim:// and replay://, see protocol_*.py)
+if __name__ not in serial.protocol_handler_packages:
+    serial.protocol_handler_packages.append(__name__)
+
+DEFAULT_SESSION = "stand1"
+
+sessions: dict = {}
+activeSession = None
+router = None
 
-offsetDict = {
-    "cell1": 0,
-    "cell2": 0,
-    "current": 0,
-    "voltage": 0
+# signals of the active session, board.frameReceived etc.
+ROUTED_SIGNALS = {
+    "cell1Received", "cell2Received", "currentReceived", "voltageReceived", "frameReceived", "framesReceived",
+    "commandAcked", "commandTimedOut"
 }
 
-# initializes the reader and exposes its signals
-reader = read.SerialReader(offsetDict)
+# values read straight off the active session, board.cell1 etc.
+SESSION_ATTRIBUTES = {
+    "ser", "scheduler", "acks", "lineReader", "recorder", "ringLog", "offsetDict", "reader", "calibration",
+    "cell1", "cell2", "current", "voltage", "timestamp", "rateHz", "averagingMs", "snapshots"
+}
 
-cell1Received = reader.cell1Received
-cell2Received = reader.cell2Received
-currentReceived = reader.currentReceived
-voltageReceived = reader.voltageReceived
+def __getattr__(name):
+    if name in ROUTED_SIGNALS:
+        return getattr(getRouter(), name)
+    if name in SESSION_ATTRIBUTES:
+        return getattr(getSession(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-cell1 = 0
-cell2 = 0
-current = 0
-voltage = 0
+def createSession(name: Optional[str] = None, headless: bool = False):
+    """
+    adds a session to the registry, names default to stand1, stand2, ...
+    the first session becomes the active one
+    headless: creates a headless.HeadlessSession, which has no signals and doesn't need pyqt
+    """
+    if headless:
+        from .headless import HeadlessSession as Session
+    else:
+        from .session import BoardSession as Session
+
+    if name is None:
+        number = len(sessions) + 1
+        while f"stand{number}" in sessions:
+            number += 1
+        name = f"stand{number}"
+    if name in sessions:
+        raise ValueError(f"a session named {name!r} already exists")
+    session = Session(name)
+    sessions[name] = session
+    if activeSession is None:
+        setActiveSession(name)
+    return session
+
+def getSession(name: Optional[str] = None):
+    """
+    the session called name, or the active one (created on first use), raises KeyError for unknown names
+    """
+    if name is None:
+        if activeSession is None:
+            createSession(DEFAULT_SESSION)
+        return activeSession
+    return sessions[name]
+
+def setActiveSession(name: str):
+    global activeSession
+    activeSession = sessions[name]
+    if router is not None:
+        router.follow(activeSession)
+
+def getRouter():
+    """
+    the SignalRouter behind board.frameReceived etc., created on first use
+    """
+    global router
+    if router is None:
+        from .session import SignalRouter
+        router = SignalRouter()
+        router.follow(getSession())
+    return router
+
+def removeSession(name: str):
+    """
+    disconnects and forgets a session, the last session can't be removed
+    """
+    if len(sessions) == 1:
+        raise ValueError("can't remove the last session")
+    session = sessions.pop(name)
+    session.disconnect()
+    if session is activeSession:
+        setActiveSession(next(iter(sessions)))
 
 def connect(port: str, baudrate: int = 9600):
-    global ser
-    global serialWorker
-    global serialThread
-    try:
-        ser = serial.Serial(port, baudrate, timeout=1)
-
-        serialThread = QThread()
-        serialWorker = command.SerialWorker(ser)
-        serialWorker.moveToThread(serialThread)
-        serialThread.start()
-        return True
-    except serial.SerialException:
-        # handle error (port unavailable, etc.)
-        return False
+    """
+    port: serial port name, or a url like sim://?rate=20 for the simulated stand or replay:///run.tsraw to play back
+    a recording
+    """
+    return getSession().connect(port, baudrate)
 
 def disconnect():
-    if ser.is_open:
-        ser.close()
-        return True
-    return False
+    return getSession().disconnect()
 
-def getLine():
+def waitForFresh(after: Optional[int] = None, timeout: Optional[float] = None):
     """
-    reads and updates all variables in config
+    blocks until every channel was read after the host time after (time.monotonic_ns(), defaults to now)
+    returns the snapshot.Snapshot, or None on timeout, don't call this from the gui thread
     """
-    if ser.in_waiting:
-        line = ser.readline().decode('utf-8', errors='replace')
-        reader.decode(line)
-        return line
-    else:
-        return None
+    return getSession().snapshots.waitForFresh(after, timeout)
+
+def getLines():
+    """
+    blocks until serial data arrives, then decodes every complete line or binary frame and updates all variables in config
+    returns the received lines (in binary mode only the messages between frames), empty if the port timed out
+    """
+    return getSession().getLines()
+
+def startRecording(path: str, baudrate: Optional[int] = None):
+    return getSession().startRecording(path, baudrate)
+
+def stopRecording():
+    getSession().stopRecording()
+
+def startRingLog(path: str, hours: float = 1.0):
+    return getSession().startRingLog(path, hours)
+
+def stopRingLog():
+    getSession().stopRingLog()
+
+def replay(path: str, speed: float = 0.0):
+    return getSession().replay(path, speed)
+
+def setBinaryMode(enabled: bool):
+    getSession().setBinaryMode(enabled)
+
+def setBoardTime(enabled: bool):
+    getSession().setBoardTime(enabled)
+
+def getTimingStats():
+    return getSession().getTimingStats()
+
+def boardToHostTime(millis: int) -> int:
+    return getSession().boardToHostTime(millis)
+
+def isBinaryMode():
+    return getSession().isBinaryMode()
 
 def zeroCell1():
-    global offsetDict
-    offsetDict["cell1"] = reader.cell1
+    getSession().zeroCell1()
 
 def zeroCell2():
-    global offsetDict
-    offsetDict["cell2"] = reader.cell2
+    getSession().zeroCell2()
 
 def zeroCurrent():
-    global offsetDict
-    offsetDict["current"] = reader.current
+    getSession().zeroCurrent()
 
 def zeroVoltage():
-    global offsetDict
-    offsetDict["voltage"] = reader.voltage
+    getSession().zeroVoltage()
 
 def setThrottle(throttle: int):
-    if throttle < 0 or throttle > 100:
-        raise ValueError("throttle must be between 0 and 100")
-    sendCommand(f"thr({throttle})")
+    getSession().setThrottle(throttle)
 
-def sendCommand(msg: str):
-    serialWorker.sendCommandSignal.emit(msg)
+def emergencyStop():
+    """
+    stp, bypasses the command queue and drops any throttle command still waiting in it
+    """
+    getSession().emergencyStop()
+
+def getCommandStats():
+    return getSession().commandStats()
 
-# updates the value stored whenever a new value arrives
-def updateCell1(val):
-    global cell1
-    cell1 = val
+def getAckStats():
+    return getSession().ackStats()
 
-def updateCell2(val):
-    global cell2
-    cell2 = val
+def setCalibration(table, save: bool = True):
+    getSession().setCalibration(table, save)
 
-def updateCurrent(val):
-    global current
-    current = val
+def setWindow(samples: Optional[int] = None, ms: Optional[float] = None):
+    getSession().setWindow(samples, ms)
 
-def updateVoltage(val):
-    global voltage
-    voltage = val
+def setRate(hz: int):
+    getSession().setRate(hz)
+
+def setAveraging(ms: int):
+    getSession().setAveraging(ms)
+
+def negotiateRate(binary: Optional[bool] = None):
+    return getSession().negotiateRate(binary)
+
+def sendCommand(msg: str):
+    getSession().sendCommand(msg)
 
-cell1Received.connect(updateCell1)
-cell2Received.connect(updateCell2)
-currentReceived.connect(updateCurrent)
-voltageReceived.connect(updateVoltage)
+def setBatchInterval(intervalMs: int):
+    getSession().setBatchInterval(intervalMs)
@@ -0,0 +1,258 @@
+import bisect
+import collections
+import re
+import threading
+import time
+
+from typing import Callable, Optional
+
+"""
+Command acknowledgements and round trip latency
+
+every command the board answers is remembered when it is written, the reply line completes it:
+    thr(n)    "Throttle set to n%"
+    rate(hz)  "Rate set to hz Hz"
+    avg(ms)   "Averaging set to ms ms"
+    bin(0|1)  "Binary mode off" / "Binary mode on"
+    stp       "Emergency stop"
+a rejection ("Invalid throttle value", "Unknown command", ...) completes the oldest matching command as rejected, and a
+command without a reply within the timeout is reported as timed out
+lc1/lc2/cur/vtg/tms/inf don't reply and aren't tracked
+
+round trip is write to reply read, link both ways plus the firmware loop, the time a command waited in the queue before
+that is command.CommandScheduler's latency, so the two together tell where a slow motor response comes from
+"""
+
+DEFAULT_TIMEOUT = 1.0
+
+# command key -> reply, group 1 is the acknowledged value
+ACKS = {
+    "thr": re.compile(r"Throttle set to (-?\d+)%"),
+    "rate": re.compile(r"Rate set to (\d+) Hz"),
+    "avg": re.compile(r"Averaging set to (\d+) ms"),
+    "bin": re.compile(r"Binary mode (on|off)"),
+    "stp": re.compile(r"Emergency stop()")
+}
+
+# rejection -> the command keys it can answer, None for any
+REJECTIONS = {
+    "Invalid throttle value": ("thr",),
+    "Invalid rate value": ("rate",),
+    "Invalid averaging value": ("avg",),
+    "Unknown command": None
+}
+
+# cheap check before any regex, almost every line is a reading
+REPLY_PREFIXES = ("Throttle set", "Rate set", "Averaging set", "Binary mode", "Emergency stop", "Invalid", "Unknown")
+
+# upper bucket edges of the latency histograms in ms, one more bucket above the last edge
+BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+ACKED = "acked"
+REJECTED = "rejected"
+TIMED_OUT = "timedOut"
+
+
+def expectedValue(key: str, msg: str) -> Optional[str]:
+    """
+    The value the reply to msg should carry, as the reply spells it
+    """
+    if key == "stp":
+        return ""
+    value = msg[msg.find("(") + 1:msg.rfind(")")].strip()
+    if key == "bin":
+        return "on" if value not in ("", "0") else "off"
+    return value
+
+
+class PendingAck:
+    __slots__ = ("key", "msg", "value", "written", "received", "result")
+
+    def __init__(self, key, msg, value, written):
+        self.key = key
+        self.msg = msg
+        self.value = value
+        # host time.monotonic_ns() of the write and of the reply
+        self.written = written
+        self.received = 0
+        self.result = None
+
+    @property
+    def latencyMs(self) -> float:
+        return (self.received - self.written) / 1e6 if self.received else 0.0
+
+    def __repr__(self):
+        return f"PendingAck({self.msg!r}, {self.result}, {self.latencyMs:.1f} ms)"
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Upper edge of the bucket the given fraction of round trips falls in, the max for the open top bucket
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return float(BUCKETS_MS[index]) if index < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "meanMs": self.total / self.count if self.count else 0.0,
+            "maxMs": self.max,
+            "p50Ms": self.percentile(0.5),
+            "p99Ms": self.percentile(0.99),
+            # bucket upper edge in ms (None for the open top bucket) -> round trips
+            "histogram": dict(zip(BUCKETS_MS + (None,), self.counts))
+        }
+
+
+class AckTracker:
+    """
+    Matches replies to written commands, thread safe: commands are written on the scheduler thread, replies arrive on
+    the reading thread
+    """
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, onAck: Optional[Callable[[PendingAck], None]] = None,
+                 onTimeout: Optional[Callable[[PendingAck], None]] = None):
+        self.timeout = timeout
+        self.onAck = onAck
+        self.onTimeout = onTimeout
+
+        # in write order, the board answers in the order it reads
+        self.pending = collections.deque()
+        self.lock = threading.Lock()
+
+        self.histograms = collections.defaultdict(LatencyHistogram)
+        self.written = collections.Counter()
+        self.rejected = collections.Counter()
+        self.timedOut = collections.Counter()
+
+    def commandWritten(self, msg: str, written: Optional[int] = None):
+        """
+        Remembers a command (without the newline) that just went out, written defaults to now
+        """
+        key = msg.split("(", 1)[0].strip()
+        if key not in ACKS:
+            return
+        if written is None:
+            written = time.monotonic_ns()
+        with self.lock:
+            self.pending.append(PendingAck(key, msg, expectedValue(key, msg), written))
+            self.written[key] += 1
+
+    def lineReceived(self, line: str, received: Optional[int] = None) -> Optional[PendingAck]:
+        """
+        Completes the command line answers, returns it, or None if line isn't a reply to a tracked command
+        """
+        if not line.startswith(REPLY_PREFIXES):
+            return None
+        if received is None:
+            received = time.monotonic_ns()
+
+        if line in REJECTIONS:
+            keys = REJECTIONS[line]
+            return self.complete(lambda pending: keys is None or pending.key in keys, received, REJECTED)
+        for key, pattern in ACKS.items():
+            match = pattern.match(line)
+            if match is not None:
+                value = match.group(1)
+                # the board may adjust the value (avg is capped at half a cycle), then the oldest one of the kind
+                return (self.complete(lambda pending: pending.key == key and pending.value == value, received, ACKED)
+                        or self.complete(lambda pending: pending.key == key, received, ACKED))
+        return None
+
+    def complete(self, matches, received: int, result: str) -> Optional[PendingAck]:
+        lost = []
+        with self.lock:
+            for pending in self.pending:
+                if matches(pending):
+                    break
+            else:
+                return None
+            # older commands of the same kind were answered out of order or their reply got lost, they never will be
+            for older in self.pending:
+                if older is pending:
+                    break
+                if older.key == pending.key:
+                    lost.append(older)
+            for older in lost:
+                self.pending.remove(older)
+                older.result = TIMED_OUT
+                self.timedOut[older.key] += 1
+            self.pending.remove(pending)
+            pending.received = received
+            pending.result = result
+            if result == ACKED:
+                self.histograms[pending.key].add(pending.latencyMs)
+            else:
+                self.rejected[pending.key] += 1
+
+        for older in lost:
+            self.timedOutHook(older)
+        if self.onAck is not None:
+            self.onAck(pending)
+        return pending
+
+    def expire(self, now: Optional[int] = None) -> list[PendingAck]:
+        """
+        Reports every command older than the timeout as timed out, returns them
+        """
+        if now is None:
+            now = time.monotonic_ns()
+        deadline = now - int(self.timeout * 1e9)
+        expired = []
+        with self.lock:
+            while self.pending and self.pending[0].written <= deadline:
+                pending = self.pending.popleft()
+                pending.result = TIMED_OUT
+                self.timedOut[pending.key] += 1
+                expired.append(pending)
+        for pending in expired:
+            self.timedOutHook(pending)
+        return expired
+
+    def timedOutHook(self, pending: PendingAck):
+        if self.onTimeout is not None:
+            self.onTimeout(pending)
+
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+
+    def stats(self) -> dict:
+        """
+        Per command kind: written, acked, rejected, timed out, still pending and the round trip histogram in ms
+        """
+        with self.lock:
+            waiting = collections.Counter(pending.key for pending in self.pending)
+            stats = {}
+            for key in ACKS:
+                if not self.written[key]:
+                    continue
+                histogram = self.histograms[key].stats()
+                stats[key] = {
+                    "written": self.written[key],
+                    "acked": histogram.pop("count"),
+                    "rejected": self.rejected[key],
+                    "timedOut": self.timedOut[key],
+                    "pending": waiting[key],
+                    **histogram
+                }
+            return stats
@@ -0,0 +1,176 @@
+"""
+Chunked, blocking serial acquisition
+
+the reader blocks inside the serial driver until at least one byte arrives (or the port timeout expires), then
+pulls everything that is waiting in a single read, so an idle stand costs no cpu and a busy one costs one read per
+chunk rather than one per line
+
+readTime is time.monotonic_ns() right after the last read returned, used to timestamp everything in that chunk
+
+lines are handed out as memoryview slices into a reusable buffer, they are only valid until the next fill()
+
+StreamReader additionally follows the switch to and from the binary protocol (see binary.py)
+"""
+import time
+
+from . import binary
+
+
+class LineReader:
+    def __init__(self, ser, bufferSize: int = 4096):
+        """
+        ser: an open serial port (anything with read(), in_waiting and optionally cancel_read())
+        bufferSize: size of the reusable buffer, must be larger than the longest expected line
+        """
+        self.ser = ser
+        self.buffer = bytearray(bufferSize)
+        self.view = memoryview(self.buffer)
+
+        # unconsumed data lives in buffer[start:end]
+        self.start = 0
+        self.end = 0
+
+        self.readTime = 0
+
+        # number of times the buffer filled up without a line terminator and had to be discarded
+        self.overflows = 0
+
+        # record.Recorder that gets every chunk read off the port, None when not recording
+        self.recorder = None
+
+    def makeRoom(self) -> int:
+        """
+        Moves the unfinished line to the front of the buffer, returns how many bytes can be appended
+        """
+        if self.start:
+            remaining = self.end - self.start
+            self.buffer[:remaining] = self.buffer[self.start:self.end]
+            self.start = 0
+            self.end = remaining
+
+        free = len(self.buffer) - self.end
+        if free == 0:
+            # a full buffer without a newline is garbage (wrong baudrate, line noise), drop it and resync
+            self.overflows += 1
+            self.end = 0
+            free = len(self.buffer)
+        return free
+
+    def fill(self) -> int:
+        """
+        Blocks until data is available and appends it to the buffer
+        returns the number of bytes read, 0 if the port timed out or the read was cancelled
+        """
+        free = self.makeRoom()
+
+        # read(1) blocks in the driver, anything beyond that is already waiting and returns immediately
+        data = self.ser.read(max(1, min(self.ser.in_waiting, free)))
+        self.readTime = time.monotonic_ns()
+        if self.recorder is not None:
+            self.recorder.write(data, self.readTime)
+        self.push(data)
+        return len(data)
+
+    def lines(self):
+        """
+        Yields every complete line in the buffer as a memoryview, without the line terminator
+        """
+        find = self.buffer.find
+        buffer = self.buffer
+        while True:
+            newline = find(b"\n", self.start, self.end)
+            if newline < 0:
+                return
+            stop = newline
+            if stop > self.start and buffer[stop - 1] == 13:  # \r
+                stop -= 1
+            line = self.view[self.start:stop]
+            self.start = newline + 1
+            yield line
+
+    def readLines(self) -> list[str]:
+        """
+        Blocks until data is available and returns the complete lines that arrived as strings
+        """
+        self.fill()
+        return [str(line, "utf-8", "replace") for line in self.lines()]
+
+    def drain(self) -> bytes:
+        """
+        Removes and returns everything left in the buffer
+        """
+        data = bytes(self.view[self.start:self.end])
+        self.clear()
+        return data
+
+    def push(self, data):
+        """
+        Appends bytes to the buffer as if they had just been read
+        """
+        self.view[self.end:self.end + len(data)] = data
+        self.end += len(data)
+
+    def cancel(self):
+        """
+        Wakes up a blocked fill() from another thread
+        """
+        cancelRead = getattr(self.ser, "cancel_read", None)
+        if cancelRead is not None:
+            cancelRead()
+
+    def clear(self):
+        self.start = 0
+        self.end = 0
+
+
+class StreamReader(LineReader):
+    """
+    LineReader that also understands binary frames
+    the board acknowledges bin(1) with an ascii line and sends frames afterwards, and goes back to lines after bin(0),
+    both switches can happen in the middle of a read
+    """
+    def __init__(self, ser, bufferSize: int = 4096):
+        super().__init__(ser, bufferSize)
+        self.binaryMode = False
+        self.decoder = binary.BinaryDecoder()
+
+    def read(self):
+        """
+        Blocks until data is available
+        returns (lines, binary frames) that arrived, lines are strings
+        """
+        self.fill()
+        return self.parse()
+
+    def parse(self):
+        """
+        Splits whatever is in the buffer into (lines, binary frames), for data that was push()ed rather than read
+        """
+        frames = []
+        lines = []
+        if self.binaryMode:
+            # ACK_OFF can only be among the text between frames, a partial one waits in the decoder's text
+            frames = self.decoder.feed(self.drain())
+            lines = self.decoder.takeLines()
+            if binary.ACK_OFF not in lines:
+                return lines, frames
+
+            # everything after the acknowledgement is ascii again, hand it back to the line reader
+            end = lines.index(binary.ACK_OFF) + 1
+            rest = b"".join(line.encode() + b"\n" for line in lines[end:])
+            lines = lines[:end]
+            self.binaryMode = False
+            self.push(rest + self.decoder.remainder())
+            self.decoder.clear()
+
+        for view in self.lines():
+            line = str(view, "utf-8", "replace")
+            lines.append(line)
+            if line == binary.ACK_ON:
+                self.binaryMode = True
+                self.decoder.clear()
+                frames.extend(self.decoder.feed(self.drain()))
+                lines.extend(self.decoder.takeLines())
+                break
+        return lines, frames
+
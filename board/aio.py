@@ -0,0 +1,209 @@
+import asyncio
+import collections
+import time
+
+from typing import AsyncIterator, Optional
+
+import serial
+
+from . import acquire
+from . import rate
+from .decode import Decoder
+from .frame import CHANNELS, Frame
+
+"""
+asyncio transport, for headless tools and services that shouldn't depend on pyqt
+    async with AsyncBoard("/dev/ttyACM0") as stand:
+        await stand.setBoardTime(True)
+        async for frame in stand:
+            ...
+
+ports with a file descriptor (serial ports and ptys on linux/macos) are watched by the event loop itself, so any number
+of stands costs no threads, everything else (windows ports, sim://, replay://) is read on the loop's default executor
+
+decoding goes through the same StreamReader and Decoder as the qt path, so values, offsets, frames, binary mode and
+board time behave exactly like board.getLines()
+"""
+
+
+class AsyncBoard(Decoder):
+    def __init__(self, port: str, baudrate: int = 9600, offsetDict: Optional[dict] = None, bufferSize: int = 4096):
+        """
+        port: serial port name or url, same as board.connect()
+        offsetDict: offsets subtracted from the readings, zeroed by default
+        """
+        super().__init__(offsetDict if offsetDict is not None else dict.fromkeys(CHANNELS, 0))
+        self.port = port
+        self.baudrate = baudrate
+        self.ser: Optional[serial.SerialBase] = None
+        self.fd: Optional[int] = None
+        self.stream = acquire.StreamReader(None, bufferSize)
+        self.readTime = 0
+
+        # decoded frames waiting to be iterated
+        self.pending = collections.deque()
+        # future the event loop resolves once the port is readable, only while waiting on a descriptor
+        self.readable: Optional[asyncio.Future] = None
+
+        # same bookkeeping as session.BoardSession
+        self.rateHz: Optional[int] = None
+        self.averagingMs: Optional[int] = None
+        self.timestamp = 0
+
+    @property
+    def isOpen(self) -> bool:
+        return self.ser is not None and self.ser.is_open
+
+    async def open(self):
+        """
+        raises serial.SerialException if the port can't be opened
+        """
+        self.ser = serial.serial_for_url(self.port, self.baudrate, timeout=1)
+        try:
+            self.fd = self.ser.fileno()
+        except (AttributeError, OSError, NotImplementedError):
+            self.fd = None
+        if self.fd is not None:
+            # the event loop does the waiting, reads only collect what is already there
+            self.ser.timeout = 0
+        return self
+
+    async def close(self):
+        if not self.isOpen:
+            return
+        if self.readable is not None and not self.readable.done():
+            self.readable.set_result(None)
+        cancelRead = getattr(self.ser, "cancel_read", None)
+        if cancelRead is not None:
+            cancelRead()
+        self.ser.close()
+        self.flushBatch()
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def readChunk(self, size: int) -> bytes:
+        """
+        Waits until data arrives and returns up to size bytes, empty if the port timed out or was closed
+        """
+        loop = asyncio.get_running_loop()
+        if self.fd is None:
+            return await loop.run_in_executor(None, self.blockingRead, size)
+
+        self.readable = loop.create_future()
+        loop.add_reader(self.fd, self.markReadable)
+        try:
+            await self.readable
+        finally:
+            loop.remove_reader(self.fd)
+            self.readable = None
+        if not self.isOpen:
+            return b""
+        return self.ser.read(min(max(1, self.ser.in_waiting), size))
+
+    def markReadable(self):
+        if self.readable is not None and not self.readable.done():
+            self.readable.set_result(None)
+
+    def blockingRead(self, size: int) -> bytes:
+        if not self.isOpen:
+            return b""
+        return self.ser.read(max(1, min(self.ser.in_waiting, size)))
+
+    async def read(self) -> list[str]:
+        """
+        Waits for the next chunk and decodes it, decoded frames are queued for iteration
+        returns the received lines like board.getLines()
+        """
+        data = await self.readChunk(self.stream.makeRoom())
+        self.readTime = time.monotonic_ns()
+        if not data:
+            self.pollBatch(self.readTime)
+            return []
+
+        lines = []
+        view = memoryview(data)
+        while view:
+            free = self.stream.makeRoom()
+            self.stream.push(view[:free])
+            view = view[free:]
+            chunkLines, frames = self.stream.parse()
+            for line in chunkLines:
+                self.decode(line, self.readTime)
+                if line.startswith("Rate set to"):
+                    self.rateHz = rate.parseRateAck(line)
+                elif line.startswith("Averaging set to"):
+                    self.averagingMs = rate.parseAveragingAck(line)
+            for frame in frames:
+                self.decodeBinary(frame, self.readTime)
+            lines.extend(chunkLines)
+        self.pollBatch(self.readTime)
+        return lines
+
+    def frameDecoded(self, frame: Frame):
+        self.timestamp = frame.timestamp
+        self.pending.append(frame)
+
+    async def frames(self) -> AsyncIterator[Frame]:
+        """
+        Yields every frame as it is decoded until the port is closed
+        raises serial.SerialException if the board goes away
+        """
+        while True:
+            while self.pending:
+                yield self.pending.popleft()
+            if not self.isOpen:
+                return
+            await self.read()
+
+    def __aiter__(self):
+        return self.frames()
+
+    async def sendCommand(self, msg: str):
+        data = (msg + "\n").encode("utf-8")
+        if self.fd is None:
+            # software ports can block on backpressure, keep that off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self.ser.write, data)
+        else:
+            self.ser.write(data)
+
+    async def setThrottle(self, throttle: int):
+        if throttle < 0 or throttle > 100:
+            raise ValueError("throttle must be between 0 and 100")
+        await self.sendCommand(f"thr({throttle})")
+
+    async def setRate(self, hz: int):
+        if hz < rate.MIN_RATE or hz > rate.MAX_RATE:
+            raise ValueError(f"rate must be between {rate.MIN_RATE} and {rate.MAX_RATE} Hz")
+        await self.sendCommand(f"rate({hz})")
+
+    async def setAveraging(self, ms: int):
+        if ms < 0 or ms > rate.MAX_AVERAGING:
+            raise ValueError(f"averaging window must be between 0 and {rate.MAX_AVERAGING} ms")
+        await self.sendCommand(f"avg({ms})")
+
+    async def setBinaryMode(self, enabled: bool):
+        await self.sendCommand(f"bin({int(enabled)})")
+
+    async def setBoardTime(self, enabled: bool):
+        await self.sendCommand(f"tms({int(enabled)})")
+
+    async def negotiateRate(self, binary: Optional[bool] = None):
+        """
+        requests the highest rate the baudrate can carry, returns the requested rate
+        """
+        if binary is None:
+            binary = self.stream.binaryMode
+        hz = rate.maxRate(self.baudrate, binary)
+        await self.setRate(hz)
+        return hz
+
+    def zero(self):
+        """
+        Uses the latest raw readings as the offsets of every channel
+        """
+        for name in CHANNELS:
+            self.offsetDict[name] = getattr(self, name)
@@ -0,0 +1,157 @@
+import struct
+
+from binascii import crc_hqx
+from typing import NamedTuple, Optional
+
+"""
+Binary framed data protocol, negotiated with bin(1) / bin(0)
+
+every board cycle is one fixed size little endian frame:
+    sync     2 bytes   0xAA 0x55
+    seq      uint16    increments every frame, wraps around
+    millis   uint32    board millis() when the cycle was sampled
+    lc1      int32     grams
+    lc2      int32     grams
+    cur      float32   amps
+    vtg      float32   volts
+    flags    uint8     bit i set = channel i is valid (not muted and not n)
+    crc      uint16    crc-16/ccitt-false over seq..flags
+
+the board acknowledges bin(1) with the ascii line ACK_ON and then switches, and bin(0) with ACK_OFF after its last frame
+firmware without binary support answers "Unknown command" and the host simply stays on the ascii protocol
+acknowledgements of other commands stay ascii lines between the frames, the decoder hands them out with takeLines()
+"""
+
+SYNC = b"\xaa\x55"
+FRAME_STRUCT = struct.Struct("<2sHIiiffBH")
+FRAME_SIZE = FRAME_STRUCT.size
+CRC_INIT = 0xFFFF
+
+# longest text line kept between frames, anything longer without a newline is noise from a corrupted frame
+MAX_TEXT = 256
+
+ACK_ON = "Binary mode on"
+ACK_OFF = "Binary mode off"
+
+
+class BinaryFrame(NamedTuple):
+    seq: int
+    millis: int
+    cell1: Optional[int]
+    cell2: Optional[int]
+    current: Optional[float]
+    voltage: Optional[float]
+
+
+def encodeFrame(seq: int, millis: int, cell1=None, cell2=None, current=None, voltage=None) -> bytes:
+    """
+    Reference encoder, byte for byte what the firmware sends, None marks a channel as invalid
+    """
+    values = (cell1, cell2, current, voltage)
+    flags = 0
+    for i, value in enumerate(values):
+        if value is not None:
+            flags |= 1 << i
+    body = FRAME_STRUCT.pack(SYNC, seq & 0xFFFF, millis & 0xFFFFFFFF, cell1 or 0, cell2 or 0, current or 0.0,
+                             voltage or 0.0, flags, 0)[2:-2]
+    return SYNC + body + struct.pack("<H", crc_hqx(body, CRC_INIT))
+
+
+class BinaryDecoder:
+    """
+    Turns a stream of bytes into BinaryFrames, resynchronizes on the sync bytes after corruption or dropped bytes
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+        # bytes outside of frames since the last newline, and the complete lines found there
+        self.text = bytearray()
+        self.lines = []
+
+        self.frames = 0
+        self.crcErrors = 0
+        self.skippedBytes = 0
+
+    def feed(self, data) -> list[BinaryFrame]:
+        """
+        Appends data to the internal buffer and returns every complete frame that passed the crc check
+        """
+        buffer = self.buffer
+        buffer += data
+
+        frames = []
+        pos = 0
+        while True:
+            start = buffer.find(SYNC, pos)
+            if start < 0:
+                # keep a trailing half sync, but never step back into a frame that was just decoded
+                end = max(pos, len(buffer) - 1) if buffer[-1:] == SYNC[:1] else len(buffer)
+                self.skip(buffer, pos, end)
+                pos = end
+                break
+            self.skip(buffer, pos, start)
+            pos = start
+            if len(buffer) - start < FRAME_SIZE:
+                break
+
+            crc = crc_hqx(buffer[start + 2:start + FRAME_SIZE - 2], CRC_INIT)
+            _, seq, millis, cell1, cell2, current, voltage, flags, frameCrc = FRAME_STRUCT.unpack_from(buffer, start)
+            if crc != frameCrc:
+                # false sync or corrupted frame, look for the next sync after this one
+                self.crcErrors += 1
+                self.skip(buffer, start, start + 1)
+                pos = start + 1
+                continue
+
+            # bytes skipped before a good frame were noise, they must not end up in front of the next reply
+            self.text.clear()
+            frames.append(BinaryFrame(
+                seq,
+                millis,
+                cell1 if flags & 1 else None,
+                cell2 if flags & 2 else None,
+                current if flags & 4 else None,
+                voltage if flags & 8 else None
+            ))
+            pos = start + FRAME_SIZE
+
+        del buffer[:pos]
+        self.frames += len(frames)
+        return frames
+
+    def skip(self, buffer, start: int, end: int):
+        """
+        Keeps bytes that aren't part of a frame, complete lines among them are ascii messages from the board
+        """
+        if end <= start:
+            return
+        self.skippedBytes += end - start
+        text = self.text
+        text += buffer[start:end]
+        newline = text.rfind(b"\n")
+        if newline >= 0:
+            for line in text[:newline].split(b"\n"):
+                line = line.rstrip(b"\r")
+                if line:
+                    self.lines.append(str(line, "utf-8", "replace"))
+            del text[:newline + 1]
+        if len(text) > MAX_TEXT:
+            text.clear()
+
+    def takeLines(self) -> list[str]:
+        """
+        Returns and forgets the ascii lines received between frames
+        """
+        lines = self.lines
+        self.lines = []
+        return lines
+
+    def remainder(self) -> bytes:
+        """
+        Bytes that were received but not handed out yet, the unfinished text line followed by the undecoded buffer
+        """
+        return bytes(self.text + self.buffer)
+
+    def clear(self):
+        self.buffer.clear()
+        self.text.clear()
+        self.lines = []
@@ -0,0 +1,158 @@
+import json
+import os
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from .frame import CHANNELS, Frame
+
+"""
+Per channel calibration, from tared board readings to physical units
+
+every channel maps its reading through a polynomial (lowest order first, (0, 1) passes it through, (b, a) is a*x + b),
+the firmware's load cell scale of 220.9 counts per gram is kept and corrected here, so a fit against known loads only
+needs the stand's readings in grams:
+    cell1    grams on the thrust cell -> N
+    cell2    grams on the torque arm -> N*m, the arm length folded into the gain
+    current  A
+    voltage  V
+
+frames are converted once per board cycle, numpy blocks (framesReceived, recordings) in one go with apply()
+the tables of every stand live in one json file by session name, loaded once when the session is created
+"""
+
+CALIBRATION_FILE = "calibration.json"
+
+GRAVITY = 9.80665
+GRAMS_TO_NEWTONS = GRAVITY / 1000
+
+
+class ChannelCalibration(NamedTuple):
+    # polynomial coefficients, lowest order first
+    coefficients: tuple = (0.0, 1.0)
+    unit: str = ""
+
+    @property
+    def identity(self) -> bool:
+        return tuple(self.coefficients) == (0.0, 1.0)
+
+    def apply(self, values):
+        """
+        Works on a single reading or a numpy array, horner's scheme so arrays cost one pass per coefficient
+        """
+        if self.identity:
+            return values
+        result = 0.0
+        for coefficient in reversed(self.coefficients):
+            result = result * values + coefficient
+        return result
+
+
+# what the firmware sends, nothing converted
+DEFAULTS = {
+    "cell1": ChannelCalibration(unit="g"),
+    "cell2": ChannelCalibration(unit="g"),
+    "current": ChannelCalibration(unit="A"),
+    "voltage": ChannelCalibration(unit="V")
+}
+
+
+class Calibration:
+    def __init__(self, channels: Optional[dict] = None, armLength: Optional[float] = None):
+        """
+        channels: ChannelCalibration by channel name, missing channels pass through
+        armLength: torque arm in m, only kept for reference, cell2's polynomial already includes it
+        """
+        channels = channels or {}
+        self.channels = {name: channels.get(name, DEFAULTS[name]) for name in CHANNELS}
+        self.armLength = armLength
+        # indexed by channel, same order as frame.CHANNELS
+        self.byIndex = tuple(self.channels[name] for name in CHANNELS)
+        self.identity = all(channel.identity for channel in self.byIndex)
+
+    @classmethod
+    def standard(cls, armLength: Optional[float] = None, thrustGain: float = 1.0, torqueGain: float = 1.0):
+        """
+        Thrust in N and, given the torque arm length in m, torque in N*m
+        thrustGain / torqueGain: correction of the firmware's gram scale, e.g. from a known weight
+        """
+        channels = {"cell1": ChannelCalibration((0.0, thrustGain * GRAMS_TO_NEWTONS), "N")}
+        if armLength is not None:
+            channels["cell2"] = ChannelCalibration((0.0, torqueGain * GRAMS_TO_NEWTONS * armLength), "N*m")
+        return cls(channels, armLength)
+
+    def unit(self, channel: str) -> str:
+        return self.channels[channel].unit
+
+    def fit(self, channel: str, readings, references, degree: int = 1, unit: Optional[str] = None):
+        """
+        Least squares polynomial from tared readings taken at known references (e.g. masses in N), returns the new
+        Calibration with that channel replaced
+        """
+        coefficients = np.polynomial.polynomial.polyfit(np.asarray(readings, dtype=np.float64),
+                                                        np.asarray(references, dtype=np.float64), degree)
+        channels = dict(self.channels)
+        channels[channel] = ChannelCalibration(tuple(float(c) for c in coefficients),
+                                               self.unit(channel) if unit is None else unit)
+        return Calibration(channels, self.armLength)
+
+    def applyFrame(self, frame: Frame) -> Frame:
+        if self.identity:
+            return frame
+        values = [None if value is None else channel.apply(value)
+                  for channel, value in zip(self.byIndex, frame[1:len(CHANNELS) + 1])]
+        return frame._replace(cell1=values[0], cell2=values[1], current=values[2], voltage=values[3])
+
+    def apply(self, block: np.ndarray) -> np.ndarray:
+        """
+        Converts a block of frame.FRAME_DTYPE, returns a new block (the same one if nothing needs converting), nan stays
+        nan
+        """
+        if self.identity:
+            return block
+        calibrated = block.copy()
+        for name, channel in self.channels.items():
+            if not channel.identity:
+                calibrated[name] = channel.apply(block[name])
+        return calibrated
+
+    def toDict(self) -> dict:
+        return {
+            "armLength": self.armLength,
+            "channels": {name: {"coefficients": list(channel.coefficients), "unit": channel.unit}
+                         for name, channel in self.channels.items()}
+        }
+
+    @classmethod
+    def fromDict(cls, data: dict):
+        channels = {name: ChannelCalibration(tuple(float(c) for c in entry["coefficients"]), entry.get("unit", ""))
+                    for name, entry in data.get("channels", {}).items() if name in DEFAULTS}
+        return cls(channels, data.get("armLength"))
+
+    @classmethod
+    def load(cls, name: str, path: str = CALIBRATION_FILE):
+        """
+        The table stored for the stand name, pass through if there is none
+        """
+        try:
+            with open(path, "r") as f:
+                tables = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        return cls.fromDict(tables[name]) if name in tables else cls()
+
+    def save(self, name: str, path: str = CALIBRATION_FILE):
+        """
+        Stores the table for the stand name, the other stands in the file are kept
+        """
+        tables = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                tables = json.load(f)
+        tables[name] = self.toDict()
+        # written next to the file and moved over it, a crash never leaves a half written table behind
+        temp = path + ".tmp"
+        with open(temp, "w") as f:
+            json.dump(tables, f, indent=4)
+        os.replace(temp, path)
@@ -1,20 +1,187 @@
-from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot, QThread
+import collections
+import threading
+import time
 
-class SerialWorker(QObject):
-    sendCommandSignal = pyqtSignal(str)  # new throttle value
+from typing import Callable, Optional
 
-    def __init__(self, serialPort):
-        super().__init__()
-        self.serialPort = serialPort
-        self.sendCommandSignal.connect(self.writeThrottle)
+from . import rate
 
-    @pyqtSlot(str)
-    def writeThrottle(self, msg):
-        if self.serialPort and self.serialPort.is_open:
+"""
+Outbound command scheduling
+
+commands are written by one writer thread, paced to what the link carries (10 bits per byte at the baudrate, with the
+same headroom as rate.py) so the port's transmit buffer never backs up, and
+    settings where only the latest value matters (thr, rate, avg) replace a queued command of the same kind in place,
+    so a slider sweep leaves at most one thr(n) waiting instead of a backlog
+    stp skips the queue and is written right away from the calling thread, and drops any queued throttle so nothing
+    spins the motor back up behind it
+"""
+
+# commands where a newer one makes a queued older one pointless, keyed by the text before "("
+COALESCED = {"thr", "rate", "avg"}
+EMERGENCY = {"stp"}
+
+# queued commands dropped by an emergency stop
+STOP_DROPS = {"thr"}
+
+# queued commands still written when the scheduler stops, so a throttle set right before disconnecting (e.g. the 0 at
+# the end of a script) reaches the board instead of leaving the motor spinning
+STOP_FLUSHES = {"thr", "stp"}
+
+
+class PendingCommand:
+    __slots__ = ("key", "data", "submitted", "cancelled")
+
+    def __init__(self, key, data, submitted):
+        self.key = key
+        self.data = data
+        self.submitted = submitted
+        self.cancelled = False
+
+
+class CommandScheduler:
+    def __init__(self, write: Callable[[bytes], object], baudrate: int = 9600):
+        """
+        write: writes bytes to the port, only ever called by one thread at a time
+        """
+        self.write = write
+        self.byteTime = 10 / baudrate / rate.LINK_HEADROOM
+
+        self.queue = collections.deque()
+        # queued coalesced commands by key, the same objects as in queue
+        self.latest = {}
+        # popped by the writer thread but maybe not written yet
+        self.inFlight: Optional[PendingCommand] = None
+        self.condition = threading.Condition()
+        self.writeLock = threading.Lock()
+        # time.monotonic() before which the link is still busy with what was written
+        self.linkFree = 0.0
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+
+        self.submitted = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.emergencies = 0
+        self.failed = 0
+        self.maxDepth = 0
+        self.lastLatency = 0.0
+        self.maxLatency = 0.0
+        self.totalLatency = 0.0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True, name="command scheduler")
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the writer thread, queued STOP_FLUSHES commands are written first from the calling thread, anything else
+        still queued is dropped
+        """
+        with self.condition:
+            self.running = False
+            flushed = [pending for pending in self.queue if pending.key in STOP_FLUSHES]
+            self.queue.clear()
+            self.latest.clear()
+            self.condition.notify_all()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+        for pending in flushed:
+            self.send(pending)
+
+    def submit(self, msg: str):
+        """
+        Queues a command (without the newline), thread safe
+        """
+        data = (msg + "\n").encode("utf-8")
+        key = msg.split("(", 1)[0].strip()
+        now = time.monotonic()
+
+        if key in EMERGENCY:
+            with self.condition:
+                self.submitted += 1
+                self.emergencies += 1
+                for dropped in STOP_DROPS:
+                    pending = self.latest.pop(dropped, None)
+                    if pending is not None:
+                        self.queue.remove(pending)
+                if self.inFlight is not None and self.inFlight.key in STOP_DROPS:
+                    self.inFlight.cancelled = True
+            self.send(PendingCommand(key, data, now))
+            return
+
+        with self.condition:
+            self.submitted += 1
+            pending = self.latest.get(key)
+            if pending is not None:
+                # keeps its place in the queue, only the value changes
+                pending.data = data
+                pending.submitted = now
+                self.coalesced += 1
+                return
+            pending = PendingCommand(key, data, now)
+            self.queue.append(pending)
+            if key in COALESCED:
+                self.latest[key] = pending
+            self.maxDepth = max(self.maxDepth, len(self.queue))
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.queue:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                # wait for the link, new submissions can still coalesce into the head meanwhile
+                delay = self.linkFree - time.monotonic()
+                if delay > 0:
+                    self.condition.wait(delay)
+                    continue
+                pending = self.queue.popleft()
+                if self.latest.get(pending.key) is pending:
+                    del self.latest[pending.key]
+                self.inFlight = pending
+            self.send(pending)
+            self.inFlight = None
+
+    def send(self, pending: PendingCommand):
+        with self.writeLock:
+            if pending.cancelled:
+                return
             try:
-                self.serialPort.write((msg + "\n").encode('utf-8'))
-                return True
-            except Exception:
-                return False
-        else:
-            return False
+                self.write(pending.data)
+            except OSError:
+                # port closed or unplugged, serial.SerialException is an OSError
+                self.failed += 1
+                return
+            now = time.monotonic()
+            self.linkFree = max(self.linkFree, now) + len(pending.data) * self.byteTime
+        latency = now - pending.submitted
+        self.sent += 1
+        self.lastLatency = latency
+        self.maxLatency = max(self.maxLatency, latency)
+        self.totalLatency += latency
+
+    @property
+    def depth(self) -> int:
+        return len(self.queue)
+
+    def stats(self) -> dict:
+        """
+        Queue depth and submit to write latency in ms
+        """
+        return {
+            "depth": self.depth,
+            "maxDepth": self.maxDepth,
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "emergencies": self.emergencies,
+            "failed": self.failed,
+            "lastLatencyMs": self.lastLatency * 1000,
+            "meanLatencyMs": self.totalLatency / self.sent * 1000 if self.sent else 0.0,
+            "maxLatencyMs": self.maxLatency * 1000
+        }
@@ -0,0 +1,160 @@
+import time
+
+from . import protocol
+from . import timing
+from .calibration import Calibration
+from .frame import CHANNELS, Frame, FrameAssembler, FrameBatcher
+
+"""
+Protocol decoding without any event loop, read.SerialReader puts pyqt signals on top of it and aio.py uses it as is
+"""
+
+
+class Decoder:
+    """
+    Turns lines and binary frames into offset corrected values and calibrated Frames
+    subclasses get the results through valueDecoded (board units), frameDecoded and blockDecoded (calibrated)
+    """
+    cell1 = 0
+    cell2 = 0
+    voltage = 0
+    current = 0
+
+    def __init__(self, offsetDict):
+        self.offsetDict = offsetDict
+        # applied once per frame, pass through by default, see calibration.py
+        self.calibration = Calibration()
+
+        self.assembler = FrameAssembler()
+        self.batcher: FrameBatcher | None = None
+
+        # host read time (monotonic ns) of the latest raw value of each channel
+        self.timestamps = [0] * len(CHANNELS)
+
+        # board cycle counter and clock, only fed when the firmware sends them
+        self.sequence = timing.SequenceTracker()
+        self.clock = timing.ClockSync()
+
+    def setBatchInterval(self, intervalMs: int):
+        """
+        Hands a block of frames to blockDecoded every intervalMs, 0 turns batching off, frames collected under the old
+        interval are handed out first
+        """
+        self.flushBatch()
+        self.batcher = FrameBatcher(intervalMs) if intervalMs > 0 else None
+
+    def pollBatch(self, now: int):
+        """
+        Hands out the pending block if its interval is over, for readers that woke up without new frames
+        now: host time.monotonic_ns()
+        """
+        if self.batcher is not None:
+            self.emitBlock(self.batcher.due(now))
+
+    def flushBatch(self):
+        """
+        Hands out the frames collected so far, e.g. when the port closes
+        """
+        if self.batcher is not None:
+            self.emitBlock(self.batcher.flush())
+
+    def addToFrame(self, index, value, timestamp):
+        frame = self.assembler.add(index, value, timestamp)
+        if frame is not None:
+            self.emitFrame(frame)
+
+    def addBoardTime(self, seq, millis, timestamp):
+        self.sequence.add(seq)
+        self.clock.add(millis, timestamp)
+
+    def timingStats(self) -> dict:
+        """
+        Sequence counters and clock fit, empty sections if the firmware doesn't send board time
+        """
+        return {
+            "sequence": self.sequence.stats(),
+            "clock": self.clock.stats()
+        }
+
+    def emitFrame(self, frame):
+        self.frameDecoded(self.calibration.applyFrame(frame))
+        if self.batcher is not None:
+            self.emitBlock(self.batcher.add(frame))
+
+    def emitBlock(self, block):
+        if block is not None:
+            # blocks collect board units and are converted as a whole
+            self.blockDecoded(self.calibration.apply(block))
+
+    # results, called on the thread that decodes
+    def valueDecoded(self, index: int, value):
+        pass
+
+    def frameDecoded(self, frame: Frame):
+        pass
+
+    def blockDecoded(self, block):
+        pass
+
+    def decode(self, line: str, timestamp: int | None = None):
+        """
+        Decodes a single line of serial input and updates the latest values.
+        Expected formats:
+        - lc1(<long>|n)
+        - lc2(<long>|n)
+        - cur(<float>)
+        - vtg(<float>)
+        - tms(<seq>,<millis>)
+        timestamp: host time.monotonic_ns() when the line was read, defaults to now
+        """
+        if timestamp is None:
+            timestamp = time.monotonic_ns()
+
+        decoded = protocol.decodeLine(line)
+        if decoded is None:
+            boardTime = protocol.decodeTiming(line)
+            if boardTime is not None:
+                self.addBoardTime(*boardTime, timestamp)
+                frame = self.assembler.startCycle(*boardTime, timestamp)
+                if frame is not None:
+                    self.emitFrame(frame)
+            return
+
+        index, raw = decoded
+        name = CHANNELS[index]
+        setattr(self, name, raw)
+        self.timestamps[index] = timestamp
+
+        value = None
+        if raw is not None:
+            value = raw - self.offsetDict[name]
+            if index >= 2:
+                value = round(value, 2)
+            self.valueDecoded(index, value)
+        self.addToFrame(index, value, timestamp)
+
+    def decodeBinary(self, binaryFrame, timestamp: int | None = None):
+        """
+        Decodes a binary.BinaryFrame, which already holds a whole board cycle
+        timestamp: host time.monotonic_ns() when the frame was read, defaults to now
+        """
+        if timestamp is None:
+            timestamp = time.monotonic_ns()
+        self.addBoardTime(binaryFrame.seq, binaryFrame.millis, timestamp)
+
+        values = []
+        for index, raw in enumerate(binaryFrame[2:]):
+            value = None
+            if raw is not None:
+                name = CHANNELS[index]
+                if index >= 2:
+                    # float32 on the wire, the ascii protocol only carries 2 decimals
+                    raw = round(raw, 2)
+                setattr(self, name, raw)
+                self.timestamps[index] = timestamp
+                value = raw - self.offsetDict[name]
+                if index >= 2:
+                    value = round(value, 2)
+                self.valueDecoded(index, value)
+            values.append(value)
+        self.emitFrame(Frame(timestamp, *values, binaryFrame.seq, binaryFrame.millis))
@@ -0,0 +1,223 @@
+from . import binary
+from . import rate
+
+"""
+Python model of boardCode/ardSketch/ardSketch.ino
+
+time is simulated, loop() runs one board cycle and advances millis by however long that cycle takes on the real board,
+so the output rate for a given rate/averaging/baudrate can be checked as fast as python runs
+sample() returns constant readings, sim.py overrides it with a motor model
+"""
+
+# arduino Serial.println line ending
+NEWLINE = b"\r\n"
+
+
+class FirmwareModel:
+    def __init__(self, baudrate: int = 9600):
+        self.baudrate = baudrate
+
+        # data transmission switches
+        self.lc1 = True
+        self.lc2 = True
+        self.vtg = True
+        self.cur = True
+        self.tms = False
+
+        self.binaryMode = False
+        self.frameSeq = 0
+
+        self.rate = rate.DEFAULT_RATE
+        self.averaging = rate.DEFAULT_AVERAGING
+        self.throttle = 0
+        self.stopped = False
+
+        # hx711 conversions per second, a load cell read before its next conversion reports n
+        self.loadCellRate = 10
+        self.lastConversion = [-1000.0, -1000.0]
+
+        self.millis = 0.0
+        self.command = bytearray()
+        self.output = bytearray()
+
+    def setup(self) -> bytes:
+        self.println("STARTING")
+        self.setThrottle(0)
+        self.println("STARTED")
+        return self.takeOutput()
+
+    def receive(self, data: bytes):
+        """
+        Bytes from the host, parsed by serviceCommands()
+        """
+        self.command += data
+
+    def serviceCommands(self) -> bytes:
+        """
+        Parses every complete command, the sketch does this continuously while waiting for the next cycle
+        returns everything the commands wrote
+        """
+        while b"\n" in self.command:
+            line, _, rest = self.command.partition(b"\n")
+            self.command = bytearray(rest)
+            self.parseCommand(line.decode("utf-8", "replace"))
+        return self.takeOutput()
+
+    def loop(self) -> bytes:
+        """
+        Runs one board cycle and returns everything it wrote
+        """
+        self.output += self.serviceCommands()
+
+        # integer milliseconds like the sketch
+        period = 1000 // self.rate
+        window = min(self.averaging, period / 2)
+
+        cell1, cell2, current, voltage = self.sample()
+        cell1 = cell1 if self.loadCellReady(0) else None
+        cell2 = cell2 if self.loadCellReady(1) else None
+
+        if self.binaryMode:
+            self.output += binary.encodeFrame(
+                self.frameSeq,
+                int(self.millis),
+                cell1 if self.lc1 else None,
+                cell2 if self.lc2 else None,
+                current if self.cur else None,
+                voltage if self.vtg else None
+            )
+            self.frameSeq = (self.frameSeq + 1) & 0xFFFF
+        else:
+            if self.tms:
+                self.println(f"tms({self.frameSeq},{int(self.millis)})")
+            # same swapped cur/vtg switches as the sketch
+            if self.lc1:
+                self.println(f"lc1({'n' if cell1 is None else int(cell1)})")
+            if self.lc2:
+                self.println(f"lc2({'n' if cell2 is None else int(cell2)})")
+            if self.vtg:
+                self.println(f"cur({current:.2f})")
+            if self.cur:
+                self.println(f"vtg({voltage:.2f})")
+            self.frameSeq = (self.frameSeq + 1) & 0xFFFF
+
+        output = self.takeOutput()
+
+        # the cycle lasts at least one period, the averaging window, and the time it takes to get the bytes out
+        self.millis += max(period, window, self.transmitTime(len(output)))
+        return output
+
+    def run(self, durationMs: float) -> bytes:
+        """
+        Loops for durationMs of board time and returns everything written
+        """
+        output = bytearray()
+        end = self.millis + durationMs
+        while self.millis < end:
+            output += self.loop()
+        return bytes(output)
+
+    def sample(self):
+        """
+        Returns (cell1 grams, cell2 grams, current amps, voltage volts)
+        """
+        return 0, 0, 0.0, 0.0
+
+    def loadCellReady(self, index: int) -> bool:
+        if self.millis - self.lastConversion[index] >= 1000 / self.loadCellRate:
+            self.lastConversion[index] = self.millis
+            return True
+        return False
+
+    def transmitTime(self, byteCount: int) -> float:
+        """
+        Milliseconds needed to send byteCount bytes, 8N1
+        """
+        return byteCount * 10 * 1000 / self.baudrate
+
+    def println(self, text: str):
+        self.output += text.encode() + NEWLINE
+
+    def takeOutput(self) -> bytes:
+        output = bytes(self.output)
+        self.output.clear()
+        return output
+
+    def setThrottle(self, throttle: int):
+        # reattaches the esc signal after an emergency stop
+        self.stopped = False
+        self.throttle = throttle
+        self.println(f"Throttle set to {throttle}%")
+
+    def emergencyStop(self):
+        self.stopped = True
+        self.println("Emergency stop")
+
+    def parseCommand(self, cmd: str):
+        if cmd == "inf":
+            pass
+        elif cmd.startswith("lc1("):
+            self.lc1 = extractBool(cmd)
+        elif cmd.startswith("lc2("):
+            self.lc2 = extractBool(cmd)
+        elif cmd.startswith("vtg("):
+            self.vtg = extractBool(cmd)
+        elif cmd.startswith("cur("):
+            self.cur = extractBool(cmd)
+        elif cmd.startswith("tms("):
+            self.tms = extractBool(cmd)
+        elif cmd.startswith("thr("):
+            value = extractNumber(cmd)
+            if 0 <= value <= 100:
+                self.setThrottle(value)
+            else:
+                self.println("Invalid throttle value")
+        elif cmd.startswith("bin("):
+            self.binaryMode = extractBool(cmd)
+            self.println(binary.ACK_ON if self.binaryMode else binary.ACK_OFF)
+        elif cmd.startswith("rate("):
+            value = extractNumber(cmd)
+            if rate.MIN_RATE <= value <= rate.MAX_RATE:
+                self.rate = value
+                self.println(f"Rate set to {value} Hz")
+            else:
+                self.println("Invalid rate value")
+        elif cmd.startswith("avg("):
+            value = extractNumber(cmd)
+            if 0 <= value <= rate.MAX_AVERAGING:
+                self.averaging = value
+                self.println(f"Averaging set to {value} ms")
+            else:
+                self.println("Invalid averaging value")
+        elif cmd == "stp":
+            self.emergencyStop()
+        else:
+            self.println("Unknown command")
+
+
+def extractNumber(cmd: str) -> int:
+    """
+    String.toInt() of whatever is between the brackets, -1 if there are none
+    """
+    start = cmd.find("(")
+    end = cmd.find(")")
+    if start != -1 and end != -1 and end > start:
+        digits = ""
+        for c in cmd[start + 1:end].strip():
+            if c.isdigit() or (c == "-" and not digits):
+                digits += c
+            else:
+                break
+        try:
+            return int(digits)
+        except ValueError:
+            return 0
+    return -1
+
+
+def extractBool(cmd: str) -> bool:
+    start = cmd.find("(")
+    end = cmd.find(")")
+    if start != -1 and end != -1 and end > start:
+        return extractNumber(cmd) != 0
+    return False
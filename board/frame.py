@@ -0,0 +1,141 @@
+import time
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+"""
+Sample frames, one record per board cycle
+
+the firmware sends lc1, lc2, cur and vtg once per loop in that order, any of them can be muted and the load cells can
+report n when the hx711 wasn't ready, so a missing value is None in a Frame and nan in a block
+
+timestamps are time.monotonic_ns() of the host when the first value of the cycle was read off the port, seq and millis
+are the board's cycle counter and clock when the firmware sends them (binary frames, or tms lines, see timing.py)
+"""
+
+CHANNELS = ("cell1", "cell2", "current", "voltage")
+
+# structured dtype of a block of frames, timestamp is time.monotonic_ns() of the host
+FRAME_DTYPE = np.dtype([
+    ("timestamp", np.int64),
+    ("cell1", np.float64),
+    ("cell2", np.float64),
+    ("current", np.float64),
+    ("voltage", np.float64)
+])
+
+
+class Frame(NamedTuple):
+    timestamp: int
+    cell1: Optional[int]
+    cell2: Optional[int]
+    current: Optional[float]
+    voltage: Optional[float]
+    seq: Optional[int] = None
+    millis: Optional[int] = None
+
+
+class FrameAssembler:
+    """
+    Groups the values of one board cycle into a Frame
+    a cycle is complete when its last channel arrives or when a channel comes around again (later channels muted)
+    """
+    def __init__(self):
+        self.values = [None] * len(CHANNELS)
+        self.lastIndex = -1
+        self.startTime = 0
+        self.seq = None
+        self.millis = None
+
+    def add(self, index: int, value, timestamp: Optional[int] = None) -> Optional[Frame]:
+        """
+        index: position of the channel in CHANNELS
+        value: decoded value, None if the board reported n
+        timestamp: host time the value was read, defaults to now
+        returns a Frame once a cycle is complete, otherwise None
+        """
+        if timestamp is None:
+            timestamp = time.monotonic_ns()
+
+        frame = None
+        if index <= self.lastIndex:
+            frame = self.flush()
+
+        if self.lastIndex < 0 and self.seq is None:
+            self.startTime = timestamp
+        self.values[index] = value
+        self.lastIndex = index
+
+        if index == len(CHANNELS) - 1:
+            frame = self.flush()
+        return frame
+
+    def startCycle(self, seq: int, millis: int, timestamp: Optional[int] = None) -> Optional[Frame]:
+        """
+        Board cycle header (tms line), completes the previous cycle and stamps the next one
+        """
+        frame = self.flush()
+        self.seq = seq
+        self.millis = millis
+        self.startTime = time.monotonic_ns() if timestamp is None else timestamp
+        return frame
+
+    def flush(self) -> Optional[Frame]:
+        """
+        Completes the current cycle early, returns None if nothing was received
+        """
+        if self.lastIndex < 0:
+            return None
+        frame = Frame(self.startTime, *self.values, self.seq, self.millis)
+        self.values = [None] * len(CHANNELS)
+        self.lastIndex = -1
+        self.seq = None
+        self.millis = None
+        return frame
+
+
+class FrameBatcher:
+    """
+    Collects frames into numpy blocks of FRAME_DTYPE, a block is finished once intervalMs have passed since its first
+    frame, checked by add() as frames arrive and by due() when the reader wakes up without any (the port timeout), so
+    on a stalled stream the last block comes out at most one read timeout late, and flush() hands out a partial block
+    """
+    def __init__(self, intervalMs: int, capacity: int = 256):
+        self.interval = intervalMs * 1_000_000
+        self.block = np.empty(capacity, dtype=FRAME_DTYPE)
+        self.count = 0
+        self.batchStart = None
+
+    def add(self, frame: Frame) -> Optional[np.ndarray]:
+        """
+        Appends a frame, returns the finished block once the interval has elapsed
+        """
+        if self.count == len(self.block):
+            self.block = np.resize(self.block, len(self.block) * 2)
+        if self.batchStart is None:
+            self.batchStart = frame.timestamp
+
+        self.block[self.count] = tuple(np.nan if v is None else v for v in frame[:len(FRAME_DTYPE)])
+        self.count += 1
+
+        return self.due(frame.timestamp)
+
+    def due(self, now: int) -> Optional[np.ndarray]:
+        """
+        Returns the finished block if the interval has elapsed by now (monotonic ns), None otherwise
+        """
+        if self.batchStart is not None and now - self.batchStart >= self.interval:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[np.ndarray]:
+        """
+        Returns the frames collected so far as a new block, None if empty
+        """
+        if self.count == 0:
+            return None
+        block = self.block[:self.count].copy()
+        self.count = 0
+        self.batchStart = None
+        return block
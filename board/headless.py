@@ -0,0 +1,384 @@
+import threading
+import time
+
+from typing import Callable, Optional
+
+import serial
+
+from . import acquire
+from . import ack
+from . import command
+from . import rate
+from . import record
+from . import ring
+from .calibration import Calibration
+from .decode import Decoder
+from .frame import CHANNELS, Frame
+from .rolling import RollingStore
+from .snapshot import SnapshotStore
+
+"""
+Session without pyqt, start() reads on a plain thread, commands go through a command.CommandScheduler
+session.BoardSession builds the qt version on top of it, the cli test runner (python -m autoTest) uses it as is
+"""
+
+# columns of a saved point, see HeadlessSession.point
+POINT_COLUMNS = ["Time", "Throttle", "Thrust", "Torque", "Voltage", "Current", "ThrustStd", "TorqueStd", "VoltageStd",
+                 "CurrentStd"]
+# the board channel behind every measured column
+POINT_CHANNELS = {"Thrust": "cell1", "Torque": "cell2", "Voltage": "voltage", "Current": "current"}
+
+
+class SessionDecoder(Decoder):
+    """
+    Decoder that hands every frame to a callback
+    """
+    def __init__(self, offsetDict, onFrame: Callable[[Frame], None]):
+        super().__init__(offsetDict)
+        self.onFrame = onFrame
+
+    def frameDecoded(self, frame):
+        self.onFrame(frame)
+
+
+class HeadlessSession:
+    def __init__(self, name: str):
+        self.name = name
+
+        self.ser: Optional[serial.Serial] = None
+        self.lineReader: Optional[acquire.StreamReader] = None
+        self.recorder: Optional[record.Recorder] = None
+        self.ringLog: Optional[ring.RingLog] = None
+
+        self.offsetDict = dict.fromkeys(CHANNELS, 0)
+        self.reader = self.makeReader()
+        self.reader.calibration = Calibration.load(name)
+
+        # consistent latest values for other threads, see snapshot.py
+        self.snapshots = SnapshotStore()
+        # mean, spread and range of every channel over the last samples, see rolling.py and setWindow
+        self.rolling = RollingStore()
+
+        # latest frame values, offsets subtracted and calibrated
+        self.cell1 = 0
+        self.cell2 = 0
+        self.current = 0
+        self.voltage = 0
+        self.timestamp = 0
+
+        # streaming rate and averaging window the board last acknowledged, None until it does (old firmware never will)
+        self.rateHz: Optional[int] = None
+        self.averagingMs: Optional[int] = None
+
+        self.scheduler: Optional[command.CommandScheduler] = None
+        # replies to the commands written, round trip latency and timeouts, see ack.py
+        self.acks = ack.AckTracker(onAck=self.ackReceived, onTimeout=self.ackTimedOut)
+        self.readThread: Optional[threading.Thread] = None
+        # set on every decoded frame, see waitForFrame
+        self.frameEvent = threading.Event()
+
+    def __repr__(self):
+        port = self.ser.port if self.connected else "disconnected"
+        return f"{type(self).__name__}({self.name!r}, {port})"
+
+    def makeReader(self) -> Decoder:
+        return SessionDecoder(self.offsetDict, self.updateFrame)
+
+    @property
+    def connected(self) -> bool:
+        return self.ser is not None and self.ser.is_open
+
+    def connect(self, port: str, baudrate: int = 9600):
+        """
+        port: serial port name, or a url like sim://?rate=20 for the simulated stand or replay:///run.tsraw to play back
+        a recording
+        """
+        try:
+            self.ser = serial.serial_for_url(port, baudrate, timeout=1)
+        except (serial.SerialException, ValueError):
+            # handle error (port unavailable, unknown url scheme, etc.)
+            return False
+        self.lineReader = acquire.StreamReader(self.ser)
+        self.lineReader.recorder = self.recorder
+        self.acks.clear()
+        self.rolling.clear()
+        self.scheduler = command.CommandScheduler(self.writeCommand, baudrate)
+        self.scheduler.start()
+        return True
+
+    def disconnect(self):
+        if self.connected:
+            self.scheduler.stop()
+            self.lineReader.cancel()
+            self.ser.close()
+            if self.readThread is not None and self.readThread is not threading.current_thread():
+                self.readThread.join()
+            self.readThread = None
+            # the reading thread is gone, the last partial block of frames is handed out here
+            self.reader.flushBatch()
+            self.acks.clear()
+            self.stopRecording()
+            self.stopRingLog()
+            return True
+        return False
+
+    def start(self):
+        """
+        Reads the port on a background thread until disconnect, for users without their own read loop
+        """
+        self.readThread = threading.Thread(target=self.readLoop, daemon=True, name=f"{self.name} reader")
+        self.readThread.start()
+
+    def readLoop(self):
+        while self.connected:
+            try:
+                self.getLines()
+            except serial.SerialException:
+                # unplugged or closed
+                return
+
+    def getLines(self):
+        """
+        blocks until serial data arrives, then decodes every complete line or binary frame and updates the latest values
+        returns the received lines (in binary mode only the messages between frames), empty if the port timed out
+        """
+        lines, frames = self.lineReader.read()
+        readTime = self.lineReader.readTime
+        for line in lines:
+            self.reader.decode(line, readTime)
+            if line.startswith("Rate set to"):
+                self.rateHz = rate.parseRateAck(line)
+            elif line.startswith("Averaging set to"):
+                self.averagingMs = rate.parseAveragingAck(line)
+            self.acks.lineReceived(line, readTime)
+        for frame in frames:
+            self.reader.decodeBinary(frame, readTime)
+        # a quiet port still times out once a second, so no command waits much longer than the ack timeout and a
+        # stalled stream still gets its last block of frames
+        self.acks.expire(readTime)
+        self.reader.pollBatch(readTime)
+        return lines
+
+    def waitForFrame(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the next frame is decoded, returns False on timeout
+        """
+        self.frameEvent.clear()
+        return self.frameEvent.wait(timeout)
+
+    def startRecording(self, path: str, baudrate: Optional[int] = None):
+        """
+        records the raw serial stream (both directions) to path until stopRecording or disconnect, can be called before
+        connect to capture the whole session
+        baudrate: stored in the recording's header, the open port's by default, give the one connect will use when
+        recording before connect
+        """
+        if baudrate is None:
+            baudrate = self.ser.baudrate if self.ser is not None else 9600
+        self.stopRecording()
+        self.recorder = record.Recorder(path, baudrate)
+        self.attachRecorder(self.recorder)
+        return self.recorder
+
+    def stopRecording(self):
+        if self.recorder is None:
+            return
+        self.attachRecorder(None)
+        self.recorder.close()
+        self.recorder = None
+
+    def startRingLog(self, path: str, hours: float = 1.0):
+        """
+        keeps the last hours of frames in a memory mapped ring file (see ring.py) until stopRingLog or disconnect, other
+        processes can read it with ring.RingReader while it is written
+        """
+        self.stopRingLog()
+        self.ringLog = ring.RingLog.forHours(path, hours)
+        return self.ringLog
+
+    def stopRingLog(self):
+        ringLog = self.ringLog
+        if ringLog is None:
+            return
+        self.ringLog = None
+        ringLog.close()
+
+    def attachRecorder(self, recorder: Optional[record.Recorder]):
+        if self.lineReader is not None:
+            self.lineReader.recorder = recorder
+
+    def replay(self, path: str, speed: float = 0.0):
+        """
+        decodes a recording into reader without a port, the signals fire exactly as they did live
+        speed: 1 is real time, N is N times faster, 0 is as fast as possible
+        """
+        return record.replay(path, self.reader, speed)
+
+    def setBinaryMode(self, enabled: bool):
+        """
+        asks the board to switch to binary frames, the reader follows once the board acknowledges
+        boards without binary support reply "Unknown command" and stay on ascii
+        """
+        self.sendCommand(f"bin({int(enabled)})")
+
+    def setBoardTime(self, enabled: bool):
+        """
+        asks the board to send a tms(<seq>,<millis>) header in front of every ascii cycle, binary frames always carry it
+        """
+        self.sendCommand(f"tms({int(enabled)})")
+
+    def getTimingStats(self):
+        """
+        dropped/duplicated/out of order cycle counters and the board clock drift estimate
+        """
+        return self.reader.timingStats()
+
+    def boardToHostTime(self, millis: int) -> int:
+        """
+        converts a board millis() reading to host time.monotonic_ns()
+        """
+        return self.reader.clock.toHost(millis)
+
+    def isBinaryMode(self):
+        return self.lineReader is not None and self.lineReader.binaryMode
+
+    def zeroCell1(self):
+        self.offsetDict["cell1"] = self.reader.cell1
+
+    def zeroCell2(self):
+        self.offsetDict["cell2"] = self.reader.cell2
+
+    def zeroCurrent(self):
+        self.offsetDict["current"] = self.reader.current
+
+    def zeroVoltage(self):
+        self.offsetDict["voltage"] = self.reader.voltage
+
+    def setThrottle(self, throttle: int):
+        if throttle < 0 or throttle > 100:
+            raise ValueError("throttle must be between 0 and 100")
+        self.sendCommand(f"thr({throttle})")
+
+    def setRate(self, hz: int):
+        if hz < rate.MIN_RATE or hz > rate.MAX_RATE:
+            raise ValueError(f"rate must be between {rate.MIN_RATE} and {rate.MAX_RATE} Hz")
+        self.sendCommand(f"rate({hz})")
+
+    def setAveraging(self, ms: int):
+        """
+        sets the current/voltage averaging window, the board caps it at half a cycle
+        """
+        if ms < 0 or ms > rate.MAX_AVERAGING:
+            raise ValueError(f"averaging window must be between 0 and {rate.MAX_AVERAGING} ms")
+        self.sendCommand(f"avg({ms})")
+
+    def negotiateRate(self, binary: Optional[bool] = None):
+        """
+        requests the highest rate the current baudrate can carry, returns the requested rate
+        binary: whether to size the rate for binary frames, defaults to the protocol currently in use
+        """
+        if binary is None:
+            binary = self.isBinaryMode()
+        hz = rate.maxRate(self.ser.baudrate, binary)
+        self.setRate(hz)
+        return hz
+
+    def sendCommand(self, msg: str):
+        """
+        queues a command, superseded throttle commands are dropped and stp goes out right away, see command.py
+        """
+        if not self.connected:
+            return False
+        self.scheduler.submit(msg)
+        return True
+
+    def emergencyStop(self):
+        self.sendCommand("stp")
+
+    def writeCommand(self, data: bytes):
+        self.ser.write(data)
+        self.acks.commandWritten(data.decode("utf-8").strip(), time.monotonic_ns())
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.write(data, direction=record.TO_BOARD)
+
+    def commandStats(self) -> dict:
+        """
+        command queue depth and latency, see command.CommandScheduler.stats
+        """
+        return self.scheduler.stats() if self.scheduler is not None else {}
+
+    def ackStats(self) -> dict:
+        """
+        write to reply round trips and timeouts per command kind, see ack.AckTracker.stats
+        """
+        return self.acks.stats()
+
+    def ackReceived(self, pending: ack.PendingAck):
+        """
+        called on the reading thread when the board answers a command
+        """
+
+    def ackTimedOut(self, pending: ack.PendingAck):
+        """
+        called when a command got no reply within acks.timeout
+        """
+
+    @property
+    def calibration(self) -> Calibration:
+        return self.reader.calibration
+
+    def setCalibration(self, table: Calibration, save: bool = True):
+        """
+        converts frames, snapshots and blocks from now on, save stores it for the next start under the session's name
+        """
+        self.reader.calibration = table
+        if save:
+            table.save(self.name)
+
+    def setWindow(self, samples: Optional[int] = None, ms: Optional[float] = None):
+        """
+        window of rolling: the last samples values or the last ms milliseconds of every channel, starts the statistics
+        over, rolling.DEFAULT_WINDOW_MS when neither is given, raises ValueError if both are
+        """
+        self.rolling.setWindow(samples, ms)
+
+    def point(self, timer, throttle, snapshot=None, stats=None) -> dict:
+        """
+        One row of POINT_COLUMNS, every channel is its mean over the rolling window, the latest value if the window is
+        still empty
+        snapshot / stats: readings already taken (e.g. by waitForFresh), the latest ones otherwise
+        """
+        if snapshot is None:
+            snapshot = self.snapshots.latest()
+        if stats is None:
+            stats = self.rolling.summary()
+        point = {"Time": timer, "Throttle": throttle}
+        for column, channel in POINT_CHANNELS.items():
+            point[column] = stats[channel].mean if stats[channel].count else snapshot.value(channel)
+            point[column + "Std"] = stats[channel].std
+        return point
+
+    def setBatchInterval(self, intervalMs: int):
+        """
+        the reader hands out a numpy block of frames every intervalMs (framesReceived on a BoardSession), 0 turns it off
+        """
+        self.reader.setBatchInterval(intervalMs)
+
+    def updateFrame(self, frame):
+        self.timestamp = frame.timestamp
+        # channels the board didn't report keep their last value
+        if frame.cell1 is not None:
+            self.cell1 = frame.cell1
+        if frame.cell2 is not None:
+            self.cell2 = frame.cell2
+        if frame.current is not None:
+            self.current = frame.current
+        if frame.voltage is not None:
+            self.voltage = frame.voltage
+        self.snapshots.update(frame)
+        self.rolling.update(frame)
+        ringLog = self.ringLog
+        if ringLog is not None:
+            ringLog.append(frame)
+        self.frameEvent.set()
@@ -0,0 +1,165 @@
+import threading
+import time
+
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from serial.serialutil import SerialBase, SerialException, PortNotOpenError, to_bytes
+
+"""
+Base class for the software serial ports (sim://, replay://), opened through serial.serial_for_url like a real port
+
+a producer thread calls feed() with the bytes the "board" sends, write() hands host bytes to received()
+subclasses implement parseOptions(), start() and stop()
+"""
+
+
+class BufferedPort(SerialBase):
+    # url scheme of the subclass, e.g. "sim"
+    SCHEME = None
+
+    # feed() blocks while this many bytes are waiting, so a fast producer can't outrun the host forever
+    BUFFER_LIMIT = 1 << 20
+
+    def __init__(self, *args, **kwargs):
+        self.buffer = bytearray()
+        self.condition = threading.Condition()
+        self.cancelled = False
+        self.finished = False
+        super().__init__(*args, **kwargs)
+
+    def open(self):
+        if self.is_open:
+            raise SerialException("Port is already open.")
+        if self._port is None:
+            raise SerialException("Port must be configured before it can be used.")
+
+        parts = urlsplit(self.port)
+        if parts.scheme != self.SCHEME:
+            raise SerialException(f"expected a {self.SCHEME}:// url, got {self.port!r}")
+        options = {key: values[-1] for key, values in parse_qs(parts.query, True).items()}
+        try:
+            self.parseOptions(unquote(parts.netloc + parts.path), options)
+        except (ValueError, OSError) as e:
+            raise SerialException(f"invalid {self.SCHEME}:// url {self.port!r}: {e}")
+
+        self.buffer.clear()
+        self.finished = False
+        self.is_open = True
+        self.start()
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+            self.stop()
+            with self.condition:
+                self.condition.notify_all()
+        super().close()
+
+    def _reconfigure_port(self):
+        pass
+
+    # producer side
+    def feed(self, data: bytes):
+        with self.condition:
+            while len(self.buffer) > self.BUFFER_LIMIT and self.is_open:
+                self.condition.wait(0.1)
+            self.buffer += data
+            self.condition.notify_all()
+
+    def finish(self):
+        """
+        The producer has nothing more to send, reads raise SerialException once the buffer is empty
+        """
+        with self.condition:
+            self.finished = True
+            self.condition.notify_all()
+
+    # host side
+    @property
+    def in_waiting(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+        return len(self.buffer)
+
+    def read(self, size=1):
+        if not self.is_open:
+            raise PortNotOpenError()
+        deadline = None if self._timeout is None else time.monotonic() + self._timeout
+        with self.condition:
+            while len(self.buffer) < size and self.is_open and not self.cancelled and not self.finished:
+                if deadline is None:
+                    self.condition.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+            self.cancelled = False
+            if self.finished and not self.buffer:
+                # same as a real port that was unplugged
+                raise SerialException(f"{self.SCHEME}:// stream ended")
+            data = bytes(self.buffer[:size])
+            del self.buffer[:size]
+            self.condition.notify_all()
+        return data
+
+    def cancel_read(self):
+        with self.condition:
+            self.cancelled = True
+            self.condition.notify_all()
+
+    def write(self, data):
+        if not self.is_open:
+            raise PortNotOpenError()
+        data = to_bytes(data)
+        self.received(data)
+        return len(data)
+
+    def reset_input_buffer(self):
+        with self.condition:
+            self.buffer.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    @property
+    def out_waiting(self):
+        return 0
+
+    def _update_break_state(self):
+        pass
+
+    def _update_rts_state(self):
+        pass
+
+    def _update_dtr_state(self):
+        pass
+
+    @property
+    def cts(self):
+        return True
+
+    @property
+    def dsr(self):
+        return True
+
+    @property
+    def ri(self):
+        return False
+
+    @property
+    def cd(self):
+        return True
+
+    # subclass hooks
+    def parseOptions(self, location: str, options: dict):
+        pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def received(self, data: bytes):
+        pass
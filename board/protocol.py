@@ -0,0 +1,121 @@
+import re
+
+import numpy as np
+
+from .frame import CHANNELS, FRAME_DTYPE
+
+"""
+Decoder for the ascii data protocol
+    lc1(<long>|n)
+    lc2(<long>|n)
+    cur(<float>)
+    vtg(<float>)
+
+decodeLine handles one line at a time for the live path, decodeBuffer and decodeBlock turn a whole byte buffer of
+lines into numpy arrays for replays and offline reprocessing
+
+tms(<seq>,<millis>) lines are cycle headers (see timing.py), decodeTiming handles them
+"""
+
+# tag -> (channel index, value type)
+TAGS = {
+    "lc1": (0, int),
+    "lc2": (1, int),
+    "cur": (2, float),
+    "vtg": (3, float)
+}
+
+# the bulk pattern doesn't check value types per tag (lc1(1.5) is accepted and cur(n) becomes nan), the firmware never
+# sends those and checking them would halve the throughput
+# n readings are rewritten to nan before matching so every value converts with a single float64 cast
+BULK_PATTERN = re.compile(rb"^(lc1|lc2|cur|vtg)\((nan|[-+]?[0-9]*\.?[0-9]+)\)", re.MULTILINE)
+BULK_TAGS = {b"lc1": 0, b"lc2": 1, b"cur": 2, b"vtg": 3}
+# channel index by the third byte of a tag, which tells all four apart
+BULK_INDEX = np.zeros(256, dtype=np.int8)
+for _tag, _index in BULK_TAGS.items():
+    BULK_INDEX[_tag[2]] = _index
+
+
+def decodeLine(line: str):
+    """
+    Decodes a single line
+    returns (channel index, value) where value is None if the board sent n, or None if the line isn't data
+    """
+    entry = TAGS.get(line[:3])
+    if entry is None or line[3:4] != "(":
+        return None
+    end = line.find(")", 4)
+    if end < 0:
+        return None
+
+    index, valueType = entry
+    raw = line[4:end]
+    if raw == "n" and valueType is int:
+        return index, None
+    try:
+        return index, valueType(raw)
+    except ValueError:
+        return None
+
+
+def decodeTiming(line: str):
+    """
+    Decodes a tms(<seq>,<millis>) line, returns (seq, millis) or None
+    """
+    if not line.startswith("tms("):
+        return None
+    end = line.find(")", 4)
+    seq, _, millis = line[4:end].partition(",")
+    try:
+        return int(seq), int(millis)
+    except ValueError:
+        return None
+
+
+def _matches(data: bytes):
+    """
+    Returns the channel index and value (nan for n) of every data line in data as two numpy arrays
+    """
+    matches = BULK_PATTERN.findall(data.replace(b"(n)", b"(nan)"))
+    if not matches:
+        return np.empty(0, dtype=np.int8), np.empty(0, dtype=np.float64)
+
+    # every tag is 3 bytes, joined they form one buffer numpy can index without a python loop
+    tags = np.frombuffer(b"".join([tag for tag, _ in matches]), dtype=np.uint8)
+    indices = BULK_INDEX[tags[2::3]]
+    values = np.array([value for _, value in matches], dtype=np.float64)
+    return indices, values
+
+
+def decodeBuffer(data: bytes) -> dict:
+    """
+    Decodes every data line in data
+    returns a dictionary of channel name -> float64 array in arrival order, n readings are nan
+    """
+    indices, values = _matches(data)
+    return {name: values[indices == i] for i, name in enumerate(CHANNELS)}
+
+
+def decodeBlock(data: bytes, timestamp: int = 0) -> np.ndarray:
+    """
+    Decodes every data line in data and groups them into board cycles the same way frame.FrameAssembler does
+    returns a FRAME_DTYPE block, channels that were muted or n are nan, every row carries the given timestamp
+    """
+    indices, values = _matches(data)
+    if len(indices) == 0:
+        return np.empty(0, dtype=FRAME_DTYPE)
+
+    # a new cycle starts whenever a channel doesn't come after the previous one, or after the last channel
+    starts = np.empty(len(indices), dtype=bool)
+    starts[0] = True
+    starts[1:] = (indices[1:] <= indices[:-1]) | (indices[:-1] == len(CHANNELS) - 1)
+    rows = np.cumsum(starts) - 1
+
+    block = np.empty(rows[-1] + 1, dtype=FRAME_DTYPE)
+    block["timestamp"] = timestamp
+    for i, name in enumerate(CHANNELS):
+        column = np.full(len(block), np.nan)
+        mask = indices == i
+        column[rows[mask]] = values[mask]
+        block[name] = column
+    return block
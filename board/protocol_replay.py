@@ -0,0 +1,45 @@
+import threading
+
+from typing import Optional
+
+from .port import BufferedPort
+from .record import FROM_BOARD, Recording, paced
+
+"""
+pyserial url handler for replay:// (see record.py), plays a raw recording back as if the board was sending it
+    board.connect("replay:///home/me/run.tsraw?speed=4")
+the port reports the end of the recording like an unplugged board, commands written to it are ignored
+"""
+
+
+class Serial(BufferedPort):
+    SCHEME = "replay"
+
+    def __init__(self, *args, **kwargs):
+        self.recording: Optional[Recording] = None
+        self.speed = 1.0
+        self.stopEvent = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        super().__init__(*args, **kwargs)
+
+    def parseOptions(self, location: str, options: dict):
+        self.speed = float(options.get("speed", 1.0))
+        self.recording = Recording(location)
+
+    def start(self):
+        self.stopEvent.clear()
+        self.thread = threading.Thread(target=self.play, daemon=True, name="serial replay")
+        self.thread.start()
+
+    def stop(self):
+        self.stopEvent.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+        self.recording.close()
+
+    def play(self):
+        for chunk in paced(self.recording, self.speed, self.stopEvent):
+            if chunk.direction == FROM_BOARD:
+                self.feed(chunk.data)
+        self.finish()
@@ -0,0 +1,35 @@
+from .port import BufferedPort
+from .sim import Simulator
+
+"""
+pyserial url handler for sim:// (see sim.py for the options), board registers this package with
+serial.protocol_handler_packages so board.connect("sim://?rate=20") opens a virtual stand
+"""
+
+
+class Serial(BufferedPort):
+    SCHEME = "sim"
+
+    def __init__(self, *args, **kwargs):
+        self.simulator = None
+        super().__init__(*args, **kwargs)
+
+    def parseOptions(self, location: str, options: dict):
+        self.simulator = Simulator(
+            self.feed,
+            baudrate=self._baudrate,
+            rate=int(options["rate"]) if "rate" in options else None,
+            noise=float(options.get("noise", 1.0)),
+            dropout=float(options.get("dropout", 0.0)),
+            speed=float(options.get("speed", 1.0)),
+            seed=int(options["seed"]) if "seed" in options else None
+        )
+
+    def start(self):
+        self.simulator.start()
+
+    def stop(self):
+        self.simulator.stop()
+
+    def received(self, data: bytes):
+        self.simulator.receive(data)
@@ -0,0 +1,55 @@
+import re
+
+"""
+Streaming rate control
+    rate(<hz>): board cycles per second, 1 to MAX_RATE, acknowledged with "Rate set to <hz> Hz"
+    avg(<ms>): analog averaging window for current and voltage, 0 to MAX_AVERAGING, acknowledged with
+               "Averaging set to <ms> ms", the board shortens it to half a cycle at high rates
+
+the hx711s run at 10 samples/s unless their RATE pin is pulled high (80 samples/s), above that the load cells report n
+"""
+
+MIN_RATE = 1
+MAX_RATE = 80
+DEFAULT_RATE = 4
+
+MAX_AVERAGING = 1000
+DEFAULT_AVERAGING = 100
+
+# worst case bytes per cycle with every channel on, e.g. lc1(-1000000)\r\n and cur(-12.34)\r\n
+ASCII_CYCLE_BYTES = 2 * 16 + 2 * 13
+BINARY_CYCLE_BYTES = 27
+
+# fraction of the link the data stream may use, the rest is left for acknowledgements and console messages
+LINK_HEADROOM = 0.8
+
+RATE_ACK = re.compile(r"Rate set to (\d+) Hz")
+AVERAGING_ACK = re.compile(r"Averaging set to (\d+) ms")
+
+
+def cycleBytes(binary: bool = False) -> int:
+    return BINARY_CYCLE_BYTES if binary else ASCII_CYCLE_BYTES
+
+
+def maxRate(baudrate: int, binary: bool = False) -> int:
+    """
+    Highest rate in Hz the link can carry at the given baudrate (8N1, 10 bits per byte)
+    """
+    bytesPerSecond = baudrate / 10 * LINK_HEADROOM
+    return max(MIN_RATE, min(MAX_RATE, int(bytesPerSecond // cycleBytes(binary))))
+
+
+def parseRateAck(line: str):
+    """
+    Returns the rate from a "Rate set to <hz> Hz" line, None for anything else
+    """
+    match = RATE_ACK.match(line)
+    return int(match.group(1)) if match else None
+
+
+def parseAveragingAck(line: str):
+    """
+    Returns the window from an "Averaging set to <ms> ms" line, None for anything else
+    """
+    match = AVERAGING_ACK.match(line)
+    return int(match.group(1)) if match else None
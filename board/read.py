@@ -2,6 +2,8 @@ import re
 
 from PyQt5.QtCore import pyqtSignal, QObject
 
+from .decode import Decoder
+
 
 def parseLong(line):
     """
@@ -24,45 +26,32 @@ def parseFloat(line):
     return None
 
 
-class SerialReader(QObject):
-    cell1 = 0
-    cell2 = 0
-    voltage = 0
-    current = 0
-
+class SerialReader(Decoder, QObject):
     cell1Received = pyqtSignal(int)
     cell2Received = pyqtSignal(int)
     currentReceived = pyqtSignal(float)
     voltageReceived = pyqtSignal(float)
 
+    # one Frame per board cycle, and optionally numpy blocks of frames (see setBatchInterval)
+    frameReceived = pyqtSignal(object)
+    framesReceived = pyqtSignal(object)
+
+    # ack.PendingAck of commands the board answered (or rejected), and of those it never did
+    commandAcked = pyqtSignal(object)
+    commandTimedOut = pyqtSignal(object)
+
     def __init__(self, offsetDict):
-        super().__init__()
+        QObject.__init__(self)
+        Decoder.__init__(self, offsetDict)
+
+        # indexed by channel, same order as frame.CHANNELS
+        self.channelSignals = (self.cell1Received, self.cell2Received, self.currentReceived, self.voltageReceived)
 
-        self.offsetDict = offsetDict
+    def valueDecoded(self, index, value):
+        self.channelSignals[index].emit(value)
 
-    def decode(self, line: str):
-        """
-        Decodes a single line of serial input and updates config values.
-        Expected formats:
-        - lc1(<long>|n)
-        - lc2(<long>|n)
-        - cur(<float>)
-        - vtg(<float>)
-        """
-        if line.startswith("lc1("):
-            self.cell1 = parseLong(line)
-            if self.cell1 is not None:
-                self.cell1Received.emit(self.cell1 - self.offsetDict["cell1"])
-        elif line.startswith("lc2("):
-            self.cell2 = parseLong(line)
-            if self.cell2 is not None:
-                self.cell2Received.emit(self.cell2 - self.offsetDict["cell2"])
-        elif line.startswith("cur("):
-            self.current = parseFloat(line)
-            if self.current is not None:
-                self.currentReceived.emit(round(self.current - self.offsetDict["current"], 2))
-        elif line.startswith("vtg("):
-            self.voltage = parseFloat(line)
-            if self.voltage is not None:
-                self.voltageReceived.emit(round(self.voltage - self.offsetDict["voltage"], 2))
+    def frameDecoded(self, frame):
+        self.frameReceived.emit(frame)
 
+    def blockDecoded(self, block):
+        self.framesReceived.emit(block)
@@ -0,0 +1,168 @@
+import struct
+import threading
+import time
+
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from . import acquire
+
+"""
+Raw serial recordings
+
+Recorder captures every chunk read off the port (and every command written to it) with the host time it was read, so a
+run can be replayed byte for byte later, either
+    replay:///path/to/run.tsraw?speed=2   through board.connect() (protocol_replay.py), the gui sees a live board
+    replay(path, reader, speed=0)         headless, straight into a SerialReader with the recorded timestamps
+
+speed: 1 replays in real time, N replays N times faster, 0 replays as fast as possible
+
+file layout, little endian:
+    header: magic, baudrate uint32, wall clock start int64 (time.time_ns), host start int64 (time.monotonic_ns)
+    record: host ns since start int64, direction uint8, length uint32, followed by length bytes
+"""
+
+MAGIC = b"TSRAW\x01"
+HEADER = struct.Struct("<6sIqq")
+RECORD = struct.Struct("<qBI")
+EXTENSION = ".tsraw"
+
+# record directions
+FROM_BOARD = 0
+TO_BOARD = 1
+
+
+class Chunk(NamedTuple):
+    timestamp: int  # host time.monotonic_ns() of the recording session
+    direction: int
+    data: bytes
+
+
+class Recorder:
+    """
+    Appends raw chunks to a recording, safe to share between the reading and the command thread
+    """
+    def __init__(self, path: str, baudrate: int = 9600):
+        self.path = path
+        self.file = open(path, "wb")
+        self.start = time.monotonic_ns()
+        self.file.write(HEADER.pack(MAGIC, baudrate, time.time_ns(), self.start))
+        self.lock = threading.Lock()
+        self.bytes = 0
+
+    def write(self, data: bytes, timestamp: Optional[int] = None, direction: int = FROM_BOARD):
+        """
+        timestamp: host time.monotonic_ns() the data was read or written, defaults to now
+        """
+        if not data:
+            return
+        if timestamp is None:
+            timestamp = time.monotonic_ns()
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(RECORD.pack(timestamp - self.start, direction, len(data)))
+            self.file.write(data)
+            self.bytes += len(data)
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Recording:
+    """
+    Reads a recording back, iterating yields Chunks in the order they were recorded
+    raises ValueError if the file isn't a recording
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        header = self.file.read(HEADER.size)
+        if len(header) < HEADER.size or not header.startswith(MAGIC):
+            self.file.close()
+            raise ValueError(f"{path} is not a raw serial recording")
+        _, self.baudrate, self.wallStart, self.start = HEADER.unpack(header)
+
+    def __iter__(self) -> Iterator[Chunk]:
+        self.file.seek(HEADER.size)
+        read = self.file.read
+        while True:
+            record = read(RECORD.size)
+            if len(record) < RECORD.size:
+                # end of file, or a recording that was cut off mid record
+                return
+            offset, direction, length = RECORD.unpack(record)
+            data = read(length)
+            if len(data) < length:
+                return
+            yield Chunk(self.start + offset, direction, data)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def paced(chunks: Iterable[Chunk], speed: float = 1.0, stopEvent: Optional[threading.Event] = None) -> Iterator[Chunk]:
+    """
+    Yields the chunks at the pace they were recorded, divided by speed, 0 doesn't wait at all
+    stopEvent: ends the replay early when set
+    """
+    wallStart = None
+    recordStart = 0
+    for chunk in chunks:
+        if stopEvent is not None and stopEvent.is_set():
+            return
+        if speed > 0:
+            if wallStart is None:
+                wallStart = time.monotonic_ns()
+                recordStart = chunk.timestamp
+            delay = (wallStart + (chunk.timestamp - recordStart) / speed - time.monotonic_ns()) / 1e9
+            if delay > 0:
+                if stopEvent is None:
+                    time.sleep(delay)
+                elif stopEvent.wait(delay):
+                    return
+        yield chunk
+
+
+def replay(path: str, reader, speed: float = 0.0, bufferSize: int = 4096) -> dict:
+    """
+    Decodes a recording into a decode.Decoder (e.g. read.SerialReader) without a port, values keep the timestamps
+    they were recorded with so the same file always produces the same frames
+    returns line, binary frame and chunk counts
+    """
+    stream = acquire.StreamReader(None, bufferSize)
+    lineCount = 0
+    frameCount = 0
+    chunkCount = 0
+    with Recording(path) as recording:
+        for chunk in paced(recording, speed):
+            if chunk.direction != FROM_BOARD:
+                continue
+            chunkCount += 1
+            view = memoryview(chunk.data)
+            while view:
+                free = stream.makeRoom()
+                stream.push(view[:free])
+                view = view[free:]
+                stream.readTime = chunk.timestamp
+
+                lines, frames = stream.parse()
+                for line in lines:
+                    reader.decode(line, chunk.timestamp)
+                for frame in frames:
+                    reader.decodeBinary(frame, chunk.timestamp)
+                lineCount += len(lines)
+                frameCount += len(frames)
+    return {"chunks": chunkCount, "lines": lineCount, "frames": frameCount}
@@ -0,0 +1,285 @@
+import mmap
+import struct
+import threading
+import time
+
+import numpy as np
+
+from . import rate
+from .frame import CHANNELS, Frame
+
+"""
+Ring log, a fixed size memory mapped file holding the last hours of frames of a session
+
+made for endurance runs: the file is sized once (capacity frames) and the oldest frames are overwritten, so a burn-in
+can run for days in constant memory and disk, and any other process can map the same file and read it zero copy
+    ring = RingReader("burnin.tsring")
+    block = ring.lastSeconds(3600)    # the last hour as a FRAME_DTYPE block
+
+file layout, little endian, one array per column (struct of arrays) so a query only touches the columns and pages it
+needs:
+    header (HEADER_SIZE bytes): magic, version uint32, column count uint32, capacity uint64, written uint64,
+                                wall clock start int64 (time.time_ns), host start int64 (time.monotonic_ns),
+                                reserved uint64
+    then for each column of RING_DTYPE in order: capacity values
+
+written counts every frame ever appended, the write cursor is written % capacity, it is only bumped after the frame is
+in place so a reader never sees a half written frame, reserved is bumped to written + the frames about to be written
+before the writer touches their slots, so the frames before reserved - capacity may be half overwritten, readers skip
+them and check reserved again after copying to drop anything the writer overwrote meanwhile
+frames are stored as the session sees them (offsets subtracted and calibrated), missing values are nan, seq and millis
+are -1 without board time
+"""
+
+MAGIC = b"TSRING\x01\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQqqQ")
+# page aligned, so every column starts aligned too
+HEADER_SIZE = 4096
+EXTENSION = ".tsring"
+
+RING_DTYPE = np.dtype([
+    ("timestamp", np.int64),
+    ("cell1", np.float64),
+    ("cell2", np.float64),
+    ("current", np.float64),
+    ("voltage", np.float64),
+    ("seq", np.int64),
+    ("millis", np.int64)
+])
+
+# offset of the written counter in the header
+WRITTEN_OFFSET = struct.calcsize("<8sIIQ")
+# and of the reserved counter
+RESERVED_OFFSET = struct.calcsize("<8sIIQQqq")
+
+# seconds between flushes of the mapping to disk, the page cache already shares it with readers
+FLUSH_INTERVAL = 5.0
+
+
+def capacityFor(hours: float, hz: int = rate.MAX_RATE) -> int:
+    """
+    Frames needed to keep the given hours at the given rate
+    """
+    return max(1, int(hours * 3600 * hz))
+
+
+def fileSize(capacity: int) -> int:
+    return HEADER_SIZE + capacity * RING_DTYPE.itemsize
+
+
+def mapColumns(buffer, capacity: int) -> dict:
+    columns = {}
+    offset = HEADER_SIZE
+    for name in RING_DTYPE.names:
+        dtype = RING_DTYPE.fields[name][0]
+        columns[name] = np.frombuffer(buffer, dtype=dtype, count=capacity, offset=offset)
+        offset += capacity * dtype.itemsize
+    return columns
+
+
+class RingLog:
+    """
+    The writing side, one per file, append from one thread (the session's reading thread), close from any
+    """
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        self.capacity = capacity
+        self.written = 0
+
+        with open(path, "wb") as f:
+            f.truncate(fileSize(capacity))
+            f.write(HEADER.pack(MAGIC, VERSION, len(RING_DTYPE.names), capacity, 0, time.time_ns(),
+                                time.monotonic_ns(), 0))
+        self.file = open(path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), fileSize(capacity))
+        self.columns = mapColumns(self.map, capacity)
+        self.writtenView = np.frombuffer(self.map, dtype=np.uint64, count=1, offset=WRITTEN_OFFSET)
+        self.reservedView = np.frombuffer(self.map, dtype=np.uint64, count=1, offset=RESERVED_OFFSET)
+        self.lastFlush = time.monotonic()
+        # the mapping can't be closed while a write holds views into it
+        self.lock = threading.Lock()
+
+    @classmethod
+    def forHours(cls, path: str, hours: float, hz: int = rate.MAX_RATE):
+        return cls(path, capacityFor(hours, hz))
+
+    def append(self, frame: Frame):
+        with self.lock:
+            columns = self.columns
+            if not columns:
+                return
+            index = self.written % self.capacity
+            self.reserve(1)
+            columns["timestamp"][index] = frame.timestamp
+            for name, value in zip(CHANNELS, frame[1:len(CHANNELS) + 1]):
+                columns[name][index] = np.nan if value is None else value
+            columns["seq"][index] = -1 if frame.seq is None else frame.seq
+            columns["millis"][index] = -1 if frame.millis is None else frame.millis
+            self.commit(1)
+
+    def appendBlock(self, block: np.ndarray):
+        """
+        Appends a block of frame.FRAME_DTYPE or RING_DTYPE in at most two slices, fields it doesn't have are -1
+        """
+        with self.lock:
+            if not self.columns:
+                return
+            if len(block) > self.capacity:
+                # only the newest capacity frames would survive anyway
+                self.written += len(block) - self.capacity
+                block = block[-self.capacity:]
+            start = self.written % self.capacity
+            first = min(len(block), self.capacity - start)
+            self.reserve(len(block))
+            for name, column in self.columns.items():
+                values = block[name] if name in block.dtype.names else -1
+                if np.ndim(values):
+                    column[start:start + first] = values[:first]
+                    column[:len(block) - first] = values[first:]
+                else:
+                    column[start:start + first] = values
+                    column[:len(block) - first] = values
+            self.commit(len(block))
+
+    def reserve(self, count: int):
+        """
+        Tells readers the next count slots are about to be overwritten
+        """
+        self.reservedView[0] = self.written + count
+
+    def commit(self, count: int):
+        self.written += count
+        self.writtenView[0] = self.written
+        now = time.monotonic()
+        if now - self.lastFlush >= FLUSH_INTERVAL:
+            self.map.flush()
+            self.lastFlush = now
+
+    def close(self):
+        with self.lock:
+            if self.map.closed:
+                return
+            # the numpy views keep the mapping alive, drop them first
+            self.columns = {}
+            self.writtenView = None
+            self.reservedView = None
+            self.map.flush()
+            self.map.close()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RingReader:
+    """
+    The reading side, any number of them in any process, while the log is being written or after
+    raises ValueError if the file isn't a ring log
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.memmap = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, columnCount, self.capacity, _, self.wallStart, self.hostStart, _ = HEADER.unpack_from(
+            self.memmap)
+        if magic != MAGIC or columnCount != len(RING_DTYPE.names) or len(self.memmap) < fileSize(self.capacity):
+            raise ValueError(f"{path} is not a ring log")
+        self.columns = mapColumns(self.memmap, self.capacity)
+        self.writtenView = np.frombuffer(self.memmap, dtype=np.uint64, count=1, offset=WRITTEN_OFFSET)
+        self.reservedView = np.frombuffer(self.memmap, dtype=np.uint64, count=1, offset=RESERVED_OFFSET)
+
+    @property
+    def written(self) -> int:
+        return int(self.writtenView[0])
+
+    @property
+    def oldest(self) -> int:
+        """
+        Position of the oldest frame the writer can't be overwriting right now, read after written
+        """
+        return max(int(self.reservedView[0]), self.written) - self.capacity
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    def toWallTime(self, timestamp):
+        """
+        Host monotonic ns of the writing machine to wall clock ns (time.time_ns)
+        """
+        return timestamp - self.hostStart + self.wallStart
+
+    def read(self, first: int, last: int) -> np.ndarray:
+        """
+        Frames first up to last (counted since the log was created) as a new RING_DTYPE block, frames that are no longer
+        in the ring are left out
+        """
+        written = self.written
+        first = max(first, self.oldest, 0)
+        last = min(last, written)
+        block = self.copy(first, last)
+        # anything the writer overwrote (or started to) while copying is stale
+        stale = self.oldest - first
+        return block[stale:] if stale > 0 else block
+
+    def copy(self, first: int, last: int) -> np.ndarray:
+        block = np.empty(max(0, last - first), dtype=RING_DTYPE)
+        if not len(block):
+            return block
+        start = first % self.capacity
+        end = start + len(block)
+        for name, column in self.columns.items():
+            if end <= self.capacity:
+                block[name] = column[start:end]
+            else:
+                split = self.capacity - start
+                block[name][:split] = column[start:]
+                block[name][split:] = column[:end - self.capacity]
+        return block
+
+    def latest(self, count: int) -> np.ndarray:
+        written = self.written
+        return self.read(written - count, written)
+
+    def find(self, timestamp: int) -> int:
+        """
+        Position (counted since the log was created) of the first frame at or after the host time timestamp, only the
+        timestamp column is searched, in place
+        """
+        written = self.written
+        first = min(max(0, self.oldest), written)
+        if written == first:
+            return written
+        timestamps = self.columns["timestamp"]
+        start = first % self.capacity
+        # the ring in write order is at most two sorted slices
+        if start + (written - first) <= self.capacity:
+            return first + int(np.searchsorted(timestamps[start:start + written - first], timestamp))
+        older = timestamps[start:]
+        if timestamp <= older[-1]:
+            return first + int(np.searchsorted(older, timestamp))
+        return first + len(older) + int(np.searchsorted(timestamps[:written % self.capacity], timestamp))
+
+    def between(self, start: int, end: int) -> np.ndarray:
+        """
+        Frames with host timestamps in [start, end)
+        """
+        return self.read(self.find(start), self.find(end))
+
+    def lastSeconds(self, seconds: float) -> np.ndarray:
+        """
+        Frames of the last seconds before the newest one
+        """
+        newest = self.latest(1)
+        if not len(newest):
+            return newest
+        end = int(newest["timestamp"][0])
+        return self.read(self.find(end - round(seconds * 1e9)), self.written)
+
+    def close(self):
+        self.columns = {}
+        self.writtenView = None
+        self.reservedView = None
+        self.memmap = None
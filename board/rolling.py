@@ -0,0 +1,160 @@
+import math
+import threading
+
+from collections import deque
+from typing import NamedTuple, Optional
+
+from .frame import CHANNELS, Frame
+
+"""
+Rolling statistics of every channel over a window of the latest samples, so a saved point is an average instead of a
+single noisy reading
+
+the window is the last `samples` values or the values of the last `ms` milliseconds (host time, measured back from the
+channel's newest value, so a channel that goes quiet keeps its last window like snapshots keep the last value)
+mean and variance are updated with Welford's method as samples enter and leave the window, min and max with monotonic
+queues, so every sample costs O(1) whatever the window size
+"""
+
+DEFAULT_WINDOW_MS = 250
+
+# samples between exact recomputations of the running sums, keeps rounding errors from piling up over long runs
+RESYNC_INTERVAL = 100_000
+
+
+class Stats(NamedTuple):
+    count: int
+    mean: Optional[float]
+    # sample standard deviation, 0 for a single value
+    std: Optional[float]
+    min: Optional[float]
+    max: Optional[float]
+
+
+EMPTY = Stats(0, None, None, None, None)
+
+
+class RollingStats:
+    """
+    One channel, not thread safe, see RollingStore
+    """
+    def __init__(self, samples: Optional[int] = None, ms: Optional[float] = None):
+        """
+        samples / ms: the window, give at most one of them, DEFAULT_WINDOW_MS when neither is given
+        """
+        if samples is None and ms is None:
+            ms = DEFAULT_WINDOW_MS
+        if (samples is None) == (ms is None):
+            raise ValueError("give the window in either samples or ms")
+        if (samples is not None and samples < 1) or (ms is not None and ms <= 0):
+            raise ValueError("the window must be at least one sample long")
+        self.samples = samples
+        self.windowNs = None if ms is None else round(ms * 1_000_000)
+        self.values = deque()
+        self.times = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        # (sample number, value), increasing / decreasing values from the oldest, the front is the window's min / max
+        self.lows = deque()
+        self.highs = deque()
+        self.added = 0
+
+    def add(self, value: float, timestamp: int):
+        self.values.append(value)
+        self.times.append(timestamp)
+        count = len(self.values)
+        delta = value - self.mean
+        self.mean += delta / count
+        self.m2 += delta * (value - self.mean)
+
+        while self.lows and self.lows[-1][1] >= value:
+            self.lows.pop()
+        self.lows.append((self.added, value))
+        while self.highs and self.highs[-1][1] <= value:
+            self.highs.pop()
+        self.highs.append((self.added, value))
+        self.added += 1
+
+        while (len(self.values) > 1 and
+               ((self.samples is not None and len(self.values) > self.samples) or
+                (self.windowNs is not None and timestamp - self.times[0] > self.windowNs))):
+            self.removeOldest()
+        if self.added % RESYNC_INTERVAL == 0:
+            self.resync()
+
+    def removeOldest(self):
+        oldest = self.added - len(self.values)
+        value = self.values.popleft()
+        self.times.popleft()
+        count = len(self.values)
+        delta = value - self.mean
+        self.mean -= delta / count
+        self.m2 = max(0.0, self.m2 - delta * (value - self.mean))
+        if self.lows[0][0] == oldest:
+            self.lows.popleft()
+        if self.highs[0][0] == oldest:
+            self.highs.popleft()
+
+    def resync(self):
+        count = len(self.values)
+        self.mean = math.fsum(self.values) / count
+        self.m2 = math.fsum((value - self.mean) ** 2 for value in self.values)
+
+    def stats(self) -> Stats:
+        count = len(self.values)
+        if not count:
+            return EMPTY
+        std = math.sqrt(self.m2 / (count - 1)) if count > 1 else 0.0
+        return Stats(count, self.mean, std, self.lows[0][1], self.highs[0][1])
+
+    def clear(self):
+        self.values.clear()
+        self.times.clear()
+        self.lows.clear()
+        self.highs.clear()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.added = 0
+
+
+class RollingStore:
+    """
+    Every channel of a session, updated by the reading thread, read from any thread
+    """
+    def __init__(self, samples: Optional[int] = None, ms: Optional[float] = None):
+        """
+        samples / ms: the window, DEFAULT_WINDOW_MS when neither is given
+        """
+        self.lock = threading.Lock()
+        self.setWindow(samples, ms)
+
+    def setWindow(self, samples: Optional[int] = None, ms: Optional[float] = None):
+        """
+        Starts over with a window of samples values or ms milliseconds, DEFAULT_WINDOW_MS when neither is given,
+        raises ValueError if both are
+        """
+        if samples is None and ms is None:
+            ms = DEFAULT_WINDOW_MS
+        channels = {channel: RollingStats(samples, ms) for channel in CHANNELS}
+        with self.lock:
+            self.samples = samples
+            self.ms = ms
+            self.channels = channels
+
+    def update(self, frame: Frame):
+        with self.lock:
+            for channel, value in zip(CHANNELS, frame[1:len(CHANNELS) + 1]):
+                if value is not None:
+                    self.channels[channel].add(value, frame.timestamp)
+
+    def summary(self) -> dict:
+        """
+        Stats of every channel by name, taken together
+        """
+        with self.lock:
+            return {channel: stats.stats() for channel, stats in self.channels.items()}
+
+    def clear(self):
+        with self.lock:
+            for stats in self.channels.values():
+                stats.clear()
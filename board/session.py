@@ -0,0 +1,74 @@
+from typing import Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal, Qt
+
+from . import read
+from .headless import HeadlessSession
+
+"""
+One thrust stand: its port, reader, offsets and latest values
+
+every stand runs its own acquisition loop (getLines on its own thread, see ui/connect.py) and its own command writer,
+reads block in the serial driver without holding the gil, so stands don't take turns and an idle one costs nothing
+
+SignalRouter re-emits the signals of whichever session is active, that's what the board module exposes
+"""
+
+
+class BoardSession(HeadlessSession):
+    """
+    HeadlessSession with pyqt signals
+    """
+    def __init__(self, name: str):
+        super().__init__(name)
+
+        self.cell1Received = self.reader.cell1Received
+        self.cell2Received = self.reader.cell2Received
+        self.currentReceived = self.reader.currentReceived
+        self.voltageReceived = self.reader.voltageReceived
+        self.frameReceived = self.reader.frameReceived
+        self.framesReceived = self.reader.framesReceived
+        self.commandAcked = self.reader.commandAcked
+        self.commandTimedOut = self.reader.commandTimedOut
+
+        # called from the reading thread, a queued connection would make the latest values lag behind the gui
+        self.frameReceived.connect(self.updateFrame, Qt.DirectConnection)
+
+    def makeReader(self):
+        return read.SerialReader(self.offsetDict)
+
+    def ackReceived(self, pending):
+        self.commandAcked.emit(pending)
+
+    def ackTimedOut(self, pending):
+        self.commandTimedOut.emit(pending)
+
+
+class SignalRouter(QObject):
+    """
+    Carries the signals of the active session, switching sessions moves every connection along with it
+    """
+    cell1Received = pyqtSignal(int)
+    cell2Received = pyqtSignal(int)
+    currentReceived = pyqtSignal(float)
+    voltageReceived = pyqtSignal(float)
+    frameReceived = pyqtSignal(object)
+    framesReceived = pyqtSignal(object)
+    commandAcked = pyqtSignal(object)
+    commandTimedOut = pyqtSignal(object)
+
+    SIGNALS = ("cell1Received", "cell2Received", "currentReceived", "voltageReceived", "frameReceived",
+               "framesReceived", "commandAcked", "commandTimedOut")
+
+    def __init__(self):
+        super().__init__()
+        self.session: Optional[BoardSession] = None
+
+    def follow(self, session: BoardSession):
+        if self.session is not None:
+            for name in self.SIGNALS:
+                getattr(self.session, name).disconnect(getattr(self, name))
+        self.session = session
+        # direct, so every receiver gets the same connection type it would get connecting to the session itself
+        for name in self.SIGNALS:
+            getattr(session, name).connect(getattr(self, name), Qt.DirectConnection)
@@ -0,0 +1,195 @@
+import math
+import os
+import random
+import select
+import threading
+import time
+
+from typing import Callable, Optional
+
+from .firmware import FirmwareModel
+
+"""
+Virtual thrust stand
+
+SimulatedFirmware is the firmware model (firmware.py) with a motor on it, Simulator runs it against the wall clock and
+hands its output to a callback, and the stand is reachable either as
+    sim://?rate=20&noise=1&dropout=0.05&speed=1&seed=0   through board.connect() (protocol_sim.py), any platform
+    PtySimulator().port                                 a real /dev/pts/N for other programs, linux/macos only
+
+options:
+    rate: initial data rate in Hz (the host can still change it with rate(<hz>))
+    noise: noise scale, 1 is roughly what the real stand shows
+    dropout: probability that a load cell reports n on top of the hx711 conversion rate
+    speed: 1 runs in real time, N runs N times faster, 0 runs as fast as possible
+    seed: random seed for reproducible runs
+"""
+
+
+class MotorModel:
+    """
+    Motor + prop on the stand
+    steady state thrust and torque grow with speed squared, current with speed cubed (prop load), the motor follows
+    throttle changes with a first order lag and the battery sags under load
+    """
+    def __init__(self):
+        self.maxThrust = 2000.0  # grams on load cell 1 at full throttle
+        self.maxTorque = 300.0  # grams on load cell 2 (torque arm) at full throttle
+        self.idleCurrent = 0.3
+        self.maxCurrent = 40.0
+        self.batteryVoltage = 16.8
+        self.internalResistance = 0.02
+        self.timeConstant = 150.0  # ms
+
+        # fraction of full speed
+        self.speed = 0.0
+
+    def step(self, throttle: float, dtMs: float):
+        target = max(0.0, min(100.0, throttle)) / 100
+        self.speed += (target - self.speed) * (1 - math.exp(-dtMs / self.timeConstant))
+
+    @property
+    def thrust(self) -> float:
+        return self.maxThrust * self.speed ** 2
+
+    @property
+    def torque(self) -> float:
+        return self.maxTorque * self.speed ** 2
+
+    @property
+    def current(self) -> float:
+        return self.idleCurrent + (self.maxCurrent - self.idleCurrent) * self.speed ** 3
+
+    @property
+    def voltage(self) -> float:
+        return self.batteryVoltage - self.internalResistance * self.current
+
+
+class SimulatedFirmware(FirmwareModel):
+    def __init__(self, baudrate: int = 9600, noise: float = 1.0, dropout: float = 0.0, seed: Optional[int] = None):
+        super().__init__(baudrate)
+        self.motor = MotorModel()
+        self.noise = noise
+        self.dropout = dropout
+        self.random = random.Random(seed)
+
+        # the stand's hx711s run with RATE pulled high
+        self.loadCellRate = 80
+        self.lastSample = 0.0
+
+    def sample(self):
+        throttle = 0 if self.stopped else self.throttle
+        self.motor.step(throttle, self.millis - self.lastSample)
+        self.lastSample = self.millis
+
+        gauss = self.random.gauss
+        # the hx711 readings are longs
+        cell1 = round(self.motor.thrust + gauss(0, 2.0 * self.noise))
+        cell2 = round(self.motor.torque + gauss(0, 1.0 * self.noise))
+        current = max(0.0, self.motor.current + gauss(0, 0.05 * self.noise))
+        voltage = self.motor.voltage + gauss(0, 0.02 * self.noise)
+
+        if self.dropout and self.random.random() < self.dropout:
+            cell1 = None
+        if self.dropout and self.random.random() < self.dropout:
+            cell2 = None
+        return cell1, cell2, current, voltage
+
+
+class Simulator:
+    """
+    Runs a SimulatedFirmware against the wall clock on its own thread
+    output: called with every chunk the board writes
+    """
+    def __init__(self, output: Callable[[bytes], None], baudrate: int = 9600, rate: Optional[int] = None,
+                 noise: float = 1.0, dropout: float = 0.0, speed: float = 1.0, seed: Optional[int] = None):
+        self.output = output
+        self.speed = speed
+        self.firmware = SimulatedFirmware(baudrate, noise, dropout, seed)
+        if rate is not None:
+            self.firmware.rate = rate
+
+        self.lock = threading.Lock()
+        self.stopEvent = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.stopEvent.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True, name="thrust stand simulator")
+        self.thread.start()
+
+    def stop(self):
+        self.stopEvent.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    def receive(self, data: bytes):
+        # the sketch serves commands between cycles, so acknowledgements don't wait for the next cycle
+        with self.lock:
+            self.firmware.receive(data)
+            output = self.firmware.serviceCommands()
+        if output:
+            self.output(output)
+
+    def run(self):
+        with self.lock:
+            self.output(self.firmware.setup())
+            boardStart = self.firmware.millis
+        wallStart = time.monotonic()
+
+        while not self.stopEvent.is_set():
+            with self.lock:
+                data = self.firmware.loop()
+                boardElapsed = (self.firmware.millis - boardStart) / 1000
+            if data:
+                self.output(data)
+
+            if self.speed > 0:
+                delay = wallStart + boardElapsed / self.speed - time.monotonic()
+                if delay > 0:
+                    self.stopEvent.wait(delay)
+
+
+class PtySimulator:
+    """
+    Simulator behind a pseudo terminal, port is the device name to open (linux/macos only)
+    """
+    def __init__(self, **kwargs):
+        import tty
+
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.simulator = Simulator(self.write, **kwargs)
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.running = True
+        self.simulator.start()
+        self.thread = threading.Thread(target=self.readCommands, daemon=True, name="pty simulator commands")
+        self.thread.start()
+        return self.port
+
+    def stop(self):
+        self.running = False
+        self.simulator.stop()
+        if self.thread is not None:
+            self.thread.join()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def write(self, data: bytes):
+        view = memoryview(data)
+        while view and self.running:
+            # nobody has to be reading the other end, don't block stop() on a full pty
+            _, writable, _ = select.select([], [self.master], [], 0.1)
+            if writable:
+                view = view[os.write(self.master, view):]
+
+    def readCommands(self):
+        while self.running:
+            ready, _, _ = select.select([self.master], [], [], 0.1)
+            if ready:
+                self.simulator.receive(os.read(self.master, 1024))
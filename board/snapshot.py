@@ -0,0 +1,85 @@
+import threading
+import time
+
+from typing import NamedTuple, Optional
+
+from .frame import CHANNELS, Frame
+
+"""
+Latest values of a session as one immutable Snapshot
+
+the reading thread replaces the snapshot once per frame, readers on any thread get a consistent set of values with
+latest() without taking a lock, and waitForFresh() blocks a script thread (never the gui) until every channel has been
+measured after a given moment, e.g. after the throttle settled
+"""
+
+
+class Snapshot(NamedTuple):
+    cell1: Optional[int]
+    cell2: Optional[int]
+    current: Optional[float]
+    voltage: Optional[float]
+    # host time.monotonic_ns() each value was read, 0 if never
+    timestamps: tuple
+    # how many values each channel has received, lets readers tell a repeat from a new value
+    sequences: tuple
+    # frames received, and the host time of the latest one
+    frameSeq: int = 0
+    timestamp: int = 0
+
+    def value(self, channel: str):
+        return self[CHANNELS.index(channel)]
+
+    def oldest(self, channels=CHANNELS) -> int:
+        """
+        Host time of the stalest of the given channels
+        """
+        return min(self.timestamps[CHANNELS.index(channel)] for channel in channels)
+
+
+EMPTY = Snapshot(None, None, None, None, (0,) * len(CHANNELS), (0,) * len(CHANNELS))
+
+
+class SnapshotStore:
+    def __init__(self):
+        self.snapshot = EMPTY
+        self.condition = threading.Condition()
+
+    def update(self, frame: Frame):
+        """
+        Called by the reading thread for every frame, channels the board didn't report keep their last value
+        """
+        with self.condition:
+            current = self.snapshot
+            values = list(current[:len(CHANNELS)])
+            timestamps = list(current.timestamps)
+            sequences = list(current.sequences)
+            for index, value in enumerate(frame[1:len(CHANNELS) + 1]):
+                if value is not None:
+                    values[index] = value
+                    timestamps[index] = frame.timestamp
+                    sequences[index] += 1
+            self.snapshot = Snapshot(*values, tuple(timestamps), tuple(sequences), current.frameSeq + 1,
+                                     frame.timestamp)
+            self.condition.notify_all()
+
+    def latest(self) -> Snapshot:
+        # replaced as a whole, so reading the reference is atomic
+        return self.snapshot
+
+    def waitForFresh(self, after: Optional[int] = None, timeout: Optional[float] = None,
+                     channels=CHANNELS) -> Optional[Snapshot]:
+        """
+        Blocks until every channel in channels holds a value read after the host time after (time.monotonic_ns(),
+        defaults to now), returns that snapshot, or None if timeout seconds pass first
+        """
+        if after is None:
+            after = time.monotonic_ns()
+        with self.condition:
+            if self.condition.wait_for(lambda: self.snapshot.oldest(channels) > after, timeout):
+                return self.snapshot
+            return None
+
+    def clear(self):
+        with self.condition:
+            self.snapshot = EMPTY
@@ -0,0 +1,154 @@
+"""
+Board sequence counters and board clock alignment
+
+the firmware stamps every cycle with a 16 bit sequence number and its millis(), as part of the binary frame or as a
+tms(<seq>,<millis>) line in front of each ascii cycle once tms(1) was sent
+SequenceTracker counts dropped, duplicated and out of order cycles, ClockSync fits host time against board time to
+estimate the offset and drift between the two clocks
+"""
+
+SEQUENCE_MODULUS = 1 << 16
+# a sequence number further behind than this is a board reset rather than a late cycle
+RESYNC_DISTANCE = 1024
+MILLIS_MODULUS = 1 << 32
+
+
+class SequenceTracker:
+    def __init__(self, modulus: int = SEQUENCE_MODULUS):
+        self.modulus = modulus
+        self.reset()
+
+    def reset(self):
+        self.expected = None
+        self.received = 0
+        self.dropped = 0
+        self.duplicates = 0
+        self.outOfOrder = 0
+        self.resyncs = 0
+
+    def add(self, seq: int) -> int:
+        """
+        Records a received sequence number, returns how many cycles were missing right before it
+        """
+        self.received += 1
+        if self.expected is None:
+            self.expected = (seq + 1) % self.modulus
+            return 0
+
+        gap = (seq - self.expected) % self.modulus
+        if gap >= self.modulus // 2:
+            # behind the expected number, either a repeat of the last one or a late one that was counted as dropped
+            behind = (self.expected - seq) % self.modulus
+            if behind == 1:
+                self.duplicates += 1
+            elif behind <= RESYNC_DISTANCE:
+                self.outOfOrder += 1
+                self.dropped = max(0, self.dropped - 1)
+            else:
+                self.resyncs += 1
+                self.expected = (seq + 1) % self.modulus
+            return 0
+
+        self.dropped += gap
+        self.expected = (seq + 1) % self.modulus
+        return gap
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "dropped": self.dropped,
+            "duplicates": self.duplicates,
+            "outOfOrder": self.outOfOrder,
+            "resyncs": self.resyncs
+        }
+
+
+class ClockSync:
+    """
+    Least squares fit of host time (monotonic ns) against board time (millis), host = offset + rate * board
+    host timestamps are taken when the bytes were read, so usb and driver latency show up as jitter around the fit
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.lastMillis = None
+        self.wraps = 0
+
+        # first pair, everything else is relative to it to keep the sums small
+        self.boardOrigin = 0
+        self.hostOrigin = 0
+
+        # welford style means and co-moments of x = board ms, y = host ms relative to the origins
+        self.meanX = 0.0
+        self.meanY = 0.0
+        self.momentXX = 0.0
+        self.momentXY = 0.0
+        self.momentYY = 0.0
+
+    def add(self, millis: int, hostNs: int):
+        # millis() wraps after ~49 days
+        if self.lastMillis is not None and millis < self.lastMillis and self.lastMillis - millis > MILLIS_MODULUS // 2:
+            self.wraps += 1
+        self.lastMillis = millis
+        boardMs = millis + self.wraps * MILLIS_MODULUS
+
+        if self.count == 0:
+            self.boardOrigin = boardMs
+            self.hostOrigin = hostNs
+
+        x = float(boardMs - self.boardOrigin)
+        y = (hostNs - self.hostOrigin) / 1e6
+        self.count += 1
+        dx = x - self.meanX
+        dy = y - self.meanY
+        self.meanX += dx / self.count
+        self.meanY += dy / self.count
+        self.momentXX += dx * (x - self.meanX)
+        self.momentXY += dx * (y - self.meanY)
+        self.momentYY += dy * (y - self.meanY)
+
+    def fit(self):
+        """
+        Returns (rate, intercept in ms) of host ms = intercept + rate * board ms, relative to the origins
+        """
+        if self.momentXX == 0:
+            return 1.0, self.meanY - self.meanX
+        rate = self.momentXY / self.momentXX
+        return rate, self.meanY - rate * self.meanX
+
+    def toHost(self, millis: int) -> int:
+        """
+        Converts a board millis() reading to host monotonic ns
+        """
+        rate, intercept = self.fit()
+        boardMs = millis + self.wraps * MILLIS_MODULUS
+        return self.hostOrigin + int((intercept + rate * (boardMs - self.boardOrigin)) * 1e6)
+
+    @property
+    def driftPpm(self) -> float:
+        """
+        How much faster the host clock runs than the board clock, in parts per million
+        """
+        return (self.fit()[0] - 1) * 1e6
+
+    @property
+    def jitterMs(self) -> float:
+        """
+        Standard deviation of the host timestamps around the fit
+        """
+        n = self.count
+        if n < 3:
+            return 0.0
+        if self.momentXX == 0:
+            return (self.momentYY / (n - 1)) ** 0.5
+        residual = self.momentYY - self.momentXY * self.momentXY / self.momentXX
+        return max(0.0, residual / (n - 2)) ** 0.5
+
+    def stats(self) -> dict:
+        return {
+            "samples": self.count,
+            "driftPpm": self.driftPpm,
+            "jitterMs": self.jitterMs
+        }
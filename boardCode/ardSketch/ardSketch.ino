@@ -5,6 +5,8 @@
 #define DOUT2 A4
 #define SCK2 A5
 #define THROTTLE 17
+#define MAX_RATE 80
+#define MAX_AVERAGING 1000
 
 #include "HX711.h"
 #include "wiring_private.h"
@@ -19,6 +21,28 @@ bool lc1 = true;
 bool lc2 = true;
 bool vtg = true;
 bool cur = true;
+bool tms = false;
+
+// binary data frames, see board/binary.py for the layout
+bool binaryMode = false;
+uint16_t frameSeq = 0;
+
+// streaming rate, see board/rate.py
+int rateHz = 4;
+int averagingMs = 100;
+unsigned long cycleStart = 0;
+
+struct __attribute__((packed)) DataFrame {
+  uint8_t sync[2];
+  uint16_t seq;
+  uint32_t millis;
+  int32_t lc1;
+  int32_t lc2;
+  float cur;
+  float vtg;
+  uint8_t flags;
+  uint16_t crc;
+};
 
 // controls
 // inf: returns board information
@@ -26,8 +50,12 @@ bool cur = true;
 // lc2(0-1): send load cell 2 data (0 = false, 1 = true)
 // vtg(0-1): send voltage data (0 = false, 1 = true)
 // cur(0-1): send current data (0 = false, 1 = true)
+// tms(0-1): send tms(<seq>,<millis>) in front of every cycle (0 = false, 1 = true), binary frames always carry both
 // thr(0-100): set esc throttle percentage (number as percentage)
-// stp: emergency stop, overrides pwm signal to low
+// rate(1-80): data cycles per second, acknowledged with "Rate set to N Hz"
+// avg(0-1000): current/voltage averaging window in ms (at most half a cycle), acknowledged with "Averaging set to N ms"
+// bin(0-1): send data as binary frames instead of text, acknowledged with "Binary mode on" / "Binary mode off"
+// stp: emergency stop, overrides pwm signal to low until the next thr(, acknowledged with "Emergency stop"
 
 // data
 // lc1, lc2: grams
@@ -75,6 +103,13 @@ void loop() {
     }
   }
 
+  // wait for the next cycle while still serving commands
+  unsigned long period = 1000 / rateHz;
+  if (millis() - cycleStart < period) {
+    return;
+  }
+  cycleStart = millis();
+
   // reads load cell 1
   long cell1Reading = 0;
   bool cell1Status = false;
@@ -93,22 +128,37 @@ void loop() {
     cell2Status = true;
   }
 
-  // reads current and voltage using an average over the last 100ms
+  // reads current and voltage using an average over the averaging window, leaving at least half the cycle to send
+  unsigned long window = min((unsigned long)averagingMs, period / 2);
   long timeStart = millis();
   int count = 0;
   double sumC = 0;
   double sumV = 0;
-  while (timeStart + 100 > millis()) {
+  do {
     int iSense = analogReadCustom(IPin);
     sumC += iSense * (5.0 / 1023.0 * 10); // refer to altium for current computations
     int vSense = analogReadCustom(VPin);
     sumV += vSense * (5.0 / 1023.0 * 6); // refer to altium for voltage computations
     count++;
-  }
+  } while (timeStart + window > millis());
   float current = sumC / count;
   float voltage = sumV / count;
 
+  if (binaryMode) {
+    sendFrame(cell1Reading, cell1Status, cell2Reading, cell2Status, current, voltage);
+    return;
+  }
+
   // writes return data according to serial communication
+  if (tms) {
+    Serial.print("tms(");
+    Serial.print(frameSeq);
+    Serial.print(",");
+    Serial.print(cycleStart);
+    Serial.println(")");
+  }
+  frameSeq++;
+
   if (lc1) {
     Serial.print("lc1(");
     if (cell1Status) {
@@ -140,15 +190,48 @@ void loop() {
     Serial.print(voltage);
     Serial.println(")");
   }
+}
 
-  delay(150);
+// crc-16/ccitt-false, same as binascii.crc_hqx(data, 0xFFFF) on the host
+uint16_t crc16(const uint8_t* data, size_t length) {
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < length; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (uint8_t bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
 }
 
-void emergencyStop() {
+void sendFrame(long cell1Reading, bool cell1Status, long cell2Reading, bool cell2Status, float current, float voltage) {
+  DataFrame frame;
+  frame.sync[0] = 0xAA;
+  frame.sync[1] = 0x55;
+  frame.seq = frameSeq++;
+  frame.millis = cycleStart;
+  frame.lc1 = cell1Reading;
+  frame.lc2 = cell2Reading;
+  frame.cur = current;
+  frame.vtg = voltage;
+  frame.flags = (lc1 && cell1Status) | (lc2 && cell2Status) << 1 | cur << 2 | vtg << 3;
+  // crc covers everything between the sync bytes and the crc itself
+  frame.crc = crc16((const uint8_t*)&frame + 2, sizeof(DataFrame) - 4);
+  Serial.write((const uint8_t*)&frame, sizeof(DataFrame));
+}
 
+void emergencyStop() {
+  // no pulses at all, the esc cuts the motor until the next thr( reattaches the signal
+  throttlePwm.detach();
+  pinMode(THROTTLE, OUTPUT);
+  digitalWrite(THROTTLE, LOW);
+  Serial.println("Emergency stop");
 }
 
 void setThrottle(int thr) {
+  if (!throttlePwm.attached()) {
+    throttlePwm.attach(THROTTLE);
+  }
   Serial.print("Throttle set to ");
   Serial.print(thr);
   Serial.println("%");
@@ -171,6 +254,8 @@ void parseCommand(const String& cmd) {
     vtg = extractBool(cmd);
   } else if (cmd.startsWith("cur(")) {
     cur = extractBool(cmd);
+  } else if (cmd.startsWith("tms(")) {
+    tms = extractBool(cmd);
   } else if (cmd.startsWith("thr(")) {
     int val = extractNumber(cmd);
     if (val >= 0 && val <= 100) {
@@ -178,6 +263,30 @@ void parseCommand(const String& cmd) {
     } else {
       Serial.println("Invalid throttle value");
     }
+  } else if (cmd.startsWith("rate(")) {
+    int val = extractNumber(cmd);
+    if (val >= 1 && val <= MAX_RATE) {
+      rateHz = val;
+      Serial.print("Rate set to ");
+      Serial.print(val);
+      Serial.println(" Hz");
+    } else {
+      Serial.println("Invalid rate value");
+    }
+  } else if (cmd.startsWith("avg(")) {
+    int val = extractNumber(cmd);
+    if (val >= 0 && val <= MAX_AVERAGING) {
+      averagingMs = val;
+      Serial.print("Averaging set to ");
+      Serial.print(val);
+      Serial.println(" ms");
+    } else {
+      Serial.println("Invalid averaging value");
+    }
+  } else if (cmd.startsWith("bin(")) {
+    // acknowledge in text before switching on, and after the last frame when switching off
+    binaryMode = extractBool(cmd);
+    Serial.println(binaryMode ? "Binary mode on" : "Binary mode off");
   } else if (cmd == "stp") {
     emergencyStop();
   } else {
@@ -5,8 +5,9 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[],
-    hiddenimports=[],
+    datas=[('autoTest/grammar.lark', 'autoTest')],
+    # only reached by name through serial.protocol_handler_packages (sim:// and replay://)
+    hiddenimports=['board.protocol_sim', 'board.protocol_replay'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
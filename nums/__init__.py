@@ -1,20 +1,179 @@
-import pandas as pd
+from typing import Optional
+
+import numpy as np
+
+from . import decimate
+from . import formats
+from .derived import compileAll
+from .sink import Sink, openSink
+
+"""
+Recorded test points
+
+Datasheet keeps one preallocated numpy array per column and doubles them when full, so adding a point costs the same
+at row 10 and at row 10^6, the pandas DataFrame is only built when something asks for it (export, analysis) and kept
+until the next point, pandas itself is only imported then
+while streaming (see sink.py) every point is also appended to a file as the test runs
+export and load pick the file format from the extension, see formats.py
+derived columns (e.g. Power = Voltage * Current, see derived.py) are columns like any other to readers, they are filled
+in for the rows added since they were last read, a whole slice at a time, and never recomputed
+"""
+
+INITIAL_CAPACITY = 1024
+
 
 class Datasheet:
-    def __init__(self, cols):
-        self.dataframe = pd.DataFrame(columns=cols)
+    def __init__(self, cols, capacity: int = INITIAL_CAPACITY, derived: dict = None):
+        """
+        derived: expressions (text or derived.Expression) by column name, computed from cols and the ones before them
+        raises ValueError if one of them is invalid
+        """
+        self.measured = list(cols)
+        self.derived = compileAll(derived or {}, self.measured)
+        self.columns = self.measured + list(self.derived)
+        self.capacity = max(1, capacity)
+        self.length = 0
+        # rows the derived columns are filled in for
+        self.derivedLength = 0
+        # missing values are nan
+        self.arrays = {col: np.full(self.capacity, np.nan) for col in self.columns}
+        # columns that only ever got ints (or nothing), exported without a trailing .0
+        self.integral = dict.fromkeys(self.columns, True)
+        self.integral.update(dict.fromkeys(self.derived, False))
+        self.dataframe = None
+        self.sink: Optional[Sink] = None
+
+    @classmethod
+    def fromColumns(cls, columns: dict, integral: dict = None):
+        """
+        A datasheet holding the given equally long arrays, integral marks the columns that hold integers
+        """
+        length = len(next(iter(columns.values()), ()))
+        datasheet = cls(columns.keys(), length)
+        for col, values in columns.items():
+            datasheet.arrays[col][:length] = values
+            datasheet.integral[col] = bool(integral.get(col, False)) if integral is not None else False
+        datasheet.length = length
+        return datasheet
+
+    def __len__(self):
+        return self.length
 
     def addPoint(self, data: dict):
         """
-        data: dictionary of values each corresponding to a column in the dataframe
+        data: dictionary of values each corresponding to a column in the dataframe, missing columns and None are nan
+        """
+        if self.length == self.capacity:
+            self.grow()
+        row = self.length
+        for col in self.measured:
+            value = data.get(col)
+            if value is None:
+                continue
+            if self.integral[col] and not isinstance(value, (int, np.integer)):
+                self.integral[col] = False
+            self.arrays[col][row] = value
+        self.length += 1
+        self.dataframe = None
+        if self.sink is not None:
+            if self.derived:
+                data = {**data, **{name: self.value(row, self.columns.index(name)) for name in self.derived}}
+            self.sink.addPoint(data)
+
+    def derive(self, name: str, expression):
+        """
+        Adds a derived column, computed for the rows so far right away, raises ValueError
+        a file being streamed to keeps the columns it was opened with
+        """
+        if name in self.arrays:
+            raise ValueError(f"there already is a column {name}")
+        compiled = compileAll({name: expression}, self.columns)[name]
+        self.derived[name] = compiled
+        self.columns.append(name)
+        self.arrays[name] = np.full(self.capacity, np.nan)
+        self.integral[name] = False
+        end = self.derivedLength
+        self.arrays[name][:end] = compiled({col: self.arrays[col][:end] for col in compiled.inputs})
+        self.dataframe = None
+
+    def updateDerived(self):
+        """
+        Fills in the derived columns for the rows added since the last call
         """
-        newRow = pd.DataFrame(data, index=[0])
-        self.dataframe = pd.concat([self.dataframe, newRow], ignore_index=True)
+        start, end = self.derivedLength, self.length
+        if start == end or not self.derived:
+            self.derivedLength = end
+            return
+        # views, so later expressions see what earlier ones just wrote
+        rows = {col: array[start:end] for col, array in self.arrays.items()}
+        for name, expression in self.derived.items():
+            rows[name][:] = expression(rows)
+        self.derivedLength = end
 
-        print(self.dataframe)
+    def streamTo(self, path: str, **kwargs) -> Sink:
+        """
+        Appends every point from now on to path (.tsdat binary, csv otherwise), kwargs go to the sink
+        """
+        self.stopStreaming()
+        self.sink = openSink(path, self.columns, **kwargs)
+        return self.sink
+
+    def stopStreaming(self):
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+
+    def grow(self):
+        self.capacity *= 2
+        for col, array in self.arrays.items():
+            grown = np.full(self.capacity, np.nan)
+            grown[:self.length] = array[:self.length]
+            self.arrays[col] = grown
+
+    def column(self, col: str) -> np.ndarray:
+        """
+        The recorded values of a column, a view that is only valid until the next addPoint
+        """
+        self.updateDerived()
+        return self.arrays[col][:self.length]
+
+    def value(self, row: int, col: int):
+        """
+        A single cell by row and column index, None if it was never set
+        """
+        name = self.columns[col]
+        if row >= self.derivedLength and name in self.derived:
+            self.updateDerived()
+        value = self.arrays[name][row]
+        if np.isnan(value):
+            return None
+        return int(value) if self.integral[name] else float(value)
+
+    def getDF(self):
+        if self.dataframe is None:
+            import pandas as pd
 
-    def getDF(self) -> pd.DataFrame:
+            self.dataframe = pd.DataFrame({
+                col: pd.array(self.column(col), dtype="Int64") if self.integral[col] else self.column(col).copy()
+                for col in self.columns
+            }, columns=self.columns)
         return self.dataframe
 
-    def export(self, filename):
-        self.dataframe.to_csv(filename, index=False)
\ No newline at end of file
+    def decimated(self, rows: int, x: str = "Time", method: str = "lttb") -> "Datasheet":
+        """
+        A copy cut down to rows rows that keeps the peaks of every column, see decimate.py
+        x: the column the others are plotted against, sample number if it isn't one of the columns
+        """
+        columns = {col: self.column(col) for col in self.columns}
+        keep = decimate.rows(columns, rows, x if x in columns else None, method)
+        return Datasheet.fromColumns({col: values[keep] for col, values in columns.items()}, self.integral)
+
+    def export(self, filename) -> str:
+        """
+        csv, parquet, arrow or npz by extension, returns the path written (.npz if pyarrow is missing)
+        """
+        return formats.export(self, filename)
+
+
+def load(filename) -> Datasheet:
+    return formats.load(filename)
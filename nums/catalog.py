@@ -0,0 +1,225 @@
+import json
+import os
+import sqlite3
+import time
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+"""
+Catalog of recorded sessions, a local SQLite database so runs can be found without opening their files
+    catalog = Catalog()
+    catalog.find(minThrottle=80, prop="APC 10x7")     # every run of that prop that went above 80% throttle
+    catalog.points(minThrottle=80, stand="stand1")    # their points, as arrays by column
+
+every finished recording (an export from the gui, a stopped stream, an autoTest run with --out) is registered with
+where it came from, a copy of its points (POINT_COLUMNS, the bulk data stays in the file at path) and any key / value
+metadata (prop, motor, notes), everything a query filters on is indexed, so lookups stay in the milliseconds however
+many sessions there are
+
+tables:
+    sessions    id, path, stand, script, started, ended (unix seconds), rows, max_throttle, max_thrust
+    points      session, row, one column per POINT_COLUMNS, NULL where a point had no value
+    metadata    session, key, value
+"""
+
+CATALOG_FILE = "sessions.db"
+
+# summarized columns of every point, by datasheet column name
+POINT_COLUMNS = ["Time", "Throttle", "Thrust", "Torque", "Voltage", "Current", "Power", "Efficiency"]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    path TEXT,
+    stand TEXT,
+    script TEXT,
+    started REAL NOT NULL,
+    ended REAL NOT NULL,
+    rows INTEGER NOT NULL,
+    max_throttle REAL,
+    max_thrust REAL
+);
+CREATE TABLE IF NOT EXISTS points (
+    session INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    row INTEGER NOT NULL,
+    {", ".join(f"{col.lower()} REAL" for col in POINT_COLUMNS)},
+    PRIMARY KEY (session, row)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS metadata (
+    session INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (session, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sessions_path ON sessions(path);
+CREATE INDEX IF NOT EXISTS sessions_started ON sessions(started);
+CREATE INDEX IF NOT EXISTS sessions_stand ON sessions(stand, started);
+CREATE INDEX IF NOT EXISTS sessions_script ON sessions(script, started);
+CREATE INDEX IF NOT EXISTS sessions_throttle ON sessions(max_throttle);
+CREATE INDEX IF NOT EXISTS points_throttle ON points(throttle);
+CREATE INDEX IF NOT EXISTS metadata_value ON metadata(key, value);
+"""
+
+
+class SessionInfo(NamedTuple):
+    id: int
+    path: Optional[str]
+    stand: Optional[str]
+    script: Optional[str]
+    started: float
+    ended: float
+    rows: int
+    maxThrottle: Optional[float]
+    maxThrust: Optional[float]
+    metadata: dict
+
+
+def toColumn(values) -> list:
+    """
+    Array to a list for sqlite, nan is NULL
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def maximum(values) -> Optional[float]:
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values) or np.isnan(values).all():
+        return None
+    return float(np.nanmax(values))
+
+
+class Catalog:
+    def __init__(self, path: str = CATALOG_FILE):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        # readers (another gui, a notebook) don't block the writer
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(SCHEMA)
+
+    def register(self, datasheet, path: str = None, stand: str = None, script: str = None, started: float = None,
+                 ended: float = None, metadata: dict = None) -> int:
+        """
+        Adds a finished recording, returns its id, a recording already registered under the same path is replaced
+        (keeping its id), so saving a file again doesn't list it twice
+        datasheet: a nums.Datasheet (or anything with columns and column()) holding what was written to path, columns
+        it doesn't have are NULL
+        path: the file holding the bulk data, stored absolute
+        started / ended: unix seconds, ended defaults to now and started to ended
+        """
+        ended = time.time() if ended is None else ended
+        started = ended if started is None else started
+        rows = len(datasheet)
+        columns = {col: datasheet.column(col) if col in datasheet.columns else np.full(rows, np.nan)
+                   for col in POINT_COLUMNS}
+
+        path = os.path.abspath(path) if path else None
+        values = (path, stand, script, started, ended, rows, maximum(columns["Throttle"]), maximum(columns["Thrust"]))
+
+        with self.connection:
+            existing = None
+            if path is not None:
+                existing = self.connection.execute("SELECT id FROM sessions WHERE path = ?", (path,)).fetchone()
+            if existing is None:
+                session = self.connection.execute(
+                    "INSERT INTO sessions (path, stand, script, started, ended, rows, max_throttle, max_thrust) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", values
+                ).lastrowid
+            else:
+                session, = existing
+                self.connection.execute(
+                    "UPDATE sessions SET path = ?, stand = ?, script = ?, started = ?, ended = ?, rows = ?, "
+                    "max_throttle = ?, max_thrust = ? WHERE id = ?", values + (session,)
+                )
+                self.connection.execute("DELETE FROM points WHERE session = ?", (session,))
+                self.connection.execute("DELETE FROM metadata WHERE session = ?", (session,))
+            self.connection.executemany(
+                f"INSERT INTO points VALUES (?, ?, {', '.join('?' * len(POINT_COLUMNS))})",
+                zip([session] * rows, range(rows), *(toColumn(values) for values in columns.values()))
+            )
+            self.connection.executemany(
+                "INSERT INTO metadata VALUES (?, ?, ?)",
+                [(session, key, str(value)) for key, value in (metadata or {}).items()]
+            )
+        return session
+
+    def remove(self, session: int):
+        """
+        Forgets a session, its file is left alone
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM sessions WHERE id = ?", (session,))
+
+    def where(self, stand=None, script=None, since=None, until=None, minThrottle=None, metadata=None):
+        """
+        WHERE clause and parameters over the sessions table (as s)
+        """
+        clauses = []
+        parameters = []
+        for clause, value in (("s.stand = ?", stand), ("s.script = ?", script), ("s.started >= ?", since),
+                              ("s.started < ?", until), ("s.max_throttle >= ?", minThrottle)):
+            if value is not None:
+                clauses.append(clause)
+                parameters.append(value)
+        for key, value in (metadata or {}).items():
+            clauses.append("EXISTS (SELECT 1 FROM metadata m WHERE m.session = s.id AND m.key = ? AND m.value = ?)")
+            parameters += [key, str(value)]
+        return " AND ".join(clauses) or "1", parameters
+
+    def find(self, stand: str = None, script: str = None, since: float = None, until: float = None,
+             minThrottle: float = None, **metadata) -> list:
+        """
+        Sessions matching every given filter, newest first
+        since / until: unix seconds the session started in
+        minThrottle: sessions that reached at least this throttle
+        metadata: key=value pairs the session was registered with, e.g. prop="APC 10x7"
+        """
+        where, parameters = self.where(stand, script, since, until, minThrottle, metadata)
+        sessions = self.connection.execute(
+            f"SELECT s.id, s.path, s.stand, s.script, s.started, s.ended, s.rows, s.max_throttle, s.max_thrust "
+            f"FROM sessions s WHERE {where} ORDER BY s.started DESC", parameters
+        ).fetchall()
+        found = {row[0]: SessionInfo(*row, {}) for row in sessions}
+        if found:
+            ids = list(found)
+            # the ids go in as a json array rather than one parameter each, sqlite caps the parameter count
+            for session, key, value in self.connection.execute(
+                    "SELECT session, key, value FROM metadata WHERE session IN (SELECT value FROM json_each(?))",
+                    (json.dumps(ids),)):
+                found[session].metadata[key] = value
+        return list(found.values())
+
+    def points(self, stand: str = None, script: str = None, since: float = None, until: float = None,
+               minThrottle: float = None, maxThrottle: float = None, **metadata) -> dict:
+        """
+        Points of the matching sessions with throttle in [minThrottle, maxThrottle], as float64 arrays by
+        POINT_COLUMNS plus "Session" and "Row", NULL is nan
+        """
+        where, parameters = self.where(stand, script, since, until, minThrottle, metadata)
+        for clause, value in (("p.throttle >= ?", minThrottle), ("p.throttle <= ?", maxThrottle)):
+            if value is not None:
+                where += f" AND {clause}"
+                parameters.append(value)
+        # with a filter on the sessions it's faster to go through their points than through the throttle index, a
+        # cross join makes sqlite go sessions first
+        narrow = metadata or any(value is not None for value in (stand, script, since, until))
+        join = "sessions s CROSS JOIN points p" if narrow else "points p JOIN sessions s"
+        rows = self.connection.execute(
+            f"SELECT p.session, p.row, {', '.join('p.' + col.lower() for col in POINT_COLUMNS)} "
+            f"FROM {join} ON s.id = p.session WHERE {where} ORDER BY s.started, p.row",
+            parameters
+        ).fetchall()
+        table = np.array(rows, dtype=np.float64).reshape(len(rows), len(POINT_COLUMNS) + 2)
+        return {col: table[:, index] for index, col in enumerate(["Session", "Row"] + POINT_COLUMNS)}
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
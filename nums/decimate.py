@@ -0,0 +1,139 @@
+import numpy as np
+
+"""
+Decimation that keeps the shape of a signal, for plotting and skimming long sessions
+
+both methods return the indices of the samples to keep (sorted, first and last always included), so any number of
+columns can be cut down by the same rows
+    minMax   the lowest and highest sample of every bucket, no spike or dip is ever lost, 2 points per bucket
+    lttb     largest triangle three buckets, one point per bucket that best keeps the visual shape
+
+everything is vectorized over buckets, so lttb can't chain bucket by bucket like the original algorithm (each point
+is chosen against the one chosen in the bucket before), instead it makes LTTB_PASSES passes over all buckets, each
+against the previous pass's choices, starting from the previous bucket's average, peaks come out the same, in flat noisy
+stretches where several points make almost the same triangle it may keep a different one of them
+nan samples (n readings) are never chosen
+"""
+
+LTTB_PASSES = 3
+
+
+def bucketEdges(n: int, buckets: int) -> np.ndarray:
+    """
+    Start of every bucket over the samples between the first and last one, plus the end of the last bucket
+    """
+    return np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+
+
+def bucketMatrix(edges: np.ndarray):
+    """
+    (buckets, longest bucket) sample indices, and which of them are inside their bucket
+    """
+    starts = edges[:-1]
+    lengths = np.diff(edges)
+    width = max(1, int(lengths.max()))
+    index = starts[:, None] + np.arange(width)
+    inside = np.arange(width) < lengths[:, None]
+    return np.minimum(index, edges[-1] - 1), inside
+
+
+def minMax(y, target: int) -> np.ndarray:
+    """
+    Indices of at most target samples, the min and max of target / 2 - 1 buckets plus the first and last sample
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    buckets = (target - 2) // 2
+    if n <= target or buckets < 1:
+        return np.arange(n)
+
+    index, inside = bucketMatrix(bucketEdges(n, buckets))
+    values = y[index]
+    missing = ~inside | np.isnan(values)
+    low = np.where(missing, np.inf, values).argmin(axis=1)
+    high = np.where(missing, -np.inf, values).argmax(axis=1)
+    bucket = np.arange(len(index))
+    chosen = np.concatenate(([0], index[bucket, low], index[bucket, high], [n - 1]))
+    # buckets with nothing but nan keep their first sample
+    return np.unique(chosen)
+
+
+def lttb(x, y, target: int) -> np.ndarray:
+    """
+    Indices of target samples chosen by largest triangle three buckets, x must be increasing (e.g. time)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= target or target < 3:
+        return np.arange(n)
+
+    valid = ~np.isnan(y)
+    if not valid.all():
+        # decimate what was measured, and map back
+        kept = np.flatnonzero(valid)
+        return kept[lttb(x[kept], y[kept], target)]
+
+    edges = bucketEdges(n, target - 2)
+    index, inside = bucketMatrix(edges)
+    px = x[index]
+    py = y[index]
+
+    # average of every bucket, the bucket after the last one is the last sample
+    lengths = np.diff(edges)
+    averageX = np.append(np.add.reduceat(x[:n - 1], edges[:-1]) / lengths, x[-1])
+    averageY = np.append(np.add.reduceat(y[:n - 1], edges[:-1]) / lengths, y[-1])
+    nextX = averageX[1:]
+    nextY = averageY[1:]
+
+    # first pass: the point before a bucket is the previous bucket's average
+    previousX = np.concatenate(([x[0]], averageX[:-2]))
+    previousY = np.concatenate(([y[0]], averageY[:-2]))
+    bucket = np.arange(len(index))
+    outside = ~inside
+    for _ in range(LTTB_PASSES):
+        # twice the triangle's area, (A - C) x (P - A) expanded so the big matrices see one multiply add each
+        dx = previousX - nextX
+        dy = nextY - previousY
+        area = py * dx[:, None]
+        area += px * dy[:, None]
+        area += (-dx * previousY - previousX * dy)[:, None]
+        np.abs(area, out=area)
+        area[outside] = -1
+        chosen = index[bucket, area.argmax(axis=1)]
+        previousX = np.concatenate(([x[0]], x[chosen[:-1]]))
+        previousY = np.concatenate(([y[0]], y[chosen[:-1]]))
+    return np.concatenate(([0], chosen, [n - 1]))
+
+
+def rows(columns: dict, target: int, x: str = None, method: str = "lttb") -> np.ndarray:
+    """
+    Indices of target rows of a table (all of them if there are fewer), every column keeps an equal share of the rows so
+    a peak in any of them survives, with too few rows per column to keep a shape (3 for lttb, 4 for minMax) they are
+    evenly spaced instead
+    columns that pick the same rows (flat stretches) leave part of the target unused, it is filled with rows evenly
+    spaced over the ones not kept yet
+    columns: equally long arrays by name
+    x: the column the others are plotted against (e.g. "Time"), sample number if None
+    """
+    names = [name for name in columns if name != x]
+    n = len(next(iter(columns.values()), ()))
+    if n <= target or not names:
+        return np.arange(n)
+    # the shares add up to at most target, so their union does too
+    share = target // len(names)
+    if share < (4 if method == "minMax" else 3):
+        return np.unique(np.linspace(0, n - 1, max(target, 0)).astype(np.int64))
+    keep = []
+    for name in names:
+        if method == "minMax":
+            keep.append(minMax(columns[name], share))
+        else:
+            keep.append(lttb(columns[x] if x is not None else np.arange(n), columns[name], share))
+    keep = np.unique(np.concatenate(keep))
+    leftover = target - len(keep)
+    if leftover > 0:
+        rest = np.setdiff1d(np.arange(n), keep, assume_unique=True)
+        fill = rest[np.linspace(0, len(rest) - 1, leftover).astype(np.int64)]
+        keep = np.union1d(keep, fill)
+    return keep
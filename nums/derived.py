@@ -0,0 +1,129 @@
+import ast
+
+import numpy as np
+
+"""
+Derived columns, computed from the measured ones instead of by hand after exporting
+    Power = Voltage * Current
+    Efficiency = Thrust / Power
+
+an expression is plain arithmetic (+ - * / ** and parentheses) over column names, numbers and FUNCTIONS, evaluated
+with numpy so the same expression works on a single live reading and on a whole column at once, later columns can use
+earlier ones, anything undefined (division by zero, missing readings, overflow) is nan
+numbers and inputs are float64, so 9**9**9 overflows to nan instead of building a huge python int
+"""
+
+FUNCTIONS = {
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "log": np.log,
+    "exp": np.exp,
+    "min": np.minimum,
+    "max": np.maximum
+}
+
+# what the gui starts with, efficiency is in thrust units per watt (g/W without a calibration)
+DEFAULTS = {
+    "Power": "Voltage * Current",
+    "Efficiency": "Thrust / Power"
+}
+
+ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load, ast.Constant, ast.Add, ast.Sub,
+                 ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd)
+
+
+class Expression:
+    """
+    raises ValueError if text isn't a valid expression
+    """
+    def __init__(self, text: str):
+        self.text = text.strip()
+        try:
+            tree = ast.parse(self.text, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"invalid expression {text!r}: {e.msg}") from None
+
+        names = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, ALLOWED_NODES):
+                raise ValueError(f"{type(node).__name__} isn't allowed in {text!r}")
+            if isinstance(node, ast.Call) and (not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS
+                                               or node.keywords):
+                raise ValueError(f"unknown function in {text!r}, available: {', '.join(FUNCTIONS)}")
+            if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+                raise ValueError(f"only numbers are allowed as constants in {text!r}")
+            if isinstance(node, ast.Name) and node.id not in FUNCTIONS:
+                names.add(node.id)
+        # columns the expression reads
+        self.inputs = sorted(names)
+        # numbers become float64 names, python would compute int powers exactly and float ones raise OverflowError
+        self.constants = {}
+        tree = ast.fix_missing_locations(_Constants(self.constants).visit(tree))
+        self.code = compile(tree, "<derived>", "eval")
+
+    def __call__(self, columns: dict):
+        """
+        columns: values by name, numbers or equally long arrays, None and missing columns are nan (a live reading
+        has no Std columns, for one)
+        """
+        values = {name: np.nan if columns.get(name) is None else np.asarray(columns[name], dtype=np.float64)
+                  for name in self.inputs}
+        with np.errstate(all="ignore"):
+            result = np.asarray(eval(self.code, {"__builtins__": {}}, {**FUNCTIONS, **self.constants, **values}),
+                                dtype=np.float64)
+        return np.where(np.isfinite(result), result, np.nan)
+
+    def __repr__(self):
+        return f"Expression({self.text!r})"
+
+
+class _Constants(ast.NodeTransformer):
+    """
+    Replaces every number with a name bound to it as a float64
+    """
+    def __init__(self, constants: dict):
+        self.constants = constants
+
+    def visit_Constant(self, node):
+        # not an identifier, so it can't clash with a column
+        name = f"#{len(self.constants)}"
+        self.constants[name] = np.float64(node.value)
+        return ast.copy_location(ast.Name(id=name, ctx=ast.Load()), node)
+
+
+def parseDefinition(text: str):
+    """
+    "Name = expression" -> (name, Expression), raises ValueError
+    """
+    name, sep, expression = text.partition("=")
+    name = name.strip()
+    if not sep or not name.isidentifier():
+        raise ValueError(f"expected <name> = <expression>, got {text!r}")
+    return name, Expression(expression)
+
+
+def compileAll(definitions: dict, columns) -> dict:
+    """
+    Expressions by name, checked against the columns they can read (the given ones and the ones defined before)
+    raises ValueError
+    """
+    known = set(columns)
+    compiled = {}
+    for name, expression in definitions.items():
+        if not isinstance(expression, Expression):
+            expression = Expression(expression)
+        missing = [column for column in expression.inputs if column not in known]
+        if missing:
+            raise ValueError(f"{name} = {expression.text} uses unknown columns {', '.join(missing)}")
+        compiled[name] = expression
+        known.add(name)
+    return compiled
+
+
+def evaluateRow(derived: dict, row: dict) -> dict:
+    """
+    Adds the derived values of a single reading to row (in place) and returns it, for live data
+    """
+    for name, expression in derived.items():
+        row[name] = float(expression(row))
+    return row
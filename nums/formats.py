@@ -0,0 +1,158 @@
+import importlib.util
+import json
+import os
+
+import numpy as np
+
+from . import sink
+
+"""
+Datasheet files, chosen by extension
+    .csv                 text, what spreadsheets open
+    .parquet             columnar, zstd compressed, written in row groups of CHUNK_ROWS, needs pyarrow
+    .arrow / .feather    arrow ipc, lz4 compressed record batches of CHUNK_ROWS, needs pyarrow
+    .npz                 compressed numpy arrays, always available, what .parquet falls back to without pyarrow
+    .tsdat               binary stream written while recording (see sink.py), load only
+
+column types survive the round trip: integer columns stay integers (missing values included, as nullable int64 in
+arrow and a mask in .npz) and everything else is float64
+"""
+
+CHUNK_ROWS = 65536
+
+ARROW_EXTENSIONS = (".parquet", ".arrow", ".feather")
+EXTENSIONS = (".csv", ".npz") + ARROW_EXTENSIONS
+
+
+def hasArrow() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def export(datasheet, path: str) -> str:
+    """
+    Writes the datasheet, returns the path written, which ends in .npz instead if pyarrow is needed but missing
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ARROW_EXTENSIONS and not hasArrow():
+        path = os.path.splitext(path)[0] + ".npz"
+        extension = ".npz"
+
+    if extension == ".npz":
+        writeNpz(datasheet, path)
+    elif extension == ".parquet":
+        writeParquet(datasheet, path)
+    elif extension in (".arrow", ".feather"):
+        writeArrow(datasheet, path)
+    else:
+        datasheet.getDF().to_csv(path, index=False)
+    return path
+
+
+def load(path: str):
+    """
+    Reads a file written by export() or streamed by a sink back into a nums.Datasheet
+    """
+    from . import Datasheet
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == sink.EXTENSION:
+        return Datasheet.fromColumns(sink.readBinary(path))
+    if extension == ".npz":
+        return readNpz(path)
+    if extension in ARROW_EXTENSIONS:
+        return readArrow(path, extension)
+
+    import pandas as pd
+
+    # nullable dtypes keep integer columns with gaps as integers
+    dataframe = pd.read_csv(path, dtype_backend="numpy_nullable")
+    return Datasheet.fromColumns(
+        {col: dataframe[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in dataframe.columns},
+        {col: pd.api.types.is_integer_dtype(dataframe[col].dtype) or dataframe[col].isna().all()
+         for col in dataframe.columns}
+    )
+
+
+def writeNpz(datasheet, path: str):
+    arrays = {}
+    for index, col in enumerate(datasheet.columns):
+        values = datasheet.column(col)
+        # zip member names can't be trusted to hold any column name, so columns go by position
+        if datasheet.integral[col]:
+            missing = np.isnan(values)
+            arrays[f"c{index}"] = np.where(missing, 0, values).astype(np.int64)
+            if missing.any():
+                arrays[f"m{index}"] = missing
+        else:
+            arrays[f"c{index}"] = values
+    arrays["columns"] = np.array(json.dumps(datasheet.columns))
+    np.savez_compressed(path, **arrays)
+
+
+def readNpz(path: str):
+    from . import Datasheet
+
+    with np.load(path) as npz:
+        columns = json.loads(str(npz["columns"]))
+        data = {}
+        integral = {}
+        for index, col in enumerate(columns):
+            values = npz[f"c{index}"]
+            integral[col] = values.dtype.kind in "iu"
+            values = values.astype(np.float64)
+            if f"m{index}" in npz:
+                values[npz[f"m{index}"]] = np.nan
+            data[col] = values
+    return Datasheet.fromColumns(data, integral)
+
+
+def arrowBatch(datasheet, start: int, end: int):
+    import pyarrow as pa
+
+    arrays = []
+    for col in datasheet.columns:
+        values = datasheet.column(col)[start:end]
+        missing = np.isnan(values)
+        if datasheet.integral[col]:
+            arrays.append(pa.array(np.where(missing, 0, values).astype(np.int64), mask=missing, type=pa.int64()))
+        else:
+            arrays.append(pa.array(values, type=pa.float64()))
+    return pa.RecordBatch.from_arrays(arrays, names=datasheet.columns)
+
+
+def writeParquet(datasheet, path: str):
+    import pyarrow.parquet as pq
+
+    schema = arrowBatch(datasheet, 0, 0).schema
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for start in range(0, len(datasheet), CHUNK_ROWS):
+            writer.write_batch(arrowBatch(datasheet, start, start + CHUNK_ROWS))
+
+
+def writeArrow(datasheet, path: str):
+    import pyarrow as pa
+
+    schema = arrowBatch(datasheet, 0, 0).schema
+    options = pa.ipc.IpcWriteOptions(compression="lz4")
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, schema, options=options) as writer:
+        for start in range(0, len(datasheet), CHUNK_ROWS):
+            writer.write_batch(arrowBatch(datasheet, start, start + CHUNK_ROWS))
+
+
+def readArrow(path: str, extension: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from . import Datasheet
+
+    if extension == ".parquet":
+        table = pq.read_table(path)
+    else:
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+    data = {}
+    integral = {}
+    for name, column in zip(table.column_names, table.columns):
+        integral[name] = pa.types.is_integer(column.type)
+        data[name] = column.to_numpy(zero_copy_only=False).astype(np.float64)
+    return Datasheet.fromColumns(data, integral)
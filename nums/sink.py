@@ -0,0 +1,148 @@
+import abc
+import csv
+import io
+import json
+import os
+import struct
+import time
+
+from typing import Optional
+
+import numpy as np
+
+"""
+Recorded points streamed to disk while the test runs
+
+a sink buffers rows and appends them in chunks (every chunkRows rows or flushInterval seconds, whichever comes first),
+and fsyncs every fsyncInterval seconds, so a crash loses at most the unflushed chunk and memory stays constant however
+long the run, what is on disk is always a readable file:
+    CsvSink     .csv, header first, every chunk is whole lines
+    BinarySink  .tsdat, little endian float64 records, readBinary ignores a record cut short by a crash
+
+.tsdat layout:
+    header: magic, length of the column list uint32, column names as a json list
+    record: one float64 per column, nan where a point had no value
+"""
+
+MAGIC = b"TSDAT\x01"
+HEADER = struct.Struct("<6sI")
+EXTENSION = ".tsdat"
+
+CHUNK_ROWS = 64
+FLUSH_INTERVAL = 1.0
+FSYNC_INTERVAL = 5.0
+
+
+class Sink(abc.ABC):
+    def __init__(self, path: str, columns, chunkRows: int = CHUNK_ROWS, flushInterval: float = FLUSH_INTERVAL,
+                 fsyncInterval: Optional[float] = FSYNC_INTERVAL):
+        """
+        chunkRows / flushInterval: rows or seconds buffered before they are written, 1 / 0 writes every row
+        fsyncInterval: seconds between fsyncs, 0 after every chunk, None leaves it to the os
+        """
+        self.path = path
+        self.columns = list(columns)
+        self.chunkRows = max(1, chunkRows)
+        self.flushInterval = flushInterval
+        self.fsyncInterval = fsyncInterval
+
+        self.rows = []
+        self.written = 0
+        self.lastFlush = time.monotonic()
+        self.lastSync = self.lastFlush
+
+        self.file = open(path, "wb")
+        self.file.write(self.header())
+        self.file.flush()
+
+    def header(self) -> bytes:
+        return b""
+
+    @abc.abstractmethod
+    def encode(self, rows: list) -> bytes:
+        """
+        The bytes appended to the file for a chunk of rows
+        """
+
+    def addPoint(self, data: dict):
+        """
+        data: dictionary of values by column, missing columns and None are left empty
+        """
+        self.rows.append([data.get(col) for col in self.columns])
+        if len(self.rows) >= self.chunkRows or time.monotonic() - self.lastFlush >= self.flushInterval:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered rows as one chunk, fsyncs if the interval is up
+        """
+        if self.file.closed:
+            return
+        now = time.monotonic()
+        if self.rows:
+            self.file.write(self.encode(self.rows))
+            self.written += len(self.rows)
+            self.rows = []
+        self.file.flush()
+        self.lastFlush = now
+        if self.fsyncInterval is not None and now - self.lastSync >= self.fsyncInterval:
+            os.fsync(self.file.fileno())
+            self.lastSync = now
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvSink(Sink):
+    def header(self) -> bytes:
+        return self.encode([self.columns])
+
+    def encode(self, rows: list) -> bytes:
+        text = io.StringIO()
+        csv.writer(text).writerows(rows)
+        return text.getvalue().encode("utf-8")
+
+
+class BinarySink(Sink):
+    def header(self) -> bytes:
+        names = json.dumps(self.columns).encode("utf-8")
+        return HEADER.pack(MAGIC, len(names)) + names
+
+    def encode(self, rows: list) -> bytes:
+        return np.array([[np.nan if value is None else value for value in row] for row in rows],
+                        dtype="<f8").tobytes()
+
+
+def openSink(path: str, columns, **kwargs) -> Sink:
+    """
+    BinarySink for .tsdat, CsvSink for anything else
+    """
+    if path.endswith(EXTENSION):
+        return BinarySink(path, columns, **kwargs)
+    return CsvSink(path, columns, **kwargs)
+
+
+def readBinary(path: str) -> dict:
+    """
+    Columns of a .tsdat file as numpy arrays by name, a record cut short at the end is dropped
+    """
+    with open(path, "rb") as f:
+        magic, length = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a {EXTENSION} file")
+        columns = json.loads(f.read(length).decode("utf-8"))
+        data = f.read()
+    recordSize = 8 * len(columns)
+    rows = len(data) // recordSize
+    table = np.frombuffer(data, dtype="<f8", count=rows * len(columns)).reshape(rows, len(columns))
+    return {col: table[:, index] for index, col in enumerate(columns)}
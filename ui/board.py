@@ -69,26 +69,23 @@ class CalibrationWidget(QWidget):
         self.thrustReading.setReadOnly(True)
         self.thrustReading.setFixedHeight(27)
         self.thrustReading.setSizePolicy(QSizePolicy.Maximum, QSizePolicy.Minimum)
-        board.cell1Received.connect(self.updateThrust)
         self.torqueReading = QPlainTextEdit()
         self.torqueReading.setReadOnly(True)
         self.torqueReading.setFixedHeight(27)
         self.torqueReading.setSizePolicy(QSizePolicy.Maximum, QSizePolicy.Minimum)
-        board.cell2Received.connect(self.updateTorque)
         self.currentReading = QPlainTextEdit()
         self.currentReading.setReadOnly(True)
         self.currentReading.setFixedHeight(27)
         self.currentReading.setSizePolicy(QSizePolicy.Maximum, QSizePolicy.Minimum)
-        board.currentReceived.connect(self.updateCurrent)
         self.voltageReading = QPlainTextEdit()
         self.voltageReading.setReadOnly(True)
         self.voltageReading.setFixedHeight(27)
         self.voltageReading.setSizePolicy(QSizePolicy.Maximum, QSizePolicy.Minimum)
-        board.voltageReceived.connect(self.updateVoltage)
         calibrationPanelLayout.addWidget(self.thrustReading, 1, 2)
         calibrationPanelLayout.addWidget(self.torqueReading, 1, 3)
         calibrationPanelLayout.addWidget(self.currentReading, 1, 4)
         calibrationPanelLayout.addWidget(self.voltageReading, 1, 5)
+        board.frameReceived.connect(self.updateReadings)
 
         mainLayout.addStretch()
 
@@ -98,11 +95,21 @@ class CalibrationWidget(QWidget):
         board.zeroCurrent()
         board.zeroVoltage()
 
-    def updateThrust(self, data: int):
-        self.thrustReading.setPlainText(str(data) + "g")
-
-    def updateTorque(self, data: int):
-        self.torqueReading.setPlainText(str(data) + "g")
+    def updateReadings(self, frame):
+        if frame.cell1 is not None:
+            self.updateThrust(frame.cell1)
+        if frame.cell2 is not None:
+            self.updateTorque(frame.cell2)
+        if frame.current is not None:
+            self.updateCurrent(frame.current)
+        if frame.voltage is not None:
+            self.updateVoltage(frame.voltage)
+
+    def updateThrust(self, data: float):
+        self.thrustReading.setPlainText(f"{data:g}" + board.getSession().calibration.unit("cell1"))
+
+    def updateTorque(self, data: float):
+        self.torqueReading.setPlainText(f"{data:g}" + board.getSession().calibration.unit("cell2"))
 
     def updateCurrent(self, data: float):
         self.currentReading.setPlainText(str(data) + "A")
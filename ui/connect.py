@@ -3,7 +3,9 @@ import serial.tools.list_ports
 from PyQt5.QtCore import QThread, pyqtSignal, QSize
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import QFrame, QPushButton, QHBoxLayout, QWidget, QVBoxLayout, QLabel, QComboBox, QPlainTextEdit, \
-    QLineEdit, QCheckBox
+    QLineEdit, QCheckBox, QFileDialog
+
+from urllib.parse import quote
 
 from serial import SerialException
 
@@ -30,7 +32,10 @@ class Connect(QFrame):
         mainLayout = QVBoxLayout(self)
         topLayout = QHBoxLayout()
 
-        # top control bar including the com port selector, refresh, and connect buttons
+        # top control bar including the stand and com port selectors, refresh, and connect buttons
+        self.sessionSelector = SessionSelector()
+        topLayout.addWidget(self.sessionSelector)
+
         self.comPortSelector = ComPortSelector()
         topLayout.addWidget(self.comPortSelector)
 
@@ -59,6 +64,28 @@ class Connect(QFrame):
         topLayout.addWidget(suppressLabel)
         topLayout.addSpacing(15)
 
+        # binary protocol, only used if the firmware acknowledges it
+        self.binaryCheckbox = QCheckBox()
+        binaryLabel = QLabel("Binary protocol")
+        topLayout.addWidget(self.binaryCheckbox)
+        topLayout.addWidget(binaryLabel)
+        topLayout.addSpacing(15)
+
+        # raw serial recording of the next connection, and playback of one in place of the board
+        self.recordCheckbox = QCheckBox()
+        recordLabel = QLabel("Record raw data")
+        topLayout.addWidget(self.recordCheckbox)
+        topLayout.addWidget(recordLabel)
+        topLayout.addSpacing(15)
+
+        self.replaySpeed = QComboBox()
+        self.replaySpeed.addItems(["1x", "2x", "10x", "Max"])
+        replayBtn = QPushButton("Replay")
+        replayBtn.clicked.connect(self.replay)
+        topLayout.addWidget(self.replaySpeed)
+        topLayout.addWidget(replayBtn)
+        topLayout.addSpacing(15)
+
         mainLayout.addLayout(topLayout)
 
         # console that dumps all serial communication for debugging
@@ -83,7 +110,28 @@ class Connect(QFrame):
             self.serialMonitor.showDataTransmissions()
 
     def connect(self):
-        self.serialMonitor.connectReader(self.comPortSelector.combo.currentText(), 9600)
+        recordPath = None
+        if self.recordCheckbox.isChecked():
+            recordPath, _ = QFileDialog.getSaveFileName(
+                self,
+                "Record Raw Data",
+                "",
+                "Raw recording (*.tsraw);;All Files (*)"
+            )
+        self.serialMonitor.connectReader(self.comPortSelector.combo.currentText(), 9600, self.binaryCheckbox.isChecked(),
+                                         recordPath or None)
+
+    def replay(self):
+        filePath, _ = QFileDialog.getOpenFileName(
+            self,
+            "Replay Raw Data",
+            "",
+            "Raw recording (*.tsraw);;All Files (*)"
+        )
+        if filePath:
+            speed = self.replaySpeed.currentText()
+            speed = "0" if speed == "Max" else speed.rstrip("x")
+            self.serialMonitor.connectReader(f"replay://{quote(filePath)}?speed={speed}")
 
 
 class SerialReaderThread(QThread):
@@ -92,35 +140,59 @@ class SerialReaderThread(QThread):
     """
     data_received = pyqtSignal(str)
 
-    def __init__(self, port: str, baudrate: int = 9600):
+    def __init__(self, session, port: str, baudrate: int = 9600, binary: bool = False, recordPath: str = None):
         super().__init__()
+        self.session = session
         self.port = port
         self.baudrate = baudrate
+        self.binary = binary
+        self.recordPath = recordPath
         self._running = True
 
     def run(self):
         """
         Thread loop: opens serial port and emits each received line.
         """
-        if board.connect(self.port, self.baudrate):
+        session = self.session
+        if session.connect(self.port, self.baudrate):
             self.data_received.emit(f"(i) Connected to serial port {self.port}")
+            if self.recordPath:
+                try:
+                    session.startRecording(self.recordPath)
+                    self.data_received.emit(f"(i) Recording raw data to {self.recordPath}")
+                except OSError as e:
+                    self.data_received.emit(f"(i) Error opening {self.recordPath}: {e}")
+            session.setBoardTime(True)
+            if self.binary:
+                session.setBinaryMode(True)
+            hz = session.negotiateRate(self.binary)
+            self.data_received.emit(f"(i) Requested {hz} Hz data rate")
         else:
             self.data_received.emit(f"(i) Error opening serial port {self.port}")
+            return
+
+        # commands the board never answered show up in the console
+        session.commandTimedOut.connect(self.reportTimeout)
 
+        # getLines blocks in the serial driver until data arrives, so this loop is idle while the board is quiet
         while self._running:
             try:
-                line = board.getLine()
-                if line is not None:
+                for line in session.getLines():
                     self.data_received.emit(line)
             except SerialException:
-                self.stop()
+                if self._running:
+                    self.stop()
+        session.commandTimedOut.disconnect(self.reportTimeout)
+
+    def reportTimeout(self, pending):
+        self.data_received.emit(f"(i) No reply to {pending.msg} within {self.session.acks.timeout:g} s")
 
     def stop(self):
         """
         Cleanly stop the thread and close the serial port.
         """
         self._running = False
-        if board.disconnect():
+        if self.session.disconnect():
             self.data_received.emit(f"(i) Disconnected from serial port {self.port}")
         else:
             self.data_received.emit("(i) Failed to disconnect serial port")
@@ -174,8 +246,8 @@ class SerialMonitorWidget(QWidget):
         self.textbox.setObjectName("console")
         layout.addWidget(self.textbox)
 
-        # Create reader variable
-        self.reader = None
+        # one reader thread per connected stand, by session name
+        self.readers = {}
 
         # Autoscroll control
         self.autoscroll = True
@@ -185,32 +257,38 @@ class SerialMonitorWidget(QWidget):
         # data transmission suppression control
         self.suppressTransmission = True
 
-    def connectReader(self, port, baudrate):
+    def connectReader(self, port, baudrate=9600, binary=False, recordPath=None):
         """
         Connects the reader to the serial port.
         """
-        if self.reader is None:
-            self.reader = SerialReaderThread(port, baudrate)
-            self.reader.data_received.connect(self.appendText)
-            self.reader.finished.connect(self.reader.deleteLater)
-            self.reader.finished.connect(self.dereferenceReader)
-            self.reader.start()
+        session = board.getSession()
+        if session.name not in self.readers:
+            reader = SerialReaderThread(session, port, baudrate, binary, recordPath)
+            reader.data_received.connect(lambda text: self.appendText(text, session.name))
+            reader.finished.connect(reader.deleteLater)
+            reader.finished.connect(lambda: self.dereferenceReader(session.name))
+            self.readers[session.name] = reader
+            reader.start()
             self.setConnected()
         else:
-            self.appendText("(i) Serial already connected")
+            self.appendText("(i) Serial already connected", session.name)
 
-    def dereferenceReader(self):
-        self.reader = None
-        self.setDisconnected()
+    def dereferenceReader(self, name):
+        self.readers.pop(name, None)
+        if not self.readers:
+            self.setDisconnected()
 
     def appendUserCommand(self, command: str):
         self.appendText("> " + command)
 
-    def appendText(self, text: str):
+    def appendText(self, text: str, sessionName: str = None):
         """
         Append received text to the textbox, scrolling to the end.
         """
-        if not (text.startswith("lc1(") or text.startswith("lc2(") or text.startswith("cur(") or text.startswith("vtg(")) or not self.suppressTransmission:
+        if not (text.startswith("lc1(") or text.startswith("lc2(") or text.startswith("cur(") or text.startswith("vtg(") or text.startswith("tms(")) or not self.suppressTransmission:
+            # tell the stands apart once there is more than one
+            if sessionName is not None and len(board.sessions) > 1:
+                text = f"[{sessionName}] {text}"
             self.textbox.appendPlainText(text.rstrip())
             # auto-scroll
             if self.autoscroll:
@@ -222,7 +300,8 @@ class SerialMonitorWidget(QWidget):
         """
         Ensure the thread is stopped when the widget is closed.
         """
-        self.reader.stop()
+        for reader in list(self.readers.values()):
+            reader.stop()
         super().closeEvent(event)
 
     def scrollBarMoved(self):
@@ -265,7 +344,42 @@ class ComPortSelector(QWidget):
         Populate the combo box with available serial ports.
         """
         ports = [port.device for port in serial.tools.list_ports.comports()]
+        # virtual stand for trying things out without hardware
+        ports.append("sim://")
         self.combo.clear()
         self.combo.addItems(ports)
         if ports:
-            self.combo.setCurrentIndex(0)
\ No newline at end of file
+            self.combo.setCurrentIndex(0)
+
+
+class SessionSelector(QWidget):
+    """
+    Picks the stand the connect button, console commands and the other tabs work with
+    """
+    def __init__(self):
+        super().__init__()
+
+        mLayout = QHBoxLayout(self)
+
+        lbl = QLabel("Stand:")
+        self.combo = QComboBox()
+        addBtn = QPushButton("+")
+        addBtn.setFixedWidth(31)
+        addBtn.clicked.connect(self.addSession)
+        mLayout.addWidget(lbl)
+        mLayout.addWidget(self.combo)
+        mLayout.addWidget(addBtn)
+
+        active = board.getSession()
+        self.combo.addItems(board.sessions)
+        self.combo.setCurrentText(active.name)
+        self.combo.currentTextChanged.connect(self.selectSession)
+
+    def addSession(self):
+        session = board.createSession()
+        self.combo.addItem(session.name)
+        self.combo.setCurrentText(session.name)
+
+    def selectSession(self, name):
+        if name:
+            board.setActiveSession(name)
@@ -1,27 +1,38 @@
 import os
+import sqlite3
 
 import numpy as np
-from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, QSize, QElapsedTimer, pyqtSlot
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, QSize, QElapsedTimer, pyqtSlot, pyqtSignal
 from PyQt5.QtGui import QPixmap, QIcon, QFont
 from PyQt5.QtWidgets import QFrame, QVBoxLayout, QGridLayout, QPushButton, QWidget, QSlider, QTableWidget, QTableView, \
-    QHBoxLayout, QFileDialog, QSplitter, QLabel, QProgressBar, QSizePolicy, QComboBox
+    QHBoxLayout, QFileDialog, QSplitter, QLabel, QProgressBar, QSizePolicy, QComboBox, QCheckBox, QLineEdit, \
+    QMessageBox, QSpinBox
 
 import pyqtgraph as pg
 
-import pandas as pd
-
 import time
 
-from collections import deque
-
 import board
+from board.headless import POINT_CHANNELS, POINT_COLUMNS
+from board.rolling import DEFAULT_WINDOW_MS
 
 from .themeManager import themeManager
 
 import nums
+from nums import decimate
+from nums import derived
+from nums.catalog import Catalog
 
 import autoTest
 
+# rows kept by a decimated export
+EXPORT_ROWS = 10000
+
+# samples the live graphs hold, and the most points they draw of them
+GRAPH_SAMPLES = 2000
+GRAPH_POINTS = 500
+# most redraws per second of a live graph
+GRAPH_FPS = 30
 
 class Test(QFrame):
     def __init__(self):
@@ -41,26 +52,21 @@ class Test(QFrame):
         monitorWidget.setMinimumSize(500, 0)
         splitter.addWidget(monitorWidget)
 
-        graph1 = AutoUpdateGraph()
-        graph1.setYAxisTitle("Thrust (g)")
-        graph1.setXAxisTitle("Samples")
-        board.cell1Received.connect(graph1.addPointInt)
-        graph2 = AutoUpdateGraph()
-        graph2.setYAxisTitle("Torque (Nm)")
-        graph2.setXAxisTitle("Samples")
-        board.cell2Received.connect(graph2.addPointInt)
-        graph3 = AutoUpdateGraph()
-        graph3.setYAxisTitle("Voltage (V)")
-        graph3.setXAxisTitle("Samples")
-        board.voltageReceived.connect(graph3.addPointFloat)
-        graph4 = AutoUpdateGraph()
-        graph4.setYAxisTitle("Current (A)")
-        graph4.setXAxisTitle("Samples")
-        board.currentReceived.connect(graph4.addPointFloat)
-        monitorLayout.addWidget(graph1, 0, 0)
-        monitorLayout.addWidget(graph2, 0, 1)
-        monitorLayout.addWidget(graph3, 1, 0)
-        monitorLayout.addWidget(graph4, 1, 1)
+        # units of the stand's calibration, grams until one is set up, see board/calibration.py
+        calibration = board.getSession().calibration
+        units = {
+            "Thrust": calibration.unit("cell1"),
+            "Torque": calibration.unit("cell2"),
+            "Voltage": "V",
+            "Current": "A"
+        }
+        # every graph can show any measured or derived column
+        self.graphs = []
+        for index, channel in enumerate(["Thrust", "Torque", "Voltage", "Current"]):
+            graph = ChannelGraph(channel, units, GRAPH_SAMPLES, GRAPH_POINTS)
+            monitorLayout.addWidget(graph, index // 2, index % 2)
+            self.graphs.append(graph)
+        board.frameReceived.connect(self.newFrame)
 
         throttleSlider = QSlider(Qt.Horizontal)
         throttleSlider.setMinimum(0)
@@ -71,54 +77,110 @@ class Test(QFrame):
         throttleSlider.valueChanged.connect(board.setThrottle)
         throttleSlider.valueChanged.connect(self.updateThrottleValue)
         monitorLayout.addWidget(throttleSlider, 3, 0, 1, 2)
+        self.throttleSlider = throttleSlider
+
+        # skips the command queue, see board.command
+        stopBtn = QPushButton("STOP")
+        stopBtn.setObjectName("redBtn")
+        stopBtn.clicked.connect(self.emergencyStop)
+        monitorLayout.addWidget(stopBtn, 4, 0, 1, 2)
 
         self.currentStateData = {
             "Throttle": 0
         }
-        dataSave = DataSave(self.currentStateData)
-        splitter.addWidget(dataSave)
+        self.dataSave = DataSave(self.currentStateData)
+        self.dataSave.columnsChanged.connect(self.setGraphChannels)
+        self.setGraphChannels(self.dataSave.datasheet.columns)
+        splitter.addWidget(self.dataSave)
+
+    def setGraphChannels(self, columns):
+        # what a single frame has, the measured channels and what is derived from them
+        channels = ["Throttle", *POINT_CHANNELS, *self.dataSave.datasheet.derived]
+        for graph in self.graphs:
+            graph.setChannels(channels)
+
+    def newFrame(self, frame):
+        row = {
+            "Time": None,
+            "Throttle": self.currentStateData["Throttle"],
+            "Thrust": frame.cell1,
+            "Torque": frame.cell2,
+            "Voltage": frame.voltage,
+            "Current": frame.current
+        }
+        # same expressions as the datasheet's derived columns, on one reading
+        derived.evaluateRow(self.dataSave.datasheet.derived, row)
+        for graph in self.graphs:
+            value = row.get(graph.channel)
+            if value is not None and not np.isnan(value):
+                graph.addPointFloat(value, frame.timestamp)
 
     def updateThrottleValue(self, value):
         self.currentStateData["Throttle"] = value
 
+    def emergencyStop(self):
+        board.emergencyStop()
+        # move the slider back without sending a throttle command after the stop
+        self.throttleSlider.blockSignals(True)
+        self.throttleSlider.setValue(0)
+        self.throttleSlider.blockSignals(False)
+        self.updateThrottleValue(0)
+
     def setTheme(self, stylesheet):
         self.setStyleSheet(stylesheet)
 
 
 class DataSave(QWidget):
-    class PandasTable(QAbstractTableModel):
+    # all columns of the datasheet, after a derived one was added
+    columnsChanged = pyqtSignal(list)
+
+    class DatasheetTable(QAbstractTableModel):
         """
-        Table class that displays the pd dataframe
+        Table class that displays a nums.Datasheet, reads cells straight from its columns
         """
-        def __init__(self, df=pd.DataFrame(), parent=None):
+        def __init__(self, datasheet, parent=None):
             super().__init__(parent)
-            self.df = df
+            self.datasheet = datasheet
 
         def rowCount(self, parent=None):
-            return len(self.df.index)
+            return len(self.datasheet)
 
         def columnCount(self, parent=None):
-            return len(self.df.columns)
+            return len(self.datasheet.columns)
 
         def data(self, index, role=Qt.DisplayRole):
             if index.isValid() and role == Qt.DisplayRole:
-                return str(self.df.iat[index.row(), index.column()])
+                value = self.datasheet.value(index.row(), index.column())
+                return "" if value is None else str(value)
             return None
 
         def headerData(self, section, orientation, role=Qt.DisplayRole):
             if role == Qt.DisplayRole:
                 if orientation == Qt.Horizontal:
-                    return str(self.df.columns[section])
+                    return str(self.datasheet.columns[section])
                 if orientation == Qt.Vertical:
-                    return str(self.df.index[section])
+                    return str(section)
             return None
 
         def appendRow(self, row_dict):
-            new_index = len(self.df)
+            """
+            Adds the point to the datasheet and shows it
+            """
+            new_index = len(self.datasheet)
             self.beginInsertRows(QModelIndex(), new_index, new_index)
-            self.df.loc[new_index] = row_dict
+            self.datasheet.addPoint(row_dict)
             self.endInsertRows()
 
+        def addColumn(self, name, expression):
+            """
+            Adds a derived column to the datasheet and shows it, raises ValueError
+            """
+            self.beginResetModel()
+            try:
+                self.datasheet.derive(name, expression)
+            finally:
+                self.endResetModel()
+
     class TimerWidget(QWidget):
         def __init__(self):
             super().__init__()
@@ -247,6 +309,8 @@ class DataSave(QWidget):
             super().__init__()
 
             self.addPoint = addPoint
+            # name of the last script started, for the session catalog
+            self.script = None
 
             mainLayout = QHBoxLayout(self)
 
@@ -276,6 +340,7 @@ class DataSave(QWidget):
             autoTest.cancelScript()
 
         def startScript(self):
+            self.script = self.scriptSelector.currentText()
             autoTest.runScript(os.path.join("scripts", self.scriptSelector.currentText()), self.addPoint, self.scriptComplete)
             self.scriptBtn.setText("Cancel")
             self.scriptSelector.setEnabled(False)
@@ -289,17 +354,21 @@ class DataSave(QWidget):
 
         self.dataDict = dataDict
 
-        self.datasheet = nums.Datasheet(["Time", "Throttle", "Thrust", "Torque", "Voltage", "Current"])
+        self.datasheet = nums.Datasheet(POINT_COLUMNS, derived=derived.DEFAULTS)
+        # wall clock of the first point, for the session catalog
+        self.started = None
+        # opened with the first session registered, see nums/catalog.py
+        self.catalog = None
 
         mainLayout = QVBoxLayout(self)
 
         self.timerWidget = self.TimerWidget()
         mainLayout.addWidget(self.timerWidget)
 
-        autoTestWidget = self.AutoTestWidget(self.addPoint)
-        mainLayout.addWidget(autoTestWidget)
+        self.autoTestWidget = self.AutoTestWidget(self.addPoint)
+        mainLayout.addWidget(self.autoTestWidget)
 
-        self.model = self.PandasTable(self.datasheet.getDF())
+        self.model = self.DatasheetTable(self.datasheet)
         self.table = QTableView()
         self.table.setModel(self.model)
         self.table.setMinimumWidth(300)
@@ -307,6 +376,17 @@ class DataSave(QWidget):
         self.table.verticalHeader().setMinimumWidth(32)
         mainLayout.addWidget(self.table)
 
+        # derived columns, "Name = expression" over the columns, see nums/derived.py
+        derivedLayout = QHBoxLayout()
+        self.derivedInput = QLineEdit()
+        self.derivedInput.setPlaceholderText("Column = expression, e.g. ThrustPerAmp = Thrust / Current")
+        self.derivedInput.returnPressed.connect(self.addDerivedColumn)
+        derivedLayout.addWidget(self.derivedInput)
+        addColumnButton = QPushButton("Add Column")
+        addColumnButton.clicked.connect(self.addDerivedColumn)
+        derivedLayout.addWidget(addColumnButton)
+        mainLayout.addLayout(derivedLayout)
+
         controlsLayout = QHBoxLayout()
 
         addDataButton = QPushButton("Save Point")
@@ -320,9 +400,25 @@ class DataSave(QWidget):
         self.recordTimer = QTimer()
         self.recordTimer.timeout.connect(self.addPoint)
 
+        # every saved channel is averaged over this window, see board/rolling.py
+        self.windowInput = QSpinBox()
+        self.windowInput.setRange(1, 10000)
+        self.windowInput.setSingleStep(50)
+        self.windowInput.setPrefix("Average ")
+        self.windowInput.setSuffix(" ms")
+        self.windowInput.setValue(DEFAULT_WINDOW_MS)
+        self.windowInput.valueChanged.connect(self.setWindow)
+        controlsLayout.addWidget(self.windowInput)
+
+        # recorded points also go to a file as they come in, so a crash doesn't lose the run
+        self.streamCheckbox = QCheckBox("Stream to file")
+        controlsLayout.addWidget(self.streamCheckbox)
+
         exportButton = QPushButton("Export Data")
         exportButton.clicked.connect(self.exportData)
         controlsLayout.addWidget(exportButton)
+        self.decimateCheckbox = QCheckBox(f"Decimate to {EXPORT_ROWS // 1000}k rows")
+        controlsLayout.addWidget(self.decimateCheckbox)
 
         clearButton = QPushButton("Clear Data")
         clearButton.clicked.connect(self.clearData)
@@ -335,95 +431,230 @@ class DataSave(QWidget):
             self.recording = False
             self.recordDataButton.setText("Record Data")
             self.recordTimer.stop()
+            if self.datasheet.sink is not None:
+                path = self.datasheet.sink.path
+                self.datasheet.stopStreaming()
+                # the file holds every point since streaming started, cleared ones included
+                self.registerSession(path, self.readStream(path))
         else:
+            if self.streamCheckbox.isChecked():
+                filePath, _ = QFileDialog.getSaveFileName(
+                    self,
+                    "Stream Data",
+                    "",
+                    "CSV (*.csv);;Binary (*.tsdat);;All Files (*)"
+                )
+                if not filePath:
+                    return
+                self.datasheet.streamTo(filePath)
             self.recording = True
             self.recordDataButton.setText("Stop Recording")
             self.recordTimer.start(250)
 
-    def addPoint(self, timer=None, throttle=None):
-        dataPoint = {
-            "Time": timer if timer is not None and timer != False else self.timerWidget.getTimerValue(),
-            "Throttle": throttle if throttle is not None else self.dataDict["Throttle"],
-            "Thrust": board.cell1,
-            "Torque": board.cell2,
-            "Voltage": board.voltage,
-            "Current": board.current
-        }
-        self.datasheet.addPoint(dataPoint)
+    def setWindow(self, ms):
+        board.getSession().setWindow(ms=ms)
+
+    def addPoint(self, timer=None, throttle=None, session=None, snapshot=None, stats=None):
+        # scripts pass the stand they are driving and the readings they waited for, everything else records the
+        # latest readings of the active stand
+        if session is None:
+            session = board.getSession()
+        if snapshot is None:
+            snapshot = session.snapshots.latest()
+        if timer is None or timer is False:
+            timer = self.timerWidget.getTimerValue()
+            # stamp the point with when the latest sample was read off the port rather than when it was saved
+            if timer is not None and snapshot.timestamp:
+                timer = max(0, timer - (time.monotonic_ns() - snapshot.timestamp) // 1_000_000)
+        if throttle is None:
+            throttle = self.dataDict["Throttle"]
+        dataPoint = session.point(timer, throttle, snapshot, stats)
+        if not len(self.datasheet):
+            self.started = time.time()
         self.model.appendRow(dataPoint)
 
+    def addDerivedColumn(self):
+        text = self.derivedInput.text().strip()
+        if not text:
+            return
+        try:
+            name, expression = derived.parseDefinition(text)
+            self.model.addColumn(name, expression)
+        except ValueError as e:
+            QMessageBox.warning(self, "Add Column", str(e))
+            return
+        self.derivedInput.clear()
+        self.columnsChanged.emit(list(self.datasheet.columns))
+
     def exportData(self):
         filePath, _ = QFileDialog.getSaveFileName(
             self,
             "Export Data",
             "",
-            "CSV (*.csv);;All Files (*)"
+            "CSV (*.csv);;Parquet (*.parquet);;Compressed NumPy (*.npz);;All Files (*)"
         )
         if filePath:
-            self.datasheet.export(filePath)
+            datasheet = self.datasheet
+            if self.decimateCheckbox.isChecked():
+                datasheet = datasheet.decimated(EXPORT_ROWS)
+            # parquet needs pyarrow, without it the data goes to a .npz next to it
+            self.registerSession(datasheet.export(filePath), datasheet)
+
+    def readStream(self, path):
+        """
+        The points in a streamed file, the table if it can't be read back
+        """
+        try:
+            return nums.load(path)
+        except (OSError, ValueError):
+            return self.datasheet
+
+    def registerSession(self, path, datasheet=None):
+        """
+        Adds the recording in path to the session catalog, so it can be found by stand, script, time and throttle
+        datasheet: the rows written to path, the whole table if None, saving to the same path again updates the entry
+        """
+        if datasheet is None:
+            datasheet = self.datasheet
+        if not len(datasheet):
+            return
+        try:
+            if self.catalog is None:
+                self.catalog = Catalog()
+            self.catalog.register(datasheet, path, board.getSession().name, self.autoTestWidget.script,
+                                  self.started)
+        except sqlite3.Error as e:
+            QMessageBox.warning(self, "Session Catalog", f"{path} was saved but not added to the catalog: {e}")
 
     def clearData(self):
-        self.datasheet = nums.Datasheet(["Time", "Throttle", "Thrust", "Torque", "Voltage", "Current"])
-        self.model = self.PandasTable(self.datasheet.getDF())
+        # only clears the table, a file being streamed to keeps the whole run
+        sink = self.datasheet.sink
+        self.datasheet = nums.Datasheet(POINT_COLUMNS, derived=self.datasheet.derived)
+        self.datasheet.sink = sink
+        self.model = self.DatasheetTable(self.datasheet)
         self.table.setModel(self.model)
 
 
 class TimedBuffer:
     """
-    Vibecoded, a class that timestamps incoming data and deletes anything too old
+    Timestamps incoming data and deletes anything too old
+    samples live in numpy arrays, oldest first, one contiguous slice, so the getters return views instead of building
+    lists, pruning and the range queries are binary searches over the times, and appending is amortized O(1) (the
+    arrays double when full, and the live slice is moved back to the front once the pruned part outgrows it)
+    timestamps are host time.monotonic_ns() like a frame's, and must not decrease, ages are in seconds
     """
-    def __init__(self, max_age_secs: float):
+    def __init__(self, max_age_secs: float, capacity: int = 1024):
         """
         max_age_secs: entries older than this (in seconds) will be discarded
         """
         self.max_age = max_age_secs
-        # store pairs (timestamp, value)
-        self._buffer = deque()
+        self._maxAgeNs = round(max_age_secs * 1e9)
+        self._times = np.empty(max(1, capacity), dtype=np.int64)
+        self._values = np.empty(max(1, capacity))
+        # the live entries are [_start, _end)
+        self._start = 0
+        self._end = 0
 
-    def add(self, value):
-        """Append a new sample with the current time, then prune old ones."""
-        now = time.time()
-        self._buffer.append((now, value))
-        self._prune(now)
+    def __len__(self):
+        return self._end - self._start
+
+    def add(self, value, timestamp: int = None):
+        """
+        Append a new sample measured at timestamp (now if not given), then prune old ones
+        """
+        if timestamp is None:
+            timestamp = time.monotonic_ns()
+        if self._end == len(self._times):
+            self._makeRoom(1)
+        self._times[self._end] = timestamp
+        self._values[self._end] = value
+        self._end += 1
+        self._prune(timestamp)
+
+    def extend(self, values, timestamps):
+        """
+        Append a block of samples at once, e.g. a column of a board frame block and its "timestamp" column
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        if self._end + len(values) > len(self._times):
+            self._makeRoom(len(values))
+        self._times[self._end:self._end + len(values)] = timestamps
+        self._values[self._end:self._end + len(values)] = values
+        self._end += len(values)
+        self._prune(int(self._times[self._end - 1]))
+
+    def _makeRoom(self, count: int):
+        length = len(self)
+        if length + count <= len(self._times) // 2:
+            # mostly pruned space, moving the live entries to the front is cheaper than growing
+            self._times[:length] = self._times[self._start:self._end]
+            self._values[:length] = self._values[self._start:self._end]
+        else:
+            capacity = max(2 * len(self._times), length + count)
+            times = np.empty(capacity, dtype=np.int64)
+            values = np.empty(capacity)
+            times[:length] = self._times[self._start:self._end]
+            values[:length] = self._values[self._start:self._end]
+            self._times = times
+            self._values = values
+        self._start = 0
+        self._end = length
+
+    def _index(self, timestamp: int, side: str = "left") -> int:
+        return self._start + int(np.searchsorted(self._times[self._start:self._end], timestamp, side))
 
     def _prune(self, now=None):
         """Remove entries older than max_age from the left."""
         if now is None:
-            now = time.time()
-        cutoff = now - self.max_age
-        # keep popping until the oldest one is recent enough
-        while self._buffer and self._buffer[0][0] < cutoff:
-            self._buffer.popleft()
+            now = time.monotonic_ns()
+        cutoff = now - self._maxAgeNs
+        times = self._times
+        start = self._start
+        if start == self._end or times[start] >= cutoff:
+            return
+        # at a steady rate each new sample pushes out about one old one, no need to search for that
+        if start + 1 < self._end and times[start + 1] >= cutoff:
+            self._start = start + 1
+        else:
+            self._start = self._index(cutoff)
 
-    def get_times(self):
-        """Return list of timestamps currently in the buffer."""
-        return [t for t, _ in self._buffer]
+    def get_times(self) -> np.ndarray:
+        """Timestamps currently in the buffer, a view that is only valid until the next add."""
+        return self._times[self._start:self._end]
 
-    def get_values(self):
-        """Return list of values currently in the buffer."""
-        return [v for _, v in self._buffer]
+    def get_values(self) -> np.ndarray:
+        """Values currently in the buffer, a view that is only valid until the next add."""
+        return self._values[self._start:self._end]
 
     def get_items(self):
-        """Return list of (timestamp, value) pairs."""
-        return list(self._buffer)
+        """Return (timestamps, values), as views."""
+        return self.get_times(), self.get_values()
 
     def clear(self):
         """Empty the buffer completely."""
-        self._buffer.clear()
+        self._start = 0
+        self._end = 0
+
+    def between(self, start: int, end: int):
+        """
+        (timestamps, values) of the entries with start <= timestamp < end (time.monotonic_ns()), as views
+        """
+        first = self._index(start)
+        last = max(first, self._index(end))
+        return self._times[first:last], self._values[first:last]
 
     def get_items_by_age(self, older_than: float, younger_than: float):
         """
-        Return list of (timestamp, value) pairs whose age is:
+        (timestamps, values) of the entries whose age is:
             older than `older_than` seconds (i.e. age > older_than)
         and younger than `younger_than` seconds (i.e. age < younger_than).
         """
-        now = time.time()
-        results = []
-        for ts, val in self._buffer:
-            age = now - ts
-            if older_than < age < younger_than:
-                results.append((ts, val))
-        return results
+        now = time.monotonic_ns()
+        first = self._index(now - round(younger_than * 1e9), "right")
+        last = max(first, self._index(now - round(older_than * 1e9)))
+        return self._times[first:last], self._values[first:last]
 
 
 class SignalTimedBuffer(TimedBuffer):
@@ -437,39 +668,86 @@ class SignalTimedBuffer(TimedBuffer):
 
 class AutoUpdateGraph(QWidget):
     """
-    Uses a circular buffer to keep track of the incoming data
+    Keeps the latest buffer_size samples with their time in a preallocated ring buffer and redraws at most fps times a
+    second, and only when something new came in, so adding a sample costs the same at any sample rate and buffer size
+    the x axis is seconds before the newest sample, buffers longer than max_points are drawn min/max decimated, so
+    spikes stay visible
     """
-    def __init__(self, buffer_size=200):
+    def __init__(self, buffer_size=200, max_points=None, fps=GRAPH_FPS):
         super().__init__()
 
-        # plotting buffer
+        # plotting buffer, every sample is written twice, at ptr and ptr + buffer_size, so the latest buffer_size
+        # samples are always one contiguous slice and drawing never copies or rolls the buffer
         self.buffer_size = buffer_size
-        self.data = np.zeros(self.buffer_size)
+        self.max_points = max_points
+        self.data = np.zeros(2 * self.buffer_size)
+        # host time.monotonic_ns() of every sample
+        self.times = np.zeros(2 * self.buffer_size, dtype=np.int64)
         self.ptr = 0
+        self.count = 0
+        self.dirty = False
 
         # setup layout + plot
         layout = QVBoxLayout(self)
         self.plot_widget = pg.PlotWidget()
         layout.addWidget(self.plot_widget)
-        self.curve = self.plot_widget.plot(self.data)
+        self.curve = self.plot_widget.plot()
 
         # styling
         self.plot_widget.showGrid(x=True, y=True)
         self.plot_widget.setLabel('left', 'y')
-        self.plot_widget.setLabel('bottom', 'x')
+        self.plot_widget.setLabel('bottom', 'Time (s)')
         self.plot_widget.setBackground('#1e1e1e')
 
+        self.redrawTimer = QTimer(self)
+        self.redrawTimer.timeout.connect(self.redraw)
+        self.redrawTimer.start(max(1, round(1000 / fps)))
+
     @pyqtSlot(int)
-    def addPointInt(self, value):
-        self.data[self.ptr] = value
-        self.ptr = (self.ptr + 1) % self.buffer_size
-        self.curve.setData(np.roll(self.data, -self.ptr))
+    def addPointInt(self, value, timestamp=None):
+        self.addPointFloat(value, timestamp)
 
     @pyqtSlot(float)
-    def addPointFloat(self, value):
-        self.data[self.ptr] = value
-        self.ptr = (self.ptr + 1) % self.buffer_size
-        self.curve.setData(np.roll(self.data, -self.ptr))
+    def addPointFloat(self, value, timestamp=None):
+        """
+        timestamp: host time.monotonic_ns() the value was measured, now if None
+        """
+        if not timestamp:
+            timestamp = time.monotonic_ns()
+        ptr = self.ptr
+        self.data[ptr] = self.data[ptr + self.buffer_size] = value
+        self.times[ptr] = self.times[ptr + self.buffer_size] = timestamp
+        self.ptr = ptr + 1 if ptr + 1 < self.buffer_size else 0
+        if self.count < self.buffer_size:
+            self.count += 1
+        self.dirty = True
+
+    def clear(self):
+        self.ptr = 0
+        self.count = 0
+        self.dirty = True
+
+    def window(self):
+        """
+        The buffered samples oldest first, as views into the buffer that are only valid until the next sample
+        """
+        end = self.ptr + self.buffer_size
+        return self.times[end - self.count:end], self.data[end - self.count:end]
+
+    def redraw(self):
+        if not self.dirty or not self.isVisible():
+            return
+        self.dirty = False
+        times, data = self.window()
+        if not len(data):
+            self.curve.setData([], [])
+            return
+        seconds = (times - times[-1]) / 1e9
+        if self.max_points is not None and len(data) > self.max_points:
+            keep = decimate.minMax(data, self.max_points)
+            self.curve.setData(seconds[keep], data[keep])
+        else:
+            self.curve.setData(seconds, data)
 
     def setTitle(self, title):
         self.plot_widget.setTitle(title)
@@ -481,3 +759,39 @@ class AutoUpdateGraph(QWidget):
     def setXAxisTitle(self, title):
         self.plot_widget.setLabel('bottom', title)
         self.plot_widget.getAxis('left').enableAutoSIPrefix(False)
+
+
+class ChannelGraph(AutoUpdateGraph):
+    """
+    AutoUpdateGraph with a selector for the column it shows, Test feeds it the selected column
+    """
+    def __init__(self, channel, units, buffer_size=200, max_points=None):
+        super().__init__(buffer_size, max_points)
+
+        self.channel = channel
+        # units by column, derived columns go without
+        self.units = units
+
+        self.selector = QComboBox()
+        self.selector.currentTextChanged.connect(self.selectChannel)
+        self.layout().insertWidget(0, self.selector)
+        self.setChannels([channel])
+
+    def setChannels(self, channels):
+        self.selector.blockSignals(True)
+        self.selector.clear()
+        self.selector.addItems(channels)
+        self.selector.setCurrentText(self.channel)
+        self.selector.blockSignals(False)
+        self.setYAxisTitle(self.title())
+
+    def selectChannel(self, channel):
+        if not channel or channel == self.channel:
+            return
+        self.channel = channel
+        self.setYAxisTitle(self.title())
+        self.clear()
+
+    def title(self):
+        unit = self.units.get(self.channel)
+        return f"{self.channel} ({unit})" if unit else self.channel